@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the Markdown to Confluence storage converter
+
+Converts synthetic documents of doubling size (typical generated
+documentation plus malformed inline markup) and checks that the time per
+byte stays flat, i.e. that ``markdown_to_storage`` is linear in the size of
+the document. Exits with status 1 when the largest document is converted
+more than ``--max-ratio`` times slower per byte than the smallest.
+"""
+
+import argparse
+import sys
+import time
+
+from docgen.confluence import markdown_to_storage
+
+SECTION = """## 📦 `.cloud/terraform/modules/aws-ec2-windows` {number}
+
+The **domain controller** module creates the `aws_instance.this` resource, its *security group*
+and the ~~legacy~~ [SSM association](https://docs.aws.amazon.com/systems-manager/) used for
+promotion. See <https://registry.terraform.io/providers/hashicorp/aws/latest> for the provider.
+
+> [!WARNING]
+> Rotate `admin_password` after the first deployment.
+
+> ⚠️ Could not fully parse variables.tf: unexpected `}}` at line 193
+
+| Name | Type | Default | Description |
+|------|------|---------|-------------|
+| `instance_type` | `string` | `"t3.medium"` | EC2 size, e.g. `t3.large` \\| `m5.large` |
+| `domain_name` | `string` | - | Active Directory **DNS** name |
+| `allowed_cidrs` | `list(string)` | `[]` | Ingress ranges for *RDP* and LDAP |
+
+1. Initialise the backend:
+   ```bash
+   terraform init -backend-config=env/{number}.hcl
+   ```
+2. Review the plan with `terraform plan -out plan.tfplan`
+   - check the `aws_security_group_rule` changes
+   - check **every** `ingress` block
+3. Apply it
+
+```hcl
+resource "aws_instance" "this" {{
+  ami           = data.aws_ami.windows.id
+  instance_type = var.instance_type
+  user_data     = templatefile("${{path.module}}/userdata.ps1", {{ domain = var.domain_name }})
+  tags          = {{ Name = "dc-{number}" }} # ]]> must survive CDATA
+}}
+```
+
+Unbalanced markup stays literal: **bold without end, `code without end, [link without target]( and 2 * 3 * 4.
+
+---
+
+"""
+
+
+def build_document(target_bytes: int) -> str:
+    """Repeat the sample section until the document reaches ``target_bytes``"""
+    parts = []
+    size = 0
+    number = 0
+    while size < target_bytes:
+        section = SECTION.format(number=number)
+        parts.append(section)
+        size += len(section.encode('utf-8'))
+        number += 1
+    return ''.join(parts)
+
+
+def measure(document: str, repeat: int) -> float:
+    """Best conversion time of ``repeat`` runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        markdown_to_storage(document)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Markdown to Confluence converter')
+    parser.add_argument('--min-kb', type=int, default=64, help='Smallest document size in KB')
+    parser.add_argument('--max-mb', type=float, default=4, help='Largest document size in MB')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size (best time is kept)')
+    parser.add_argument('--max-ratio', type=float, default=2.0,
+                        help='Largest allowed per-byte slowdown of the largest document')
+    args = parser.parse_args()
+
+    sizes = []
+    size = args.min_kb * 1024
+    while size <= args.max_mb * 1024 * 1024:
+        sizes.append(size)
+        size *= 2
+
+    print(f"{'Size':>10} {'Time (s)':>10} {'MB/s':>8} {'µs/KB':>8}")
+    per_kb = []
+    for size in sizes:
+        document = build_document(size)
+        elapsed = measure(document, args.repeat)
+        kilobytes = len(document.encode('utf-8')) / 1024
+        per_kb.append(elapsed * 1e6 / kilobytes)
+        print(f"{kilobytes:>8.0f}KB {elapsed:>10.3f} {kilobytes / 1024 / elapsed:>8.2f} {per_kb[-1]:>8.1f}")
+
+    ratio = per_kb[-1] / per_kb[0]
+    print(f"Per-byte cost ratio (largest/smallest): {ratio:.2f}")
+    if ratio > args.max_ratio:
+        print(f"❌ Conversion is not linear in document size (ratio above {args.max_ratio})")
+        sys.exit(1)
+    print("✅ Conversion time is linear in document size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the documentation pipeline on synthetic repositories
+
+Generates IaC trees of increasing size (Terraform modules, PowerShell
+scripts, YAML and JSON configuration), then runs every stage of
+``docgen.pipeline`` against them with a local fake LLM provider (fixed latency
+per request) and a local fake Confluence REST server. Each size runs in its own process so
+that peak memory is measured per size.
+
+For every size the benchmark reports the throughput of the scan, the peak
+resident memory and the p50/p95 latency of each stage of the run report
+(cold and warm scan, pack, analyze, render, publish, prompt rendering, LLM
+calls, conversion, Confluence requests). Results are compared with the stored baseline
+(``benchmark_baseline.json``) and the benchmark exits with status 1 when a
+stage is more than ``--tolerance`` times slower, or memory grew by as much.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+BASELINE_PATH = Path(__file__).with_name('benchmark_baseline.json')
+
+DEFAULT_SIZES = [100, 1000, 10000]
+
+# Stages faster than this (seconds) are too noisy to flag as regressions
+MIN_REGRESSION_SECONDS = 0.05
+
+MODULE_TF = """# Module {module} of group {group}
+resource "aws_instance" "{name}" {{
+  ami           = data.aws_ami.windows.id
+  instance_type = var.instance_type
+  subnet_id     = var.subnet_id
+  user_data     = templatefile("${{path.module}}/userdata.ps1", {{ domain = var.domain_name }})
+
+  tags = {{
+    Name  = "{name}"
+    Group = "{group}"
+  }}
+}}
+
+resource "aws_security_group" "{name}" {{
+  name   = "{name}-sg"
+  vpc_id = var.vpc_id
+
+  ingress {{
+    from_port   = 3389
+    to_port     = 3389
+    protocol    = "tcp"
+    cidr_blocks = var.allowed_cidrs
+  }}
+}}
+
+data "aws_ami" "windows" {{
+  most_recent = true
+  owners      = ["amazon"]
+}}
+"""
+
+VARIABLES_TF = """variable "instance_type" {{
+  description = "EC2 instance size of {name}"
+  type        = string
+  default     = "t3.medium"
+}}
+
+variable "subnet_id" {{
+  description = "Subnet hosting {name}"
+  type        = string
+}}
+
+variable "vpc_id" {{
+  type = string
+}}
+
+variable "domain_name" {{
+  description = "Active Directory DNS name"
+  type        = string
+  default     = "corp.example.com"
+}}
+
+variable "allowed_cidrs" {{
+  type    = list(string)
+  default = ["10.{octet}.0.0/16"]
+}}
+"""
+
+OUTPUTS_TF = """output "instance_id" {{
+  description = "Id of {name}"
+  value       = aws_instance.{name}.id
+}}
+
+output "security_group_id" {{
+  value = aws_security_group.{name}.id
+}}
+"""
+
+SCRIPT_PS1 = """<#
+.SYNOPSIS
+    Configure {name}
+#>
+param(
+    [Parameter(Mandatory = $true)][string]$DomainName,
+    [string]$SiteName = "{group}"
+)
+
+function Install-{function} {{
+    param([string]$Name)
+    Install-WindowsFeature -Name AD-Domain-Services -IncludeManagementTools
+    Write-Output "Installed $Name"
+}}
+
+Install-{function} -Name "{name}"
+"""
+
+CONFIG_YAML = """# Settings of {name}
+name: {name}
+group: {group}
+replicas: {octet}
+backup:
+  enabled: true
+  schedule: "0 {octet} * * *"
+dns:
+  forwarders:
+    - 10.{octet}.0.2
+    - 10.{octet}.0.3
+"""
+
+POLICY_JSON = """{{
+  "Version": "2012-10-17",
+  "Statement": [
+    {{
+      "Sid": "{function}",
+      "Effect": "Allow",
+      "Action": ["ssm:SendCommand", "ec2:DescribeInstances"],
+      "Resource": "arn:aws:ec2:*:*:instance/{name}"
+    }}
+  ]
+}}
+"""
+
+# Files written per module: 40% Terraform, 20% each PowerShell, YAML and JSON
+MODULE_FILES = [
+    ('main.tf', MODULE_TF + OUTPUTS_TF),
+    ('variables.tf', VARIABLES_TF),
+    ('userdata.ps1', SCRIPT_PS1),
+    ('settings.yaml', CONFIG_YAML),
+    ('policy.json', POLICY_JSON),
+]
+
+# Modules per group directory
+GROUP_SIZE = 20
+
+
+def build_tree(root: Path, files: int) -> int:
+    """
+    Write a synthetic IaC repository of ``files`` files under ``root``
+
+    Returns:
+        Bytes written
+    """
+    written = 0
+    count = 0
+    module = 0
+    while count < files:
+        group = f"group-{module // GROUP_SIZE:04d}"
+        name = f"dc{module:06d}"
+        values = {
+            'module': module, 'group': group, 'name': name, 'octet': module % 250,
+            'function': f"DomainController{module}",
+        }
+        module_dir = root / 'modules' / group / name
+        module_dir.mkdir(parents=True, exist_ok=True)
+        for file_name, template in MODULE_FILES[:files - count]:
+            content = template.format(**values)
+            (module_dir / file_name).write_text(content, encoding='utf-8')
+            written += len(content)
+            count += 1
+        module += 1
+    return written
+
+
+def fake_provider(latency: float, jitter: float):
+    """Return a ``docgen.providers.Provider`` answering locally after ``latency`` seconds"""
+    from docgen.packer import estimate_tokens
+    from docgen.providers import Provider
+
+    class Fake(Provider):
+        name = 'fake'
+
+        def complete(self, prompt: str, max_tokens: int) -> str:
+            time.sleep(max(0.0, random.gauss(latency, jitter)))
+            headings = re.findall(r'^#+ .*$', prompt, re.MULTILINE)[:20]
+            text = "## Notes\n\n" + '\n'.join(f"- {heading.lstrip('# ')}" for heading in headings) + '\n'
+            self.record_usage(estimate_tokens(prompt), estimate_tokens(text))
+            return text
+
+    return Fake(None, 'fake-llm')
+
+
+class FakeConfluence(BaseHTTPRequestHandler):
+    """Minimal Confluence REST API (spaces, content search, create, update) kept in memory"""
+
+    pages: Dict[str, Dict[str, Any]] = {}
+    lock = threading.Lock()
+    latency = 0.0
+    space = 'BENCH'
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, body: Any) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self) -> None:
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        if url.path == '/rest/api/space':
+            return self._reply(200, {'results': [{'key': self.space}]})
+        if url.path.startswith('/rest/api/space/'):
+            found = url.path.rsplit('/', 1)[-1] == self.space
+            return self._reply(200 if found else 404, {'key': self.space} if found else {})
+        if url.path == '/rest/api/content':
+            title = parse_qs(url.query).get('title', [''])[0]
+            with self.lock:
+                results = [page for page in self.pages.values() if page['title'] == title]
+            return self._reply(200, {'results': results})
+        self._reply(404, {})
+
+    def do_POST(self) -> None:
+        time.sleep(self.latency)
+        data = self._body()
+        with self.lock:
+            page_id = str(len(self.pages) + 1)
+            self.pages[page_id] = {'id': page_id, 'title': data['title'], 'version': {'number': 1},
+                                   'body': data['body']}
+            page = self.pages[page_id]
+        self._reply(200, page)
+
+    def do_PUT(self) -> None:
+        time.sleep(self.latency)
+        data = self._body()
+        page_id = urlparse(self.path).path.rsplit('/', 1)[-1]
+        with self.lock:
+            page = self.pages.get(page_id)
+            if page is not None:
+                page.update(title=data['title'], body=data['body'], version=data['version'])
+        self._reply(200 if page else 404, page or {})
+
+
+def start_confluence(latency: float) -> ThreadingHTTPServer:
+    """Serve ``FakeConfluence`` on a free local port in a background thread"""
+    FakeConfluence.latency = latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeConfluence)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process in MB (0 where ``resource`` is unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(args: argparse.Namespace) -> Dict[str, Any]:
+    """Benchmark one repository size in this process and return its results"""
+    server = start_confluence(args.confluence_latency)
+    try:
+        with tempfile.TemporaryDirectory(prefix='docgen-bench-') as work_dir:
+            return measure(Path(work_dir), server, args)
+    finally:
+        server.shutdown()
+
+
+def measure(work_dir: Path, server: ThreadingHTTPServer, args: argparse.Namespace) -> Dict[str, Any]:
+    """Generate a repository in ``work_dir`` and time every pipeline stage on it"""
+    root = work_dir / 'repo'
+    start = time.perf_counter()
+    written = build_tree(root, args.files)
+    generate_seconds = time.perf_counter() - start
+
+    os.environ.update({
+        'DOCGEN_CACHE_DIR': str(work_dir / 'cache'),
+        'DOCGEN_CONCURRENCY': str(args.concurrency),
+        # The fake provider is only limited by its latency and the concurrency
+        'DOCGEN_FAKE_RPM': '1000000000',
+        'DOCGEN_FAKE_TPM': '1000000000000',
+        'CONFLUENCE_BASE_URL': f"http://127.0.0.1:{server.server_port}",
+        'CONFLUENCE_USERNAME': 'bench',
+        'CONFLUENCE_API_TOKEN': 'bench',
+        'CONFLUENCE_SPACE_KEY': FakeConfluence.space,
+    })
+    for name in ('ANTHROPIC_API_KEY', 'OPENAI_API_KEY', 'GEMINI_API_KEY'):
+        os.environ.pop(name, None)
+
+    from docgen.metrics import get_report, reset_report
+    from docgen.pipeline import STAGES, Pipeline
+    from docgen.providers import LLMRouter
+    logging.getLogger().setLevel(logging.WARNING)
+
+    provider = fake_provider(args.llm_latency, args.llm_latency / 4)
+    pipeline = Pipeline(base_path=str(root), work_dir=work_dir / 'pipeline',
+                        output_file=str(work_dir / 'generated_docs.md'), multi_page=args.multi_page)
+    pipeline.models = {provider.name: provider.model}
+    pipeline.router = LLMRouter([provider], pipeline.cache_dir)
+
+    # Cold scan: empty manifest, every file read and parsed
+    reset_report()
+    pipeline.scan()
+    stages = {'scan_cold': get_report().to_dict()['stages']['scan']}
+
+    # Warm run: every stage (scan, pack, LLM analysis, rendering, publication), then prompt rendering
+    report = reset_report()
+    try:
+        pipeline.run(list(STAGES))
+        success = True
+    except RuntimeError as e:
+        logging.error(str(e))
+        success = False
+    total_seconds = report.elapsed
+    pack = pipeline.load('pack')
+    files_data = pipeline.files_data(pipeline.load('scan'))
+    chunks = 0
+    for key, entry in pack['entries'].items():
+        # Chunks are rendered (their files read) on access
+        contexts = pipeline.chunks(files_data, key, entry)
+        for index in range(len(contexts)):
+            with report.stage('prompt') as counters:
+                counters['bytes'] = len(pipeline.prompt(key, contexts[index]))
+        chunks += len(contexts)
+    stages.update(report.to_dict()['stages'])
+
+    cold = stages['scan_cold']
+    return {
+        'files': args.files,
+        'bytes': written,
+        'success': success,
+        'chunks': chunks,
+        'generate_seconds': round(generate_seconds, 3),
+        'total_seconds': round(total_seconds, 3),
+        'scan_files_per_second': round(args.files / cold['seconds'], 1) if cold['seconds'] else 0.0,
+        'scan_mb_per_second': round(written / 1048576 / cold['seconds'], 2) if cold['seconds'] else 0.0,
+        'peak_memory_mb': round(peak_memory_mb(), 1),
+        'stages': {
+            name: {key: stats[key] for key in ('calls', 'seconds', 'p50_seconds', 'p95_seconds', 'bytes')}
+            for name, stats in stages.items()
+        },
+    }
+
+
+def run_size(files: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Benchmark one size in a child process (so peak memory is per size)"""
+    command = [
+        sys.executable, str(Path(__file__).resolve()), '--worker', '--files', str(files),
+        '--llm-latency', str(args.llm_latency), '--confluence-latency', str(args.confluence_latency),
+        '--concurrency', str(args.concurrency),
+    ] + (['--multi-page'] if args.multi_page else [])
+    result = subprocess.run(command, capture_output=True, text=True, cwd=Path(__file__).parent)
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark of {files} files failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline`` (same sizes only)"""
+    regressions = []
+    for size, result in results.items():
+        reference = baseline.get(size)
+        if not reference:
+            continue
+        if result['peak_memory_mb'] > reference['peak_memory_mb'] * tolerance:
+            regressions.append(f"{size} files: peak memory {result['peak_memory_mb']}MB "
+                               f"(baseline {reference['peak_memory_mb']}MB)")
+        for stage, stats in result['stages'].items():
+            expected = reference['stages'].get(stage)
+            if not expected:
+                continue
+            limit = max(expected['p95_seconds'] * tolerance, MIN_REGRESSION_SECONDS)
+            if stats['p95_seconds'] > limit:
+                regressions.append(f"{size} files: {stage} p95 {stats['p95_seconds']:.3f}s "
+                                   f"(baseline {expected['p95_seconds']:.3f}s)")
+    return regressions
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    for size, result in results.items():
+        print(f"\n{size} files ({result['bytes'] / 1048576:.1f} MB, {result['chunks']} chunks): "
+              f"total {result['total_seconds']:.2f}s, scan {result['scan_files_per_second']:.0f} files/s "
+              f"({result['scan_mb_per_second']:.1f} MB/s), peak memory {result['peak_memory_mb']:.0f} MB")
+        print(f"  {'Stage':<16} {'Calls':>7} {'Total (s)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+        for stage, stats in result['stages'].items():
+            print(f"  {stage:<16} {stats['calls']:>7} {stats['seconds']:>10.3f} "
+                  f"{stats['p50_seconds'] * 1000:>10.1f} {stats['p95_seconds'] * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the documentation pipeline on synthetic repositories')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Repository sizes in files (default: 100 1000 10000, up to 100000)')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='Fake LLM latency per request (s)')
+    parser.add_argument('--confluence-latency', type=float, default=0.005,
+                        help='Fake Confluence latency per request (s)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent LLM requests (DOCGEN_CONCURRENCY)')
+    parser.add_argument('--multi-page', action='store_true', help='Publish one Confluence page per section')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help='Baseline results file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='Allowed slowdown (and memory growth) factor over the baseline')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--files', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args)))
+        return
+
+    results = {}
+    for files in args.sizes:
+        print(f"Benchmarking {files} files...", flush=True)
+        results[str(files)] = run_size(files, args)
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8')) if baseline_path.is_file() else {}
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+        print(f"\n💾 Baseline saved to {baseline_path}")
+        return
+    if not baseline_path.is_file():
+        print(f"\nℹ️ No baseline at {baseline_path}, run with --save-baseline to create one")
+        return
+
+    regressions = compare(results, json.loads(baseline_path.read_text(encoding='utf-8')), args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance}x the baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print(f"\n✅ No regression over {args.tolerance}x the baseline")
+
+
+if __name__ == "__main__":
+    main()
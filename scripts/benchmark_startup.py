@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark of the documentation scripts
+
+Runs the startup paths that never call an LLM or Confluence (``--help``,
+offline rendering of a small tree, the scan stage alone) in fresh
+interpreters with ``-X importtime`` and reports, for each one, the wall time
+and the time spent importing the scripts' own modules and dependencies
+(interpreter startup excluded, median of ``--repeat`` runs).
+
+The benchmark exits with status 1 when one of these paths imports a
+provider SDK, ``requests`` or ``asyncio`` (they must only load on the code
+paths that use them), when ``--help`` imports a docgen module other than
+the pipeline definition (parsers, converters and providers load with the
+stages that use them), or when its imports take longer than ``--budget``
+milliseconds.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Modules that must not be imported by the startup paths
+HEAVY_MODULES = ('anthropic', 'openai', 'google.generativeai', 'requests', 'asyncio', 'bs4', 'markdown', 'yaml')
+
+# The only docgen modules ``--help`` may import (the stage names and the run report)
+HELP_MODULES = {'docgen', 'docgen.metrics', 'docgen.pipeline'}
+
+# Imported by the interpreter itself, before the script runs
+INTERPRETER_MODULES = {'site', 'encodings', 'encodings.utf_8', '_frozen_importlib_external', 'zipimport', 'io',
+                       'abc', 'codecs', 'marshal', 'posix', '_io', 'time', 'winreg', '_signal'}
+
+# Default import budget per startup path (milliseconds)
+DEFAULT_BUDGET_MS = 100.0
+
+SAMPLE_TF = """resource "aws_instance" "dc01" {
+  ami           = var.ami_id
+  instance_type = var.instance_type
+}
+
+variable "ami_id" {
+  type = string
+}
+
+variable "instance_type" {
+  type    = string
+  default = "t3.medium"
+}
+"""
+
+
+def scenarios() -> List[Tuple[str, List[str]]]:
+    """(name, arguments after ``python -X importtime``) of every startup path"""
+    return [
+        ('generate_docs --help', [str(SCRIPTS_DIR / 'generate_docs.py'), '--help']),
+        ('generate_documentation --help', [str(SCRIPTS_DIR / 'generate_documentation.py'), '--help']),
+        ('generate_docs --offline', [str(SCRIPTS_DIR / 'generate_docs.py'), '--offline', '--output', 'out.md']),
+        ('generate_documentation --offline',
+         [str(SCRIPTS_DIR / 'generate_documentation.py'), '--offline', '--output', 'out.md']),
+        ('docgen_cli --help', [str(SCRIPTS_DIR / 'docgen_cli.py'), '--help']),
+        ('docgen_cli scan', [str(SCRIPTS_DIR / 'docgen_cli.py'), 'scan']),
+        ('docgen_cli --offline', [str(SCRIPTS_DIR / 'docgen_cli.py'), '--offline', '--output', 'out.md']),
+    ]
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[str]]:
+    """
+    Parse ``-X importtime`` output
+
+    Returns:
+        (milliseconds spent in top-level imports outside the interpreter startup, every imported module)
+    """
+    total_us = 0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        module = name.strip()
+        modules.append(module)
+        # Top-level imports are not indented; nested ones are already counted in their parent
+        if name.startswith(' ') and not name.startswith('  ') and module not in INTERPRETER_MODULES:
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def run_scenario(args: List[str], cwd: str, env: Dict[str, str]) -> Tuple[float, float, List[str]]:
+    """Run one startup path: (wall seconds, import milliseconds, imported modules)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-W', 'ignore'] + args,
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{result.stdout}{result.stderr}")
+    import_ms, modules = parse_importtime(result.stderr)
+    return elapsed, import_ms, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the startup of the documentation scripts')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per startup path (median is reported)')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Maximum import time per startup path in ms (default: {DEFAULT_BUDGET_MS:.0f})')
+    args = parser.parse_args()
+
+    env = {key: value for key, value in os.environ.items()
+           if not key.endswith('_API_KEY') and not key.startswith('CONFLUENCE_')}
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(SCRIPTS_DIR), env.get('PYTHONPATH')]))
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix='docgen-startup-') as tmp:
+        tree = Path(tmp)
+        (tree / 'main.tf').write_text(SAMPLE_TF, encoding='utf-8')
+        env['DOCGEN_CACHE_DIR'] = str(tree / '.docgen_cache')
+
+        baseline = statistics.median(run_scenario(['-c', 'pass'], tmp, env)[0] for _ in range(args.repeat))
+        print(f"{'Startup path':34} {'wall':>9} {'imports':>9}")
+        print(f"{'python -c pass':34} {baseline * 1000:7.0f}ms {'-':>9}")
+        for name, scenario_args in scenarios():
+            runs = [run_scenario(scenario_args, tmp, env) for _ in range(args.repeat)]
+            wall = statistics.median(run[0] for run in runs)
+            import_ms = statistics.median(run[1] for run in runs)
+            print(f"{name:34} {wall * 1000:7.0f}ms {import_ms:7.1f}ms")
+
+            heavy = sorted({module for run in runs for module in run[2] if module in HEAVY_MODULES})
+            if heavy:
+                failures.append(f"{name} imports {', '.join(heavy)}")
+            if name.endswith('--help'):
+                stages = sorted({module for run in runs for module in run[2]
+                                 if module.startswith('docgen.') and module not in HELP_MODULES})
+                if stages:
+                    failures.append(f"{name} imports {', '.join(stages)} before parsing its arguments")
+            if import_ms > args.budget:
+                failures.append(f"{name} spends {import_ms:.0f}ms importing modules (budget {args.budget:.0f}ms)")
+
+    if failures:
+        print(f"\n❌ {len(failures)} startup regression(s):")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print(f"\n✅ Every startup path imports in under {args.budget:.0f}ms without loading a provider SDK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Shared helpers for the documentation generator scripts.
+
+The modules in this package are imported by ``docgen_cli.py`` (and its
+aliases ``generate_docs.py`` and ``generate_documentation.py``), which add
+this directory to ``sys.path`` simply by being run as scripts from ``scripts/``.
+"""
@@ -0,0 +1,148 @@
+"""
+Concurrent execution of LLM requests
+
+``run_concurrently`` fans blocking provider calls out on an asyncio event
+loop (each call runs in a worker thread) with a cap on how many are in
+flight, and returns results in submission order. ``RateLimiter`` enforces
+per-provider requests/min and tokens/min budgets with token buckets; it is
+acquired around the actual API call so cache hits never consume budget.
+``asyncio`` is only imported when calls actually run concurrently, keeping
+it out of the startup of offline and scan-only runs.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+DEFAULT_CONCURRENCY = 4
+
+# (requests per minute, input tokens per minute), overridable with
+# DOCGEN_<PROVIDER>_RPM / DOCGEN_<PROVIDER>_TPM
+PROVIDER_LIMITS: Dict[str, Tuple[int, int]] = {
+    'anthropic': (50, 80000),
+    'gemini': (15, 1000000),
+    'openai': (500, 30000),
+}
+
+
+def get_concurrency() -> int:
+    """Return the fan-out width from ``DOCGEN_CONCURRENCY`` (default 4)"""
+    return max(1, int(os.getenv('DOCGEN_CONCURRENCY', DEFAULT_CONCURRENCY)))
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``per_minute`` tokens/min"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Block until ``amount`` tokens are available and take them
+
+        Requests larger than the bucket only wait for a full bucket.
+
+        Returns:
+            Seconds spent waiting
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """Per-provider request/token budgets plus a cap on in-flight requests"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float,
+                 max_concurrency: int = DEFAULT_CONCURRENCY):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    @contextmanager
+    def request(self, tokens: int) -> Iterator[None]:
+        """Hold an in-flight slot and consume budget for one request"""
+        with self._slots:
+            waited = self.requests.acquire(1) + self.tokens.acquire(tokens)
+            if waited > 1:
+                logger.info(f"Rate limited for {waited:.1f}s")
+            yield
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """
+    Return the shared rate limiter for a provider
+
+    Args:
+        provider: Provider name (``anthropic``, ``gemini``, ``openai``)
+
+    Returns:
+        Process-wide RateLimiter configured from ``PROVIDER_LIMITS`` and the environment
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            rpm, tpm = PROVIDER_LIMITS.get(provider, (60, 100000))
+            prefix = f"DOCGEN_{provider.upper()}"
+            _limiters[provider] = RateLimiter(
+                float(os.getenv(f"{prefix}_RPM", rpm)),
+                float(os.getenv(f"{prefix}_TPM", tpm)),
+                get_concurrency()
+            )
+        return _limiters[provider]
+
+
+async def _gather(calls: List[Callable[[], T]], concurrency: int) -> List[T]:
+    import asyncio
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(call: Callable[[], T]) -> T:
+        async with semaphore:
+            return await asyncio.to_thread(call)
+
+    return await asyncio.gather(*(run_one(call) for call in calls))
+
+
+def run_concurrently(calls: List[Callable[[], T]], concurrency: Optional[int] = None) -> List[T]:
+    """
+    Run blocking calls concurrently and return their results in order
+
+    Args:
+        calls: Zero-argument callables (typically wrapped LLM requests)
+        concurrency: Maximum calls in flight (default ``get_concurrency()``)
+
+    Returns:
+        Results in the same order as ``calls``; the first exception is re-raised
+    """
+    concurrency = concurrency or get_concurrency()
+    if len(calls) <= 1 or concurrency == 1:
+        return [call() for call in calls]
+    import asyncio
+    return asyncio.run(_gather(calls, concurrency))
@@ -0,0 +1,455 @@
+"""
+Bulk analysis through the providers' asynchronous batch APIs
+
+Documenting many repositories at once does not need interactive latency:
+every prompt of a round (the chunk summaries of all repositories, then the
+merges, then the final documentation requests) is submitted as one batch,
+which the providers bill at a discount and run outside the interactive
+rate limits. ``run_jobs`` drives one ``MapReduceJob`` per repository round
+after round, polling each batch until it has ended.
+
+Providers without a batch API (or an SDK too old to expose it) fall back to
+``SyncBatchProvider``, which sends the same requests through the router.
+``StubBatchProvider`` answers locally and deterministically, for test
+harnesses and dry runs.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from docgen.async_runner import run_concurrently
+from docgen.chunking import map_reduce_steps
+from docgen.llm_cache import LLMCache
+from docgen.metrics import get_report
+from docgen.packer import estimate_tokens
+from docgen.providers import LLMRouter
+
+logger = logging.getLogger(__name__)
+
+# Requests per submitted batch (both APIs accept more, but smaller batches finish sooner)
+MAX_BATCH_REQUESTS = 10000
+
+# Seconds between two status checks of a running batch
+DEFAULT_POLL_INTERVAL = 30.0
+
+# Batches still running after this many seconds are abandoned (the APIs' own window is 24h)
+DEFAULT_BATCH_TIMEOUT = 24 * 3600.0
+
+
+def get_poll_interval() -> float:
+    """Seconds between batch status checks (``DOCGEN_BATCH_POLL_INTERVAL``)"""
+    try:
+        return max(0.0, float(os.getenv('DOCGEN_BATCH_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)))
+    except ValueError:
+        return DEFAULT_POLL_INTERVAL
+
+
+class BatchProvider:
+    """One batch backend: submit requests, poll the batch, collect its results"""
+
+    name = 'batch'
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def submit(self, requests: Dict[str, str], max_tokens: int) -> str:
+        """
+        Submit prompts as one batch
+
+        Args:
+            requests: Prompt per request id (ids match ``[a-zA-Z0-9_-]{1,64}``)
+            max_tokens: Completion token limit of every request
+
+        Returns:
+            Batch id
+        """
+        raise NotImplementedError
+
+    def poll(self, batch_id: str) -> bool:
+        """Return True once the batch has ended (successfully or not)"""
+        raise NotImplementedError
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """Response text per request id, None for the requests that failed"""
+        raise NotImplementedError
+
+
+class AnthropicBatch(BatchProvider):
+    """Anthropic Message Batches API"""
+
+    name = 'anthropic'
+
+    def __init__(self, client: Any, model: str):
+        super().__init__(model)
+        messages = client.messages
+        # The API first shipped under the beta namespace
+        self.batches = getattr(messages, 'batches', None) or getattr(
+            getattr(getattr(client, 'beta', None), 'messages', None), 'batches', None)
+        if self.batches is None:
+            raise RuntimeError("the installed anthropic SDK has no Message Batches API")
+
+    def submit(self, requests: Dict[str, str], max_tokens: int) -> str:
+        batch = self.batches.create(requests=[
+            {
+                'custom_id': request_id,
+                'params': {
+                    'model': self.model,
+                    'max_tokens': max_tokens,
+                    'messages': [{'role': 'user', 'content': prompt}],
+                },
+            }
+            for request_id, prompt in requests.items()
+        ])
+        return batch.id
+
+    def poll(self, batch_id: str) -> bool:
+        return self.batches.retrieve(batch_id).processing_status == 'ended'
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        texts: Dict[str, Optional[str]] = {}
+        for entry in self.batches.results(batch_id):
+            if entry.result.type == 'succeeded':
+                texts[entry.custom_id] = ''.join(
+                    block.text for block in entry.result.message.content if hasattr(block, 'text'))
+            else:
+                logger.warning(f"Batch request {entry.custom_id} {entry.result.type}")
+                texts[entry.custom_id] = None
+        return texts
+
+
+class OpenAIBatch(BatchProvider):
+    """OpenAI Batch API over ``/v1/chat/completions``"""
+
+    name = 'openai'
+    ENDED = ('completed', 'failed', 'expired', 'cancelled')
+
+    def __init__(self, client: Any, model: str):
+        super().__init__(model)
+        if not hasattr(client, 'batches'):
+            raise RuntimeError("the installed openai SDK has no Batch API")
+        self.client = client
+
+    def submit(self, requests: Dict[str, str], max_tokens: int) -> str:
+        lines = [
+            json.dumps({
+                'custom_id': request_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': self.model,
+                    'messages': [{'role': 'user', 'content': prompt}],
+                    'max_tokens': max_tokens,
+                },
+            })
+            for request_id, prompt in requests.items()
+        ]
+        upload = self.client.files.create(
+            file=('batch.jsonl', io.BytesIO('\n'.join(lines).encode('utf-8'))), purpose='batch')
+        batch = self.client.batches.create(
+            input_file_id=upload.id, endpoint='/v1/chat/completions', completion_window='24h')
+        return batch.id
+
+    def poll(self, batch_id: str) -> bool:
+        return self.client.batches.retrieve(batch_id).status in self.ENDED
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status != 'completed':
+            logger.warning(f"Batch {batch_id} {batch.status}")
+        texts: Dict[str, Optional[str]] = {}
+        if not batch.output_file_id:
+            return texts
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get('response') or {}
+            if response.get('status_code') == 200:
+                texts[entry['custom_id']] = response['body']['choices'][0]['message']['content']
+            else:
+                logger.warning(f"Batch request {entry['custom_id']} failed: {entry.get('error')}")
+                texts[entry['custom_id']] = None
+        return texts
+
+
+class SyncBatchProvider(BatchProvider):
+    """Fallback running the batch requests immediately, concurrently, through the router"""
+
+    name = 'sync'
+
+    def __init__(self, router: LLMRouter):
+        super().__init__(router.models()[0] if router.providers else 'none')
+        self.router = router
+        self.done: Dict[str, Dict[str, Optional[str]]] = {}
+
+    def submit(self, requests: Dict[str, str], max_tokens: int) -> str:
+        def call(prompt: str) -> Optional[str]:
+            try:
+                return self.router.complete(prompt, max_tokens)[0]
+            except Exception as e:
+                logger.warning(f"Request failed: {e}")
+                return None
+
+        ids = list(requests)
+        texts = run_concurrently([lambda prompt=requests[request_id]: call(prompt) for request_id in ids])
+        batch_id = f"sync-{len(self.done)}"
+        self.done[batch_id] = dict(zip(ids, texts))
+        return batch_id
+
+    def poll(self, batch_id: str) -> bool:
+        return True
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        return self.done.pop(batch_id)
+
+
+def stub_response(prompt: str) -> str:
+    """Deterministic placeholder answer to ``prompt``"""
+    digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+    first_line = next((line.strip() for line in prompt.splitlines() if line.strip()), '')
+    return (f"## Stub response {digest}\n\n"
+            f"Prompt of {estimate_tokens(prompt)} tokens starting with: {first_line[:120]}\n")
+
+
+class StubBatchProvider(BatchProvider):
+    """Local batch backend answering with ``stub_response`` after a number of polls"""
+
+    name = 'stub'
+
+    def __init__(self, model: str = 'stub', polls: int = 1):
+        """
+        Args:
+            model: Model name used for the response cache
+            polls: Status checks returning "still running" before each batch ends
+        """
+        super().__init__(model)
+        self.polls = polls
+        self.batches: Dict[str, List[Any]] = {}
+        # Batches submitted so far
+        self.submitted = 0
+
+    def submit(self, requests: Dict[str, str], max_tokens: int) -> str:
+        batch_id = f"stub-{self.submitted}"
+        self.batches[batch_id] = [dict(requests), self.polls]
+        self.submitted += 1
+        return batch_id
+
+    def poll(self, batch_id: str) -> bool:
+        batch = self.batches[batch_id]
+        if batch[1] > 0:
+            batch[1] -= 1
+            return False
+        return True
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        requests, _ = self.batches.pop(batch_id)
+        return {request_id: stub_response(prompt) for request_id, prompt in requests.items()}
+
+
+def create_batch_provider(name: str = 'auto', router: Optional[LLMRouter] = None) -> BatchProvider:
+    """
+    Return the batch backend of the bulk mode
+
+    Args:
+        name: ``anthropic``, ``openai``, ``stub`` or ``auto`` (the first configured
+            provider whose SDK exposes a batch API)
+        router: Router over the configured providers (unused for ``stub``)
+
+    Returns:
+        Batch backend; requests go through the router when no batch API is available
+
+    Raises:
+        ValueError: If ``name`` is not configured (missing API key)
+    """
+    if name == 'stub':
+        return StubBatchProvider()
+    candidates = [provider for provider in router.providers if name in ('auto', provider.name)]
+    if name != 'auto' and not candidates:
+        raise ValueError(f"{name} is not configured (missing API key)")
+    for provider in candidates:
+        try:
+            if provider.name == 'anthropic':
+                return AnthropicBatch(provider.client, provider.model)
+            if provider.name == 'openai':
+                return OpenAIBatch(provider.client, provider.model)
+        except RuntimeError as e:
+            logger.warning(f"No batch API for {provider.name}: {e}")
+    logger.warning("Falling back to synchronous requests through the provider router")
+    return SyncBatchProvider(router)
+
+
+class MapReduceJob:
+    """
+    Map-reduce analysis of one repository, advanced one batch round at a time
+
+    Each round exposes the prompts the job is waiting for (``requests``) and
+    takes their answers back (``accept``). A single chunk goes straight to
+    the final request; several chunks are summarised and merged first (see
+    ``map_reduce_steps``).
+    """
+
+    def __init__(self, key: str, chunks: Sequence[str], max_tokens: int,
+                 summary_prompt: Callable[[int, int, str], str],
+                 final_prompt: Callable[[str, bool], str]):
+        """
+        Args:
+            key: Request id prefix, unique among the jobs of a run
+            chunks: Contexts produced by ``chunk_files``
+            max_tokens: Token budget per request
+            summary_prompt: Builds the prompt ``(index, total, context) -> prompt``
+            final_prompt: Builds the documentation prompt ``(context, from_summaries) -> prompt``
+        """
+        self.key = key
+        self.final_prompt = final_prompt
+        self.summary_prompt = summary_prompt
+        self.round = 0
+        self.documentation: Optional[str] = None
+        self.failed = False
+        self.done = False
+        self.pending: Dict[str, str] = {}
+
+        if len(chunks) <= 1:
+            self.steps = None
+            self._final(chunks[0] if chunks else '', False)
+        else:
+            self.steps = map_reduce_steps(chunks, max_tokens)
+            self._summaries(next(self.steps))
+
+    def _final(self, context: str, from_summaries: bool) -> None:
+        self.steps = None
+        self.pending = {f"{self.key}-final": self.final_prompt(context, from_summaries)}
+
+    def _summaries(self, contexts: Sequence[str]) -> None:
+        self.round += 1
+        self.pending = {
+            f"{self.key}-{self.round}-{index}": self.summary_prompt(index, len(contexts), contexts[index - 1])
+            for index in range(1, len(contexts) + 1)
+        }
+
+    def requests(self) -> Dict[str, str]:
+        """Prompts of the current round, by request id"""
+        return {} if self.done else self.pending
+
+    def accept(self, texts: Dict[str, Optional[str]]) -> None:
+        """Advance the job with the answers of the current round"""
+        answers = [texts.get(request_id) for request_id in self.pending]
+        if any(answer is None for answer in answers):
+            logger.error(f"Job {self.key}: {answers.count(None)} request(s) failed")
+            self.failed = self.done = True
+            return
+        if self.steps is None:
+            self.documentation = answers[0]
+            self.done = True
+            return
+        try:
+            self._summaries(self.steps.send(answers))
+        except StopIteration as finished:
+            self._final(finished.value, True)
+
+
+def run_batch(provider: BatchProvider, requests: Dict[str, str], max_tokens: int,
+              poll_interval: float, llm_cache: Optional[LLMCache] = None,
+              timeout: float = DEFAULT_BATCH_TIMEOUT) -> Dict[str, Optional[str]]:
+    """
+    Answer ``requests`` through the batch API, skipping the cached prompts
+
+    Args:
+        provider: Batch backend
+        requests: Prompt per request id
+        max_tokens: Completion token limit
+        poll_interval: Seconds between status checks
+        llm_cache: Response cache (answers are stored under ``provider.model``)
+        timeout: Seconds after which unfinished batches are abandoned
+
+    Returns:
+        Response text per request id, None for the failed requests
+    """
+    texts: Dict[str, Optional[str]] = {}
+    missing: Dict[str, str] = {}
+    for request_id, prompt in requests.items():
+        cached = llm_cache.get(provider.model, prompt, max_tokens) if llm_cache else None
+        if cached is not None:
+            texts[request_id] = cached
+        else:
+            missing[request_id] = prompt
+    if texts:
+        logger.info(f"Using {len(texts)} cached {provider.model} responses")
+    if not missing:
+        return texts
+
+    with get_report().stage(f"batch.{provider.name}"):
+        texts.update(_run_batches(provider, missing, max_tokens, poll_interval, llm_cache, timeout))
+    return texts
+
+
+def _run_batches(provider: BatchProvider, missing: Dict[str, str], max_tokens: int, poll_interval: float,
+                 llm_cache: Optional[LLMCache], timeout: float) -> Dict[str, Optional[str]]:
+    """Submit ``missing`` in batches of ``MAX_BATCH_REQUESTS`` and collect the answers"""
+    texts: Dict[str, Optional[str]] = {}
+    ids = list(missing)
+    batch_ids: List[str] = []
+    for start in range(0, len(ids), MAX_BATCH_REQUESTS):
+        part = {request_id: missing[request_id] for request_id in ids[start:start + MAX_BATCH_REQUESTS]}
+        batch_ids.append(provider.submit(part, max_tokens))
+        logger.info(f"Submitted batch {batch_ids[-1]} ({len(part)} requests) to {provider.name}")
+
+    deadline = time.monotonic() + timeout
+    running = list(batch_ids)
+    while running:
+        running = [batch_id for batch_id in running if not provider.poll(batch_id)]
+        if not running:
+            break
+        if time.monotonic() > deadline:
+            logger.error(f"Abandoning {len(running)} batch(es) still running after {timeout:.0f}s")
+            break
+        logger.debug(f"{len(running)} batch(es) still running")
+        time.sleep(poll_interval)
+
+    for batch_id in batch_ids:
+        if batch_id in running:
+            continue
+        for request_id, text in provider.results(batch_id).items():
+            if request_id not in missing:
+                continue
+            texts[request_id] = text
+            if text is not None and llm_cache is not None:
+                llm_cache.put(provider.model, missing[request_id], max_tokens, text)
+    for request_id in missing:
+        texts.setdefault(request_id, None)
+    return texts
+
+
+def run_jobs(provider: BatchProvider, jobs: Sequence[MapReduceJob], max_tokens: int = 4000,
+             poll_interval: Optional[float] = None, llm_cache: Optional[LLMCache] = None) -> int:
+    """
+    Run every job to completion, one combined batch per round
+
+    Args:
+        provider: Batch backend
+        jobs: One job per repository or documentation entry
+        max_tokens: Completion token limit
+        poll_interval: Seconds between status checks (default ``DOCGEN_BATCH_POLL_INTERVAL``)
+        llm_cache: Response cache shared by the jobs
+
+    Returns:
+        Number of rounds submitted
+    """
+    poll_interval = get_poll_interval() if poll_interval is None else poll_interval
+    rounds = 0
+    while True:
+        active = [job for job in jobs if not job.done]
+        if not active:
+            return rounds
+        requests: Dict[str, str] = {}
+        for job in active:
+            requests.update(job.requests())
+        rounds += 1
+        logger.info(f"Batch round {rounds}: {len(requests)} requests for {len(active)} jobs")
+        texts = run_batch(provider, requests, max_tokens, poll_interval, llm_cache)
+        for job in active:
+            job.accept(texts)
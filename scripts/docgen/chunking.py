@@ -0,0 +1,262 @@
+"""
+Map-reduce chunked analysis
+
+Splits the scanned files into token-budgeted chunks that each fit in a
+single LLM request, so the whole codebase is covered instead of a truncated
+prefix. Each chunk is summarised independently (map) and the summaries are
+merged into the final document (reduce). Chunks are filled by the
+knapsack packer in ``docgen.packer``.
+"""
+
+import collections.abc
+import itertools
+import logging
+import re
+from typing import Any, Callable, Dict, Generator, List, Optional, Sequence, Tuple
+
+from docgen.async_runner import run_concurrently
+from docgen.metrics import get_report
+from docgen.packer import KNAPSACK_CANDIDATES, estimate_tokens, knapsack, priority_score
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_TOKENS = 12000
+
+_BACKTICK_RUN = re.compile(r'`{3,}')
+
+
+def code_fence(content: str) -> str:
+    """Return a backtick fence longer than any fence inside ``content``"""
+    longest = max((len(run) for run in _BACKTICK_RUN.findall(content)), default=2)
+    return '`' * (longest + 1)
+
+
+def format_file(file_path: str, extension: str, content: str, part: str = '') -> str:
+    """
+    Render one file (or part of a file) as a fenced Markdown block
+
+    Args:
+        file_path: Path shown in the heading
+        extension: File extension, used as the fence language
+        content: File content
+        part: Optional suffix such as ``(part 2/3)``
+
+    Returns:
+        Markdown block ending with a blank line
+    """
+    language = extension[1:] if extension else 'text'
+    fence = code_fence(content)
+    heading = f"{file_path} {part}".rstrip()
+    return f"## {heading}\n{fence}{language}\n{content}\n{fence}\n\n"
+
+
+def split_content(content: str, max_chars: int) -> List[str]:
+    """
+    Split content on line boundaries into pieces of at most ``max_chars``
+
+    A single line longer than ``max_chars`` is hard-split.
+    """
+    pieces: List[str] = []
+    current: List[str] = []
+    current_size = 0
+    for line in content.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(''.join(current))
+                current, current_size = [], 0
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current_size + len(line) > max_chars and current:
+            pieces.append(''.join(current))
+            current, current_size = [], 0
+        current.append(line)
+        current_size += len(line)
+    if current:
+        pieces.append(''.join(current))
+    return pieces or ['']
+
+
+class LazyChunks(collections.abc.Sequence):
+    """
+    Chunk contexts rendered on access
+
+    Only the packing plan (file path, part span and token estimate of each
+    block) is kept in memory; file bodies are read and joined when a chunk is
+    indexed, so at most one context per in-flight request exists at a time.
+    """
+
+    def __init__(self, files_data: Dict[str, Any], plans: List[List[Tuple[Any, ...]]]):
+        self.files_data = files_data
+        self.plans = plans
+
+    def __len__(self) -> int:
+        return len(self.plans)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        parts = []
+        for _, file_path, _, part, span, _ in self.plans[index]:
+            file_info = self.files_data[file_path]
+            content = file_info['content']
+            if span is not None:
+                content = content[span[0]:span[1]]
+            parts.append(format_file(file_path, file_info['extension'], content, part))
+        return ''.join(parts)
+
+
+def chunk_files(files_data: Dict[str, Any], max_tokens: int = DEFAULT_CHUNK_TOKENS) -> LazyChunks:
+    """
+    Pack every file into contexts that each fit within ``max_tokens``
+
+    Files larger than a chunk are split on line boundaries, each part with
+    its own fence. Each chunk is then filled knapsack-style from the
+    highest-priority remaining parts, so the most important files come first
+    and every chunk uses as much of its budget as possible.
+
+    Packing only uses the ``size`` and ``tokens`` metadata recorded by the
+    scan; a file body is read here only when it has to be split, and
+    otherwise when its chunk is rendered (see ``LazyChunks``).
+
+    Args:
+        files_data: Dictionary containing file information
+        max_tokens: Token budget per chunk
+
+    Returns:
+        Sequence of Markdown contexts, one per chunk
+    """
+    with get_report().stage('pack'):
+        plans = _plan_chunks(files_data, max_tokens)
+    return LazyChunks(files_data, plans)
+
+
+def _plan_chunks(files_data: Dict[str, Any], max_tokens: int) -> List[List[Tuple[Any, ...]]]:
+    """Blocks (file parts) of every chunk, see ``chunk_files``"""
+    blocks = []
+    for file_path, file_info in files_data.items():
+        tokens = file_info.get('tokens')
+        if tokens is None:
+            tokens = estimate_tokens(file_info['content'])
+        size = file_info['size']
+        # Leave room for the heading and fences around each part
+        chars_per_token = max(size, 1) / tokens
+        max_chars = max(int((max_tokens - 50) * chars_per_token * 0.95), 1000)
+
+        if size <= max_chars:
+            pieces = [(None, tokens)]
+        else:
+            pieces = []
+            offset = 0
+            for piece in split_content(file_info['content'], max_chars):
+                pieces.append(((offset, offset + len(piece)), estimate_tokens(piece)))
+                offset += len(piece)
+
+        for index, (span, piece_tokens) in enumerate(pieces, 1):
+            part = f"(part {index}/{len(pieces)})" if len(pieces) > 1 else ''
+            overhead = estimate_tokens(format_file(file_path, file_info['extension'], '', part))
+            blocks.append((priority_score(file_path), file_path, index, part, span, piece_tokens + overhead))
+
+    # Highest priority first, parts of a file in order
+    blocks.sort(key=lambda block: (-block[0], block[1], block[2]))
+
+    plans: List[List[Tuple[Any, ...]]] = []
+    # Only the first remaining blocks are candidates: refill them from the sorted
+    # list instead of rebuilding it after every chunk (linear in the number of blocks)
+    remaining = iter(blocks)
+    candidates = list(itertools.islice(remaining, KNAPSACK_CANDIDATES))
+    while candidates:
+        selected = knapsack(
+            [block[5] for block in candidates],
+            [block[0] * block[5] for block in candidates],
+            max_tokens
+        ) or [0]
+        chosen = [candidates[index] for index in selected]
+        plans.append(sorted(chosen, key=lambda block: (block[1], block[2])))
+        chosen_indexes = set(selected)
+        candidates = [block for index, block in enumerate(candidates) if index not in chosen_indexes]
+        candidates.extend(itertools.islice(remaining, KNAPSACK_CANDIDATES - len(candidates)))
+
+    return plans
+
+
+def map_reduce_steps(chunks: Sequence[str],
+                     max_tokens: int = DEFAULT_CHUNK_TOKENS) -> Generator[Sequence[str], List[str], str]:
+    """
+    Drive a map-reduce analysis one summary round at a time
+
+    Yields the contexts to summarise in each round and expects their
+    summaries back through ``send``. Summaries that together still exceed
+    ``max_tokens`` are grouped and yielded again to be summarised further.
+    The generator returns the joined summaries for the reduce request, so a
+    caller can run each round however it likes (concurrently, or through a
+    provider batch API).
+
+    Args:
+        chunks: Contexts produced by ``chunk_files``
+        max_tokens: Token budget per request
+
+    Returns:
+        Joined summaries (as the ``StopIteration`` value)
+    """
+    logger.info(f"Summarising {len(chunks)} chunks")
+    summaries = yield chunks
+
+    while len(summaries) > 1 and estimate_tokens('\n\n'.join(summaries)) > max_tokens:
+        groups: List[List[str]] = [[]]
+        group_tokens = 0
+        for summary in summaries:
+            tokens = estimate_tokens(summary)
+            if groups[-1] and group_tokens + tokens > max_tokens:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(summary)
+            group_tokens += tokens
+
+        if len(groups) == len(summaries):
+            # Every summary fills a request on its own, merging cannot shrink further
+            break
+
+        logger.info(f"Merging {len(summaries)} summaries into {len(groups)}")
+        summaries = yield ['\n\n'.join(group) for group in groups]
+
+    return '\n\n'.join(summaries)
+
+
+def map_reduce(chunks: Sequence[str],
+               summarise: Callable[[int, int, str], Optional[str]],
+               reduce: Callable[[str], Optional[str]],
+               max_tokens: int = DEFAULT_CHUNK_TOKENS) -> Optional[str]:
+    """
+    Summarise each chunk, then merge the summaries into the final document
+
+    Chunks are summarised concurrently (see ``run_concurrently``). If the
+    concatenated summaries still exceed ``max_tokens`` they are grouped and
+    summarised again until they fit (see ``map_reduce_steps``).
+
+    Args:
+        chunks: Contexts produced by ``chunk_files``
+        summarise: Callback ``(index, total, context) -> summary``
+        reduce: Callback turning the joined summaries into the final document
+        max_tokens: Token budget per request
+
+    Returns:
+        Final document, or None if a callback returned None
+    """
+    def summarise_all(contexts: Sequence[str]) -> Optional[List[str]]:
+        # Index inside the call so lazily rendered chunks only exist while in flight
+        results = run_concurrently([
+            lambda index=index: summarise(index, len(contexts), contexts[index - 1])
+            for index in range(1, len(contexts) + 1)
+        ])
+        return None if any(result is None for result in results) else results
+
+    steps = map_reduce_steps(chunks, max_tokens)
+    try:
+        contexts = next(steps)
+        while True:
+            summaries = summarise_all(contexts)
+            if summaries is None:
+                return None
+            contexts = steps.send(summaries)
+    except StopIteration as finished:
+        return reduce(finished.value)
@@ -0,0 +1,451 @@
+"""
+Markdown to Confluence storage format
+
+Converts the generated Markdown straight to Confluence storage XML in one
+pass over its lines, without rendering HTML first: fenced code becomes a
+``code`` macro with its ``language`` parameter and a CDATA body, inline code
+stays inline, pipe tables become ``<table>`` elements, and GitHub-style
+alerts (``> [!NOTE]``) or emoji-led quotes (``> ⚠️``) become info, tip,
+note and warning panels. Every text run is escaped once, so the output is
+well-formed XML whatever the LLM writes, and the work is linear in the size
+of the document.
+"""
+
+import re
+from collections import deque
+from html import escape
+from typing import Dict, List, Optional, Tuple
+
+# Markdown fence languages -> Confluence code macro languages ('' = no parameter)
+CODE_LANGUAGES = {
+    'sh': 'bash', 'shell': 'bash', 'bash': 'bash', 'zsh': 'bash', 'console': 'bash',
+    'ps1': 'powershell', 'powershell': 'powershell', 'pwsh': 'powershell',
+    'yml': 'yaml', 'yaml': 'yaml', 'json': 'json', 'xml': 'xml', 'html': 'html', 'sql': 'sql',
+    'py': 'python', 'python': 'python', 'js': 'javascript', 'javascript': 'javascript',
+    'ts': 'typescript', 'typescript': 'typescript', 'go': 'go', 'java': 'java',
+    'tf': 'hcl', 'hcl': 'hcl', 'terraform': 'hcl',
+    'text': '', 'txt': '', 'plain': '', 'mermaid': '', 'dot': '', 'md': '', 'markdown': '',
+}
+
+# > [!KIND] alerts and emoji-led quotes -> panel macros
+ALERT_PANELS = {'NOTE': 'info', 'TIP': 'tip', 'IMPORTANT': 'note', 'WARNING': 'note', 'CAUTION': 'warning'}
+EMOJI_PANELS = {'ℹ️': 'info', '💡': 'tip', '⚠️': 'note', '❗': 'warning', '🚨': 'warning'}
+
+_FENCE_RE = re.compile(r'^(\s*)(`{3,}|~{3,})\s*([^`\s]*)[^`]*$')
+_HEADING_RE = re.compile(r'^ {0,3}(#{1,6})(?:\s+(.*?))?(?:\s+#+)?\s*$')
+_RULE_RE = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+_LIST_RE = re.compile(r'^(\s*)([-*+]|\d{1,9}[.)])\s+(.*)$')
+_TABLE_DELIMITER_RE = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+_QUOTE_RE = re.compile(r'^ {0,3}> ?(.*)$')
+_ALERT_RE = re.compile(r'^\[!(NOTE|TIP|IMPORTANT|WARNING|CAUTION)\]\s*$', re.IGNORECASE)
+
+_SPECIAL_RE = re.compile(r'[`\\*_~\[\]!<]')
+_BACKTICKS_RE = re.compile(r'`+')
+
+# Deeper blockquotes are kept as text, so ``> > > ...`` cannot recurse without bound
+MAX_QUOTE_DEPTH = 8
+
+# Longest link target or autolink considered, so an unclosed ``](`` never scans the whole line
+MAX_URL_CHARS = 2048
+
+EMPHASIS_TAGS = {
+    '**': ('<strong>', '</strong>'), '__': ('<strong>', '</strong>'),
+    '*': ('<em>', '</em>'), '_': ('<em>', '</em>'),
+    '~~': ('<span style="text-decoration: line-through;">', '</span>'),
+}
+
+
+def _cdata(text: str) -> str:
+    """Wrap text in CDATA, splitting any ``]]>`` it contains"""
+    return '<![CDATA[' + text.replace(']]>', ']]]]><![CDATA[>') + ']]>'
+
+
+def code_macro(code: str, language: str = '') -> str:
+    """
+    Render a Confluence ``code`` macro
+
+    Args:
+        code: Code block body
+        language: Markdown fence language, mapped through ``CODE_LANGUAGES``
+
+    Returns:
+        Storage-format macro
+    """
+    language = CODE_LANGUAGES.get(language.lower(), language.lower())
+    parameter = f'<ac:parameter ac:name="language">{escape(language)}</ac:parameter>' if language else ''
+    return (f'<ac:structured-macro ac:name="code">{parameter}'
+            f'<ac:plain-text-body>{_cdata(code)}</ac:plain-text-body></ac:structured-macro>')
+
+
+def panel_macro(kind: str, body: str) -> str:
+    """Render an info/tip/note/warning panel around already converted ``body``"""
+    return f'<ac:structured-macro ac:name="{kind}"><ac:rich-text-body>{body}</ac:rich-text-body></ac:structured-macro>'
+
+
+def convert_inline(text: str) -> str:
+    """
+    Convert inline Markdown (code, links, images, emphasis) to storage XML
+
+    A single left-to-right scan with a delimiter stack, as in CommonMark:
+    an opener waits on the stack until a matching closer wraps everything
+    emitted since; openers left unmatched stay literal text. Lookahead is
+    bounded (``MAX_URL_CHARS``) or precomputed (backtick runs), so the cost
+    is linear in the length of the text even on malformed input.
+
+    Args:
+        text: Text of one block, without its block syntax
+
+    Returns:
+        Escaped storage-format fragment
+    """
+    out: List[str] = []
+    # [marker, index in out, position in text]
+    stack: List[List] = []
+    open_counts: Dict[str, int] = {}
+    # Backtick run length -> start positions, to find the closing run of a code span
+    runs: Dict[int, deque] = {}
+    if '`' in text:
+        for match in _BACKTICKS_RE.finditer(text):
+            runs.setdefault(match.end() - match.start(), deque()).append(match.start())
+
+    def push(marker: str, position: int, literal: str):
+        out.append(literal)
+        stack.append([marker, len(out) - 1, position])
+        open_counts[marker] = open_counts.get(marker, 0) + 1
+
+    def pop_to(marker: str) -> List:
+        # Openers crossed on the way stay literal
+        while True:
+            entry = stack.pop()
+            open_counts[entry[0]] -= 1
+            if entry[0] == marker:
+                return entry
+
+    position = 0
+    index = 0
+    length = len(text)
+    while True:
+        match = _SPECIAL_RE.search(text, index)
+        if not match:
+            break
+        index = match.start()
+        out.append(escape(text[position:index], quote=False))
+        char = text[index]
+
+        if char == '`':
+            end = index
+            while end < length and text[end] == '`':
+                end += 1
+            run = end - index
+            # After an escaped backtick the run starts mid-run and may have no recorded length
+            starts = runs.get(run, ())
+            while starts and starts[0] <= index:
+                starts.popleft()
+            if starts:
+                close = starts.popleft()
+                out.append(f"<code>{escape(text[end:close].strip(), quote=False)}</code>")
+                index = close + run
+            else:
+                out.append('`' * run)
+                index = end
+        elif char == '\\' and index + 1 < length and text[index + 1] in '\\`*_{}[]()#+-.!|~<>':
+            out.append(escape(text[index + 1], quote=False))
+            index += 2
+        elif char in '*_~':
+            end = index
+            while end < length and text[end] == char:
+                end += 1
+            before = text[index - 1] if index else ' '
+            after = text[end] if end < length else ' '
+            can_open = not after.isspace()
+            can_close = not before.isspace()
+            if char == '_':
+                can_open = can_open and not before.isalnum()
+                can_close = can_close and not after.isalnum()
+            while index < end:
+                size = 2 if end - index >= 2 or char == '~' else 1
+                if can_close and stack and stack[-1][0][0] == char and len(stack[-1][0]) <= end - index:
+                    # Close the innermost opener first: ***a*** is <em><strong>a</strong></em>
+                    size = len(stack[-1][0])
+                marker = char * size
+                if marker not in EMPHASIS_TAGS:
+                    out.append(escape(text[index:end], quote=False))
+                    index = end
+                    break
+                if can_close and open_counts.get(marker):
+                    entry = pop_to(marker)
+                    opening, closing = EMPHASIS_TAGS[marker]
+                    out[entry[1]] = opening
+                    out.append(closing)
+                elif can_open:
+                    push(marker, index, marker)
+                else:
+                    out.append(marker)
+                index += size
+        elif char == '!' and index + 1 < length and text[index + 1] == '[':
+            push('![', index, '![')
+            index += 2
+        elif char == '[':
+            push('[', index, '[')
+            index += 1
+        elif char == ']':
+            close = text.find(')', index + 2, index + 2 + MAX_URL_CHARS) if text.startswith('(', index + 1) else -1
+            target = text[index + 2:close].split() if close != -1 else []
+            opener = None
+            if target and (open_counts.get('[') or open_counts.get('![')):
+                opener = next(entry[0] for entry in reversed(stack) if entry[0] in ('[', '!['))
+            if opener:
+                entry = pop_to(opener)
+                url = escape(target[0])
+                if opener == '![':
+                    alt = escape(text[entry[2] + 2:index])
+                    del out[entry[1]:]
+                    out.append(f'<ac:image ac:alt="{alt}"><ri:url ri:value="{url}"/></ac:image>')
+                else:
+                    out[entry[1]] = f'<a href="{url}">'
+                    out.append('</a>')
+                index = close + 1
+            else:
+                out.append(']')
+                index += 1
+        elif char == '<':
+            close = text.find('>', index + 1, index + 1 + MAX_URL_CHARS)
+            url = text[index + 1:close] if close != -1 else ''
+            if url.startswith(('http://', 'https://')) and not any(c.isspace() for c in url):
+                out.append(f'<a href="{escape(url)}">{escape(url, quote=False)}</a>')
+                index = close + 1
+            else:
+                out.append('&lt;')
+                index += 1
+        else:
+            out.append(escape(char, quote=False))
+            index += 1
+        position = index
+
+    out.append(escape(text[position:], quote=False))
+    return ''.join(out)
+
+
+def _split_row(line: str) -> List[str]:
+    """Split a table row on the pipes that are neither escaped nor inside inline code"""
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    cells = []
+    current = []
+    ticks = 0
+    index = 0
+    while index < len(line):
+        char = line[index]
+        if char == '\\' and index + 1 < len(line) and line[index + 1] == '|':
+            current.append('|')
+            index += 2
+            continue
+        if char == '`':
+            run = len(line) - index - len(line[index:].lstrip('`'))
+            ticks = 0 if ticks == run else (ticks or run)
+            current.append('`' * run)
+            index += run
+            continue
+        if char == '|' and not ticks:
+            cells.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        index += 1
+    cells.append(''.join(current).strip())
+    return cells
+
+
+def _table(header: List[str], rows: List[List[str]]) -> str:
+    out = ['<table><tbody><tr>']
+    out.extend(f'<th>{convert_inline(cell)}</th>' for cell in header)
+    out.append('</tr>')
+    for row in rows:
+        out.append('<tr>')
+        # Pad or cut each row to the header width, as Markdown renderers do
+        row = (row + [''] * len(header))[:len(header)]
+        out.extend(f'<td>{convert_inline(cell)}</td>' for cell in row)
+        out.append('</tr>')
+    out.append('</tbody></table>')
+    return ''.join(out)
+
+
+def _quote(lines: List[str], depth: int) -> str:
+    """Convert the body of a blockquote, as a panel when it starts with an alert or emoji marker"""
+    kind: Optional[str] = None
+    first = lines[0].strip() if lines else ''
+    alert = _ALERT_RE.match(first)
+    if alert:
+        kind = ALERT_PANELS[alert.group(1).upper()]
+        lines = lines[1:]
+    else:
+        for emoji, panel in EMOJI_PANELS.items():
+            if first.startswith(emoji):
+                kind = panel
+                break
+    body = _convert_blocks(lines, depth + 1)
+    return panel_macro(kind, body) if kind else f'<blockquote>{body}</blockquote>'
+
+
+def _list(items: List[List]) -> str:
+    """Convert list items ``[indent, ordered, text, blocks]`` to nested ``<ul>``/``<ol>`` elements"""
+    out = []
+    stack: List[Tuple[int, str]] = []
+    for indent, ordered, text, blocks in items:
+        tag = 'ol' if ordered else 'ul'
+        while stack and indent < stack[-1][0]:
+            out.append(f'</li></{stack.pop()[1]}>')
+        if stack and indent == stack[-1][0]:
+            if stack[-1][1] != tag:
+                out.append(f'</li></{stack.pop()[1]}><{tag}>')
+                stack.append((indent, tag))
+            else:
+                out.append('</li>')
+        else:
+            out.append(f'<{tag}>')
+            stack.append((indent, tag))
+        out.append(f"<li>{convert_inline(text)}{''.join(blocks)}")
+    while stack:
+        out.append(f'</li></{stack.pop()[1]}>')
+    return ''.join(out)
+
+
+def _fenced_code(lines: List[str], index: int, fence: re.Match) -> Tuple[str, int]:
+    """Convert the fenced block opened at ``lines[index]``, returning the macro and the next line index"""
+    indent, marker, language = len(fence.group(1)), fence.group(2), fence.group(3)
+    body = []
+    index += 1
+    while index < len(lines):
+        closing = lines[index].strip()
+        if closing.startswith(marker) and not closing.strip(marker[0]):
+            index += 1
+            break
+        # Strip the fence indentation (e.g. a block nested in a list item)
+        body.append(lines[index][indent:] if not lines[index][:indent].strip() else lines[index])
+        index += 1
+    return code_macro('\n'.join(body), language), index
+
+
+def markdown_to_storage(markdown_content: str) -> str:
+    """
+    Convert Markdown to Confluence storage format
+
+    Supports ATX headings, paragraphs, fenced code, nested lists, pipe
+    tables, blockquotes and panels, horizontal rules and inline code, links,
+    images and emphasis. Raw HTML is escaped rather than passed through.
+
+    Args:
+        markdown_content: Documentation in Markdown
+
+    Returns:
+        Confluence storage XML
+    """
+    return _convert_blocks(markdown_content.splitlines(), 0)
+
+
+def _convert_blocks(lines: List[str], depth: int) -> str:
+    """Convert block-level Markdown; ``depth`` is the blockquote nesting level"""
+    out: List[str] = []
+    paragraph: List[str] = []
+
+    def flush_paragraph():
+        if paragraph:
+            out.append(f"<p>{convert_inline(' '.join(line.strip() for line in paragraph))}</p>")
+            paragraph.clear()
+
+    index = 0
+    total = len(lines)
+    while index < total:
+        line = lines[index]
+
+        fence = _FENCE_RE.match(line)
+        if fence:
+            flush_paragraph()
+            macro, index = _fenced_code(lines, index, fence)
+            out.append(macro)
+            continue
+
+        if not line.strip():
+            flush_paragraph()
+            index += 1
+            continue
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            flush_paragraph()
+            level = len(heading.group(1))
+            out.append(f'<h{level}>{convert_inline(heading.group(2) or "")}</h{level}>')
+            index += 1
+            continue
+
+        if _RULE_RE.match(line):
+            flush_paragraph()
+            out.append('<hr/>')
+            index += 1
+            continue
+
+        if '|' in line and index + 1 < total and _TABLE_DELIMITER_RE.match(lines[index + 1]) \
+                and '-' in lines[index + 1]:
+            flush_paragraph()
+            header = _split_row(line)
+            rows = []
+            index += 2
+            while index < total and lines[index].strip() and '|' in lines[index]:
+                rows.append(_split_row(lines[index]))
+                index += 1
+            out.append(_table(header, rows))
+            continue
+
+        quote = _QUOTE_RE.match(line) if depth < MAX_QUOTE_DEPTH else None
+        if quote:
+            flush_paragraph()
+            body = []
+            while index < total:
+                quote = _QUOTE_RE.match(lines[index])
+                if not quote:
+                    break
+                body.append(quote.group(1))
+                index += 1
+            out.append(_quote(body, depth))
+            continue
+
+        item = _LIST_RE.match(line)
+        # Only a list starting at 1 may interrupt a paragraph (``2024. was a year`` is text)
+        if item and (not paragraph or not item.group(2)[0].isdigit() or item.group(2)[:-1] == '1'):
+            flush_paragraph()
+            items: List[List] = []
+            while index < total:
+                current = lines[index]
+                item = _LIST_RE.match(current)
+                fence = _FENCE_RE.match(current)
+                if fence and items:
+                    macro, index = _fenced_code(lines, index, fence)
+                    items[-1][3].append(macro)
+                    continue
+                if item:
+                    items.append([len(item.group(1).expandtabs(4)), item.group(2)[0].isdigit(), item.group(3), []])
+                elif not current.strip():
+                    # A blank line only ends the list if no item or indented content follows
+                    following = lines[index + 1] if index + 1 < total else ''
+                    if not (_LIST_RE.match(following) or following[:1].isspace() and following.strip()):
+                        break
+                elif current[:1].isspace():
+                    if items[-1][3]:
+                        items[-1][3].append(f"<p>{convert_inline(current.strip())}</p>")
+                    else:
+                        # Continuation of the previous item's text
+                        items[-1][2] = f"{items[-1][2]} {current.strip()}"
+                else:
+                    break
+                index += 1
+            out.append(_list(items))
+            continue
+
+        paragraph.append(line)
+        index += 1
+
+    flush_paragraph()
+    return ''.join(out)
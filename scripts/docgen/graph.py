@@ -0,0 +1,223 @@
+"""
+Terraform dependency graph and diagrams
+
+Builds the module and resource dependency graph from the Terraform index
+(``module`` blocks, ``depends_on`` and attribute references) and renders it
+as Mermaid flowcharts for the Markdown output and as a Graphviz DOT file.
+The graph is computed once per scan and saved in the cache directory,
+keyed by a fingerprint of the index, so an unchanged tree reuses it as is.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from docgen.terraform import block_address
+
+logger = logging.getLogger(__name__)
+
+GRAPH_NAME = 'dependency_graph.json'
+GRAPH_VERSION = 1
+
+_NODE_ID_RE = re.compile(r'[^A-Za-z0-9_]')
+
+
+def build_graph(index: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the dependency graph of every Terraform module
+
+    Args:
+        index: Result of ``docgen.terraform.build_index``
+
+    Returns:
+        {'modules': {module dir: {'nodes': [{'address', 'kind'}],
+        'edges': [[from, to, 'reference' | 'depends_on']]}},
+        'calls': [[module dir, 'module.<name>', called module dir or None]]}
+    """
+    modules: Dict[str, Any] = {}
+    calls: List[List[Optional[str]]] = []
+    for module_dir, module in sorted(index.items()):
+        blocks = ([('resource', [r['type'], r['name']], r) for r in module['resources']] +
+                  [('data', [d['type'], d['name']], d) for d in module['data']] +
+                  [('module', [m['name']], m) for m in module['modules']])
+        nodes = [{'address': block_address(kind, labels), 'kind': kind} for kind, labels, _ in blocks]
+        known = {node['address'] for node in nodes}
+
+        edges = []
+        for (kind, _, block), node in zip(blocks, nodes):
+            depends_on = set(block.get('depends_on', []))
+            for target in sorted(depends_on & known):
+                edges.append([node['address'], target, 'depends_on'])
+            for reference in block.get('references', []):
+                # module.x.output and data.t.n.attr both reduce to the block address
+                target = reference if reference in known else None
+                if target and target != node['address'] and target not in depends_on:
+                    edges.append([node['address'], target, 'reference'])
+            if kind == 'module':
+                calls.append([module_dir, node['address'], block['path']])
+
+        modules[module_dir] = {'nodes': nodes, 'edges': edges}
+    return {'modules': modules, 'calls': calls}
+
+
+def index_fingerprint(index: Dict[str, Dict[str, Any]]) -> str:
+    """Stable hash of a Terraform index"""
+    return hashlib.sha256(json.dumps(index, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_graph(index: Dict[str, Dict[str, Any]], cache_dir: Union[str, Path], enabled: bool = True) -> Dict[str, Any]:
+    """
+    Return the dependency graph for ``index``, reusing the cached one when the index is unchanged
+
+    Args:
+        index: Result of ``docgen.terraform.build_index``
+        cache_dir: Directory holding ``dependency_graph.json``
+        enabled: Read and write the cache file
+
+    Returns:
+        Result of ``build_graph``
+    """
+    path = Path(cache_dir) / GRAPH_NAME
+    fingerprint = index_fingerprint(index)
+    if enabled:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') == GRAPH_VERSION and cached.get('fingerprint') == fingerprint:
+                return cached['graph']
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable dependency graph cache {path}: {e}")
+
+    graph = build_graph(index)
+    if enabled:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': GRAPH_VERSION, 'fingerprint': fingerprint, 'graph': graph}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save dependency graph: {e}")
+    return graph
+
+
+def _node_id(*parts: str) -> str:
+    """Identifier safe for Mermaid and DOT"""
+    return _NODE_ID_RE.sub('_', '__'.join(parts))
+
+
+def render_module_diagram(graph: Dict[str, Any]) -> str:
+    """
+    Render the module call graph as a Mermaid flowchart
+
+    Each module call is a node linked to its caller; references and
+    ``depends_on`` between module calls of the same caller are drawn between them.
+
+    Args:
+        graph: Result of ``build_graph``
+
+    Returns:
+        Fenced Mermaid block, or an empty string if no module is called
+    """
+    if not graph['calls']:
+        return ''
+    lines = ["```mermaid", "flowchart TD"]
+    callers = sorted({caller for caller, _, _ in graph['calls']})
+    for caller in callers:
+        lines.append(f'    {_node_id(caller)}["{caller}"]')
+    for caller, address, target in graph['calls']:
+        label = f"{address}<br/>{target}" if target else address
+        lines.append(f'    {_node_id(caller, address)}["{label}"]')
+        lines.append(f'    {_node_id(caller)} --> {_node_id(caller, address)}')
+    for caller in callers:
+        for source, target, kind in graph['modules'][caller]['edges']:
+            if source.startswith('module.') and target.startswith('module.'):
+                arrow = '-.->' if kind == 'depends_on' else '-->'
+                lines.append(f'    {_node_id(caller, source)} {arrow}|{kind}| {_node_id(caller, target)}')
+    lines.append("```")
+    return '\n'.join(lines) + '\n'
+
+
+def render_resource_diagram(module_dir: str, graph: Dict[str, Any]) -> str:
+    """
+    Render the resource graph of one module as a Mermaid flowchart
+
+    Args:
+        module_dir: Module directory
+        graph: Result of ``build_graph``
+
+    Returns:
+        Fenced Mermaid block, or an empty string if the module has no dependencies
+    """
+    module = graph['modules'].get(module_dir)
+    if not module or not module['edges']:
+        return ''
+    shapes = {'resource': '["{}"]', 'data': '[("{}")]', 'module': '[["{}"]]'}
+    lines = ["```mermaid", "flowchart LR"]
+    for node in module['nodes']:
+        lines.append(f"    {_node_id(node['address'])}{shapes[node['kind']].format(node['address'])}")
+    for source, target, kind in module['edges']:
+        arrow = '-.->' if kind == 'depends_on' else '-->'
+        lines.append(f"    {_node_id(source)} {arrow} {_node_id(target)}")
+    lines.append("```")
+    return '\n'.join(lines) + '\n'
+
+
+def render_graph_section(graph: Dict[str, Any], module_dirs: Optional[List[str]] = None) -> str:
+    """
+    Render the dependency diagrams as a Markdown section
+
+    Args:
+        graph: Result of ``build_graph``
+        module_dirs: Modules whose resource graphs are drawn (default: all)
+
+    Returns:
+        ``## 🔗 Dependency Graph`` section, or an empty string if there is nothing to draw
+    """
+    parts = []
+    modules_diagram = render_module_diagram(graph) if module_dirs is None else ''
+    if modules_diagram:
+        parts.append(f"### Modules\n\n{modules_diagram}")
+    for module_dir in (module_dirs if module_dirs is not None else sorted(graph['modules'])):
+        diagram = render_resource_diagram(module_dir, graph)
+        if diagram:
+            parts.append(f"### `{module_dir}`\n\n{diagram}")
+    if not parts:
+        return ''
+    return "## 🔗 Dependency Graph\n\n" + '\n'.join(parts)
+
+
+def render_dot(graph: Dict[str, Any]) -> str:
+    """
+    Render the whole graph in Graphviz DOT format, one cluster per module
+
+    Args:
+        graph: Result of ``build_graph``
+
+    Returns:
+        DOT source
+    """
+    shapes = {'resource': 'box', 'data': 'cylinder', 'module': 'component'}
+    lines = ["digraph terraform {", "    rankdir=LR;", "    node [fontname=\"Helvetica\"];"]
+    for number, (module_dir, module) in enumerate(sorted(graph['modules'].items())):
+        lines.append(f"    subgraph cluster_{number} {{")
+        lines.append(f"        label=\"{module_dir}\";")
+        lines.append(f"        {_node_id(module_dir)} [label=\"{module_dir}\", shape=folder];")
+        for node in module['nodes']:
+            lines.append(f"        {_node_id(module_dir, node['address'])} "
+                         f"[label=\"{node['address']}\", shape={shapes[node['kind']]}];")
+        lines.append("    }")
+        for source, target, kind in module['edges']:
+            style = ' [style=dashed]' if kind == 'depends_on' else ''
+            lines.append(f"    {_node_id(module_dir, source)} -> {_node_id(module_dir, target)}{style};")
+    for caller, address, target in graph['calls']:
+        if target in graph['modules']:
+            lines.append(f"    {_node_id(caller, address)} -> {_node_id(target)} [style=bold];")
+    lines.append("}")
+    return '\n'.join(lines) + '\n'
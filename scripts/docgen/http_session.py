@@ -0,0 +1,143 @@
+"""
+Pooled HTTP session with timeouts and retries
+
+``RetrySession`` is a ``requests.Session`` that keeps connections alive in a
+pool, applies a default (connect, read) timeout to every request, and retries
+throttled or failed requests with exponential backoff and full jitter,
+honouring the server's ``Retry-After`` header.
+"""
+
+import email.utils
+import logging
+import os
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from docgen.metrics import get_report
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Statuses where a non-idempotent request (POST, PUT) was certainly not processed
+SAFE_RETRY_STATUSES = {429, 503}
+
+# PUT is left out: a Confluence update carries the next version number, so
+# replaying one the server already applied fails with a 409 conflict. The
+# publisher reads the page back before retrying an ambiguous update.
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'DELETE'}
+
+MAX_RETRY_AFTER = 120.0
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+class RetrySession(requests.Session):
+    """requests.Session with connection pooling, default timeouts and retries"""
+
+    def __init__(self,
+                 timeout: Optional[Tuple[float, float]] = None,
+                 max_retries: Optional[int] = None,
+                 backoff: Optional[float] = None,
+                 max_backoff: float = 30.0,
+                 pool_size: int = 10,
+                 stage: str = 'http'):
+        """
+        Initialize the session
+
+        Args:
+            timeout: (connect, read) timeout in seconds (default from
+                ``DOCGEN_HTTP_CONNECT_TIMEOUT``/``DOCGEN_HTTP_TIMEOUT``, 10s/30s)
+            max_retries: Retries after the first attempt (``DOCGEN_HTTP_RETRIES``, 4)
+            backoff: Base backoff delay in seconds (``DOCGEN_HTTP_BACKOFF``, 1s)
+            max_backoff: Upper bound of the exponential backoff
+            pool_size: Keep-alive connections kept per host
+            stage: Run report stage timing each request (retries included)
+        """
+        super().__init__()
+        self.timeout = timeout or (
+            _env_float('DOCGEN_HTTP_CONNECT_TIMEOUT', 10),
+            _env_float('DOCGEN_HTTP_TIMEOUT', 30)
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('DOCGEN_HTTP_RETRIES', 4))
+        self.backoff = backoff if backoff is not None else _env_float('DOCGEN_HTTP_BACKOFF', 1.0)
+        self.max_backoff = max_backoff
+        self.retries = 0
+        self.stage = stage
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After if longer"""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, MAX_RETRY_AFTER))
+        return delay
+
+    def request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        """Send a request, retrying on connection errors, timeouts, 429 and 5xx"""
+        with get_report().stage(self.stage) as counters:
+            response = self._send(counters, method, url, *args, **kwargs)
+            counters['bytes'] = len(response.request.body or b'') + len(response.content)
+        return response
+
+    def _send(self, counters: Dict[str, float], method: str, url: str, *args, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        retry_statuses = RETRY_STATUSES if idempotent else SAFE_RETRY_STATUSES
+
+        attempt = 0
+        while True:
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries or not idempotent:
+                    raise
+                delay = self._delay(attempt, None)
+                logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                    return response
+                delay = self._delay(attempt, response)
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+                response.close()
+
+            attempt += 1
+            self.retries += 1
+            counters['retries'] = attempt
+            time.sleep(delay)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value
+
+    Args:
+        value: Delay in seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,174 @@
+"""
+Scan filters: .gitignore rules and cheap file sniffing
+
+``GitIgnore`` implements the usual ``.gitignore`` pattern rules (anchoring,
+``**``, negation, directory-only patterns) for the files found while
+walking, so ignored build output is pruned like excluded directories.
+``sniff_file`` classifies a file from its size and first few kilobytes as
+binary, generated/minified or oversized before it is fully read.
+"""
+
+import codecs
+import os
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+# Bytes read to classify a file
+SNIFF_BYTES = 8192
+
+DEFAULT_MAX_FILE_KB = 1024
+
+# Generated-code markers are only looked for in the first lines (file header)
+MARKER_LINES = 5
+
+# Average line length above which a file is treated as minified
+MINIFIED_LINE_CHARS = 500
+
+GENERATED_MARKERS = (b'@generated', b'DO NOT EDIT', b'Code generated by', b'autogenerated', b'auto-generated')
+
+GENERATED_NAMES = re.compile(
+    r'(\.min\.(js|css)$|\.bundle\.js$|^package-lock\.json$|^npm-shrinkwrap\.json$|^composer\.lock$'
+    r'|^Pipfile\.lock$|^poetry\.lock$|\.pb\.go$|_pb2\.py$|\.tfstate(\.backup)?$)',
+    re.IGNORECASE
+)
+
+
+def get_max_file_bytes() -> int:
+    """Largest file scanned, from ``DOCGEN_MAX_FILE_KB`` (default 1024 KB)"""
+    return int(os.getenv('DOCGEN_MAX_FILE_KB', DEFAULT_MAX_FILE_KB)) * 1024
+
+
+def _pattern_regex(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            regex.append('/.*')
+            i += 3
+            continue
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append(f'[{body}]')
+                i = end
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return ''.join(regex)
+
+
+class GitIgnore:
+    """Rules of the ``.gitignore`` files seen so far, applied from the repository root down"""
+
+    def __init__(self):
+        # (directory the rule belongs to, compiled pattern, negated, directory only)
+        self.rules: List[Tuple[str, re.Pattern, bool, bool]] = []
+
+    def add_file(self, gitignore: Union[str, Path], relative_dir: str) -> None:
+        """
+        Load the rules of one ``.gitignore``
+
+        Args:
+            gitignore: Path of the file on disk
+            relative_dir: Its directory, relative to the scan root (``''`` for the root)
+        """
+        try:
+            with open(gitignore, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            directory_only = line.endswith('/')
+            line = line.rstrip('/')
+            if line.startswith('./'):
+                line = line[2:]
+            if not line:
+                continue
+            # A slash anywhere but at the end anchors the pattern to the .gitignore directory
+            anchored = '/' in line
+            regex = _pattern_regex(line.lstrip('/'))
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self.rules.append((relative_dir, re.compile(regex + '$'), negated, directory_only))
+
+    def is_ignored(self, relative_path: str, is_dir: bool) -> bool:
+        """
+        Tell whether a path is ignored (the last matching rule wins)
+
+        Args:
+            relative_path: Path relative to the scan root, with ``/`` separators
+            is_dir: Whether the path is a directory
+        """
+        ignored = False
+        for base, pattern, negated, directory_only in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if base:
+                if not relative_path.startswith(base + '/'):
+                    continue
+                candidate = relative_path[len(base) + 1:]
+            else:
+                candidate = relative_path
+            if pattern.match(candidate):
+                ignored = not negated
+        return ignored
+
+
+def sniff_file(head: bytes, file_name: str, size: int, max_bytes: Optional[int] = None) -> Optional[str]:
+    """
+    Classify a file from its first bytes
+
+    Args:
+        head: First ``SNIFF_BYTES`` bytes of the file
+        file_name: Base name of the file
+        size: File size in bytes
+        max_bytes: Size limit (default ``DOCGEN_MAX_FILE_KB``)
+
+    Returns:
+        ``'oversized'``, ``'binary'``, ``'generated'`` or ``'minified'`` if the
+        file should be skipped, otherwise None
+    """
+    if size > (max_bytes if max_bytes is not None else get_max_file_bytes()):
+        return 'oversized'
+    if GENERATED_NAMES.search(file_name):
+        return 'generated'
+    if b'\0' in head:
+        return 'binary'
+    try:
+        # Incremental decoding tolerates a multi-byte character cut at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=len(head) == size)
+    except UnicodeDecodeError:
+        return 'binary'
+    header = b'\n'.join(head.split(b'\n', MARKER_LINES)[:MARKER_LINES])
+    if any(marker in header for marker in GENERATED_MARKERS):
+        return 'generated'
+    lines = head.count(b'\n') + 1
+    if len(head) >= SNIFF_BYTES // 2 and len(head) / lines > MINIFIED_LINE_CHARS:
+        return 'minified'
+    return None
@@ -0,0 +1,137 @@
+"""
+Git-diff-driven incremental documentation
+
+The sectioned document layout produced here wraps each module/directory
+section in HTML comment markers so that a later run (``Pipeline`` with
+``since``) can write again only the sections touched by a commit range and
+keep the others from the previous ``generated_docs.md``.
+"""
+
+import re
+import subprocess
+from pathlib import PurePosixPath
+from typing import Any, Dict, Iterable, List, Set
+
+SECTION_START = '<!-- docgen:section {key} -->'
+SECTION_END = '<!-- docgen:end {key} -->'
+SECTIONS_HEADER = '<!-- docgen:sections -->'
+
+# A body never spans another start marker, so a section that lost its end
+# marker cannot swallow the sections that follow it
+_SECTION_RE = re.compile(
+    r'<!-- docgen:section (?P<key>\S+) -->\n'
+    r'(?P<body>(?:(?!<!-- docgen:section ).)*?)\n<!-- docgen:end (?P=key) -->\n?',
+    re.DOTALL
+)
+
+
+def section_key(path: str) -> str:
+    """
+    Map a file path to the documentation section it belongs to
+
+    Files under a ``modules/<name>/`` directory belong to that module; every
+    other file belongs to its parent directory (``.`` for the repository root).
+
+    Args:
+        path: File path relative to the repository root
+
+    Returns:
+        Section key (a POSIX directory path)
+    """
+    parts = PurePosixPath(path.replace('\\', '/')).parts
+    for index, part in enumerate(parts[:-2]):
+        if part == 'modules':
+            return '/'.join(parts[:index + 2])
+    parent = '/'.join(parts[:-1])
+    return parent or '.'
+
+
+def group_by_section(files_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Group scanned files by section key
+
+    Args:
+        files_data: Dictionary containing file information
+
+    Returns:
+        Section key -> subset of ``files_data``, sorted by key
+    """
+    sections: Dict[str, Dict[str, Any]] = {}
+    for file_path, file_info in files_data.items():
+        sections.setdefault(section_key(file_path), {})[file_path] = file_info
+    return dict(sorted(sections.items()))
+
+
+def changed_files(since: str, until: str = 'HEAD', cwd: str = '.') -> List[str]:
+    """
+    List files changed between two revisions
+
+    Args:
+        since: Base revision (e.g. ``github.event.before``)
+        until: Target revision
+        cwd: Repository directory
+
+    Returns:
+        Paths relative to the repository root, including deleted and renamed files
+
+    Raises:
+        RuntimeError: If git cannot compute the diff (unknown revision, shallow clone...)
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'diff', '--name-only', '--no-renames', f'{since}..{until}'],
+            cwd=cwd, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, 'stderr', '') or ''
+        raise RuntimeError(f"git diff {since}..{until} failed: {stderr.strip() or e}")
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def affected_sections(paths: Iterable[str], extensions: Set[str]) -> Set[str]:
+    """
+    Compute the section keys touched by a set of changed paths
+
+    Args:
+        paths: Changed file paths
+        extensions: File extensions the scanner documents
+
+    Returns:
+        Set of section keys to regenerate
+    """
+    return {section_key(path) for path in paths if PurePosixPath(path).suffix in extensions}
+
+
+def render_section(key: str, body: str) -> str:
+    """Wrap a section body in its splice markers"""
+    return f"{SECTION_START.format(key=key)}\n{body.strip()}\n{SECTION_END.format(key=key)}\n"
+
+
+def parse_sections(document: str) -> Dict[str, str]:
+    """
+    Extract the marked sections of a previously generated document
+
+    Args:
+        document: Previous documentation content
+
+    Returns:
+        Section key -> section body, in document order
+    """
+    return {match.group('key'): match.group('body') for match in _SECTION_RE.finditer(document)}
+
+
+def build_sectioned_document(overview: str, sections: Dict[str, str]) -> str:
+    """
+    Assemble a full sectioned document
+
+    Args:
+        overview: Repository-wide documentation
+        sections: Section key -> section body
+
+    Returns:
+        Overview followed by the marked per-section documentation
+    """
+    parts = [overview.rstrip('\n'), '', SECTIONS_HEADER, '']
+    parts.extend(render_section(key, body) for key, body in sections.items())
+    return '\n'.join(parts)
+
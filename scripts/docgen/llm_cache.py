@@ -0,0 +1,174 @@
+"""
+Content-addressed LLM response cache
+
+Responses are stored as one JSON file per request, named after the SHA-256
+of the model, max_tokens and prompt. The file mtime is the time of last use
+(refreshed on every hit): the cache is size-bounded with LRU eviction and
+entries unused for a TTL expire, so the directory can be carried across CI
+runs by ``actions/cache``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from docgen.metrics import get_report
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+class LLMCache:
+    """File-backed cache of LLM responses keyed by request content"""
+
+    def __init__(self, cache_dir: Union[str, Path], enabled: bool = True,
+                 ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding the response files
+            enabled: When False, lookups always miss and nothing is stored
+            ttl: Seconds an unused entry is kept (default ``DOCGEN_LLM_CACHE_TTL`` or 7 days)
+            max_bytes: Size bound (default ``DOCGEN_LLM_CACHE_MAX_MB`` or 100 MB)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.ttl = ttl if ttl is not None else float(os.getenv('DOCGEN_LLM_CACHE_TTL', DEFAULT_TTL))
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            float(os.getenv('DOCGEN_LLM_CACHE_MAX_MB', DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024
+        )
+        self.hits = 0
+        self.misses = 0
+        # Size of the cache directory, measured by the first eviction pass and then
+        # kept up to date by ``put`` so the directory is only scanned when over the bound
+        self.total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, max_tokens: int) -> str:
+        """Hash the parts of a request that determine its response"""
+        digest = hashlib.sha256()
+        for part in (model, str(max_tokens), prompt):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, model: str, prompt: str, max_tokens: int) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            model: Model identifier
+            prompt: Full prompt text
+            max_tokens: Completion token limit
+
+        Returns:
+            Cached response text, or None on miss or expiry
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(self.make_key(model, prompt, max_tokens))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stat_result = os.fstat(f.fileno())
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # The same clock as ``evict``, so an entry it keeps is never a miss here
+        if time.time() - stat_result.st_mtime > self.ttl:
+            self.misses += 1
+            path.unlink(missing_ok=True)
+            with self._lock:
+                if self.total_bytes is not None:
+                    self.total_bytes -= stat_result.st_size
+            return None
+
+        # Refresh mtime so eviction keeps recently used entries
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        get_report().add('llm_cache', cache_hits=1)
+        return entry['response']
+
+    def put(self, model: str, prompt: str, max_tokens: int, response: str) -> None:
+        """
+        Store a response and evict least recently used entries over the size bound
+
+        Args:
+            model: Model identifier
+            prompt: Full prompt text
+            max_tokens: Completion token limit
+            response: Response text to cache
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(self.make_key(model, prompt, max_tokens))
+        tmp_path = None
+        try:
+            # An overwritten entry no longer counts towards the cache size
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # A unique temporary file per writer: concurrent workers (or CI jobs
+            # sharing the directory) storing the same key never share one
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent, prefix=f'{path.stem}.',
+                                             suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                json.dump({'model': model, 'created': time.time(), 'response': response}, f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not store LLM response in cache: {e}")
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            if self.total_bytes is not None:
+                self.total_bytes += size - replaced
+            if self.total_bytes is not None and self.total_bytes <= self.max_bytes:
+                return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove expired entries, then the oldest ones until under ``max_bytes``"""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                stat_result = path.stat()
+            except OSError:
+                continue
+            if now - stat_result.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat_result.st_mtime, stat_result.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self.total_bytes = total
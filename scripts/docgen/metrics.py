@@ -0,0 +1,197 @@
+"""
+Per-stage timing and counters of a documentation run
+
+Every stage of a run (scan, pack, each LLM call, conversion, each Confluence
+request) is timed with ``get_report().stage(name)`` and annotated with
+counters: bytes read or sent, prompt/completion tokens reported by the
+provider, cache hits, retries and errors. At the end of the run the report
+is written as JSON (``--report``) and optionally as OpenMetrics text
+(``--metrics``), and ``over_budget`` checks the wall time against the
+budget set in the CI workflow.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+
+# Counters every stage carries, in report order
+COUNTERS = ('bytes', 'prompt_tokens', 'completion_tokens', 'cache_hits', 'retries', 'errors')
+
+OPENMETRICS_HELP = {
+    'calls': 'Timed calls of the stage',
+    'seconds': 'Wall time spent in the stage',
+    'bytes': 'Bytes read from disk or exchanged over the network',
+    'prompt_tokens': 'Prompt tokens reported by the LLM provider',
+    'completion_tokens': 'Completion tokens reported by the LLM provider',
+    'cache_hits': 'Results served from a cache',
+    'retries': 'Requests sent again after a failure',
+    'errors': 'Calls that raised an error',
+}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class StageStats:
+    """Durations and counters accumulated by one stage"""
+
+    def __init__(self):
+        self.durations: List[float] = []
+        self.counters: Dict[str, float] = {name: 0 for name in COUNTERS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': len(self.durations),
+            'seconds': round(sum(self.durations), 6),
+            'p50_seconds': round(percentile(self.durations, 0.5), 6),
+            'p95_seconds': round(percentile(self.durations, 0.95), 6),
+            'max_seconds': round(max(self.durations, default=0.0), 6),
+            **self.counters,
+        }
+
+
+class RunReport:
+    """Thread-safe collection of stage timings and counters"""
+
+    def __init__(self):
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, name: str) -> StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def add(self, name: str, **counters: float) -> None:
+        """Add counters to a stage without timing anything"""
+        with self._lock:
+            stats = self._stats(name)
+            for key, value in counters.items():
+                stats.counters[key] = stats.counters.get(key, 0) + (value or 0)
+
+    @contextmanager
+    def stage(self, name: str, **counters: float) -> Iterator[Dict[str, float]]:
+        """
+        Time one call of a stage
+
+        Yields a dict the caller fills with counters (``bytes``, ``cache_hits``...);
+        they are added to the stage when the block exits. A block exiting with
+        an exception counts as an error.
+
+        Args:
+            name: Stage name (``scan``, ``pack``, ``llm.<provider>``, ``convert``, ``confluence``...)
+            counters: Initial counters
+        """
+        values: Dict[str, float] = dict(counters)
+        start = time.monotonic()
+        try:
+            yield values
+        except BaseException:
+            values['errors'] = values.get('errors', 0) + 1
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                stats = self._stats(name)
+                stats.durations.append(elapsed)
+                for key, value in values.items():
+                    stats.counters[key] = stats.counters.get(key, 0) + (value or 0)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started"""
+        return time.monotonic() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {name: stats.to_dict() for name, stats in sorted(self.stages.items())}
+        return {
+            'version': REPORT_VERSION,
+            'started': self.started,
+            'total_seconds': round(self.elapsed, 6),
+            'stages': stages,
+        }
+
+    def render_openmetrics(self) -> str:
+        """Report in the OpenMetrics text exposition format"""
+        report = self.to_dict()
+        lines = [
+            '# TYPE docgen_run_seconds gauge',
+            '# HELP docgen_run_seconds Wall time of the documentation run',
+            f"docgen_run_seconds {report['total_seconds']}",
+        ]
+        for metric in ('calls', 'seconds') + COUNTERS:
+            lines.append(f"# TYPE docgen_stage_{metric} counter")
+            lines.append(f"# HELP docgen_stage_{metric} {OPENMETRICS_HELP[metric]}")
+            for name, stats in report['stages'].items():
+                lines.append(f'docgen_stage_{metric}_total{{stage="{name}"}} {stats.get(metric, 0)}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def over_budget(self, budget: Optional[float]) -> bool:
+        """True (and logged) when the run took longer than ``budget`` seconds"""
+        if not budget or self.elapsed <= budget:
+            return False
+        slowest = sorted(self.stages.items(), key=lambda item: -sum(item[1].durations))[:3]
+        logger.error(f"Run took {self.elapsed:.1f}s, over its {budget:.0f}s budget (slowest stages: " +
+                     ', '.join(f"{name} {sum(stats.durations):.1f}s" for name, stats in slowest) + ")")
+        return True
+
+    def write(self, json_path: Optional[Union[str, Path]] = None,
+              metrics_path: Optional[Union[str, Path]] = None) -> None:
+        """Write the JSON report and/or the OpenMetrics text atomically"""
+        outputs = []
+        if json_path:
+            outputs.append((Path(json_path), json.dumps(self.to_dict(), indent=2) + '\n'))
+        if metrics_path:
+            outputs.append((Path(metrics_path), self.render_openmetrics()))
+        for path, text in outputs:
+            try:
+                if path.parent != Path(''):
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f"{path.name}.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp_path, path)
+                logger.info(f"Run report written to {path}")
+            except OSError as e:
+                logger.warning(f"Could not write run report {path}: {e}")
+
+
+_report = RunReport()
+
+
+def get_report() -> RunReport:
+    """Report of the current run"""
+    return _report
+
+
+def reset_report() -> RunReport:
+    """Start a new report (e.g. between benchmark iterations)"""
+    global _report
+    _report = RunReport()
+    return _report
+
+
+def get_time_budget() -> Optional[float]:
+    """Run time budget in seconds from ``DOCGEN_TIME_BUDGET`` (None when unset)"""
+    value = os.getenv('DOCGEN_TIME_BUDGET')
+    return float(value) if value else None
@@ -0,0 +1,279 @@
+"""
+Deterministic offline documentation
+
+Renders architecture, module, variable, output and userdata-script sections
+straight from the Terraform index (``docgen.terraform``), its dependency
+graph (``docgen.graph``) and the script outlines (``docgen.script_parser``),
+without any LLM call. Both are cached
+in the scan manifest, so a warm run only formats Markdown: fast enough to
+run on every pull request while the LLM path is kept for merges.
+"""
+
+from collections import Counter
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Optional
+
+from docgen.graph import build_graph, render_module_diagram, render_resource_diagram
+from docgen.script_parser import SCRIPT_EXTENSIONS, parse_script
+from docgen.terraform import build_index, render_output_table, render_variable_table
+
+OFFLINE_NOTE = "*Generated offline from the Terraform and script sources (no LLM analysis).*"
+
+
+def _posix(file_path: str) -> str:
+    return file_path.replace('\\', '/')
+
+
+def script_outlines(files_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Outline every PowerShell/shell script in ``files_data``
+
+    Args:
+        files_data: Dictionary containing file information; script entries
+            carry their outline under ``script`` (computed on demand when missing)
+
+    Returns:
+        Script path -> outline from ``parse_script``
+    """
+    return {
+        _posix(file_path): file_info.get('script') or parse_script(file_path, file_info['content'])
+        for file_path, file_info in sorted(files_data.items())
+        if file_info['extension'] in SCRIPT_EXTENSIONS
+    }
+
+
+def _script_users(index: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Script path -> Terraform addresses that load it (through locals when needed)"""
+    users: Dict[str, List[str]] = {}
+    for module in index.values():
+        for template in module['templates']:
+            addresses = [template['used_by']]
+            if template['used_by'].startswith('local.'):
+                addresses = [f"{resource['type']}.{resource['name']}" for resource in module['resources']
+                             if template['used_by'] in resource['references']] or addresses
+            users.setdefault(template['path'], []).extend(
+                f"`{address}` ({template['attribute']})" for address in addresses
+            )
+    return users
+
+
+def _code_list(values: List[str]) -> str:
+    return ', '.join(f"`{value}`" for value in values)
+
+
+def render_architecture(index: Dict[str, Dict[str, Any]], scripts: Dict[str, Dict[str, Any]],
+                        graph: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render the architecture overview: root modules, module calls and resource counts
+
+    Args:
+        index: Result of ``build_index``
+        scripts: Result of ``script_outlines``
+        graph: Result of ``build_graph``, drawn as a module diagram when given
+
+    Returns:
+        Markdown section
+    """
+    called = {call['path'] for module in index.values() for call in module['modules'] if call['path']}
+    roots = [module_dir for module_dir in sorted(index) if module_dir not in called]
+    resource_types = Counter(resource['type'] for module in index.values() for resource in module['resources'])
+
+    lines = ["## 🏗️ Architecture Overview", ""]
+    lines.append(f"- **Terraform modules:** {len(index)} ({len(roots)} root)")
+    lines.append(f"- **Resources:** {sum(resource_types.values())} of {len(resource_types)} types")
+    lines.append(f"- **Data sources:** {sum(len(module['data']) for module in index.values())}")
+    lines.append(f"- **Userdata/startup scripts:** {len(scripts)}")
+    lines.append("")
+
+    diagram = render_module_diagram(graph) if graph else ''
+    if diagram:
+        lines.append("### Module Graph")
+        lines.append("")
+        lines.append(diagram)
+
+    for root in roots:
+        calls = index[root]['modules']
+        if not calls:
+            continue
+        lines.append(f"### Root module `{root}`")
+        lines.append("")
+        lines.append("| Module | Source | Inputs |")
+        lines.append("|--------|--------|--------|")
+        for call in calls:
+            inputs = ', '.join(f"`{key}`" for key in call['inputs']) or '-'
+            lines.append(f"| `module.{call['name']}` | `{call['source'] or '-'}` | {inputs} |")
+        lines.append("")
+
+    if resource_types:
+        lines.append("### Resource Types")
+        lines.append("")
+        lines.append("| Type | Count |")
+        lines.append("|------|-------|")
+        for resource_type, count in sorted(resource_types.items()):
+            lines.append(f"| `{resource_type}` | {count} |")
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def render_module(module_dir: str, module: Dict[str, Any], level: int = 3,
+                  graph: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render one Terraform module: files, providers, calls, resources, variables and outputs
+
+    Args:
+        module_dir: Module directory
+        module: Index entry from ``build_index``
+        level: Heading level of the module title
+        graph: Result of ``build_graph``, drawn as a resource diagram when given
+
+    Returns:
+        Markdown section
+    """
+    heading = '#' * level
+    sub = '#' * (level + 1)
+    lines = [f"{heading} `{module_dir}`", "", f"**Files:** {_code_list(module['files'])}", ""]
+
+    if module['providers']:
+        lines.append(f"**Providers:** {_code_list([provider['name'] for provider in module['providers']])}")
+        lines.append("")
+    if module['modules']:
+        lines.append(f"{sub} Module Calls")
+        lines.append("")
+        for call in module['modules']:
+            depends = f" (depends on {_code_list(call['depends_on'])})" if call['depends_on'] else ''
+            lines.append(f"- `module.{call['name']}` from `{call['source'] or '-'}`{depends}")
+        lines.append("")
+    if module['resources']:
+        lines.append(f"{sub} Resources")
+        lines.append("")
+        lines.append("| Resource | Defined in | Nested blocks | Depends on |")
+        lines.append("|----------|------------|---------------|------------|")
+        for resource in module['resources']:
+            nested = _code_list(list(dict.fromkeys(resource['nested']))) or '-'
+            depends = _code_list(resource['depends_on']) or '-'
+            lines.append(f"| `{resource['type']}.{resource['name']}` | "
+                         f"`{PurePosixPath(_posix(resource['file'])).name}:{resource['line']}` | {nested} | {depends} |")
+        lines.append("")
+    if module['data']:
+        lines.append(f"{sub} Data Sources")
+        lines.append("")
+        for data in module['data']:
+            lines.append(f"- `data.{data['type']}.{data['name']}`")
+        lines.append("")
+    diagram = render_resource_diagram(module_dir, graph) if graph else ''
+    if diagram:
+        lines.append(f"{sub} Dependencies")
+        lines.append("")
+        lines.append(diagram)
+
+    variables = render_variable_table(module)
+    if variables:
+        lines.append(f"{sub} Variables")
+        lines.append("")
+        lines.append(variables)
+    outputs = render_output_table(module)
+    if outputs:
+        lines.append(f"{sub} Outputs")
+        lines.append("")
+        lines.append(outputs)
+    if module['locals']:
+        lines.append(f"**Locals:** {_code_list(module['locals'])}")
+        lines.append("")
+    for error in module['errors']:
+        lines.append(f"> ⚠️ Could not fully parse {error}")
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def render_script(script_path: str, outline: Dict[str, Any], used_by: Optional[List[str]] = None,
+                  level: int = 3) -> str:
+    """
+    Render the outline of one userdata/startup script
+
+    Args:
+        script_path: Script path
+        outline: Result of ``parse_script``
+        used_by: Terraform addresses that load the script
+        level: Heading level of the script title
+
+    Returns:
+        Markdown section
+    """
+    language = 'PowerShell' if outline['language'] == 'powershell' else 'Shell'
+    lines = [f"{'#' * level} `{script_path}` ({language})", ""]
+    if outline['summary']:
+        lines.append(' '.join(outline['summary']))
+        lines.append("")
+    if used_by:
+        lines.append(f"- **Used by:** {', '.join(used_by)}")
+        if outline['placeholders']:
+            lines.append(f"- **Template variables:** {_code_list(outline['placeholders'])}")
+    if outline['parameters']:
+        lines.append(f"- **Parameters:** {_code_list(outline['parameters'])}")
+    for label, key in (('Windows features', 'features'), ('Packages', 'packages'),
+                       ('Services', 'services'), ('Firewall ports', 'ports'),
+                       ('Downloads', 'downloads'), ('Functions', 'functions')):
+        if outline[key]:
+            lines.append(f"- **{label}:** {_code_list(outline[key])}")
+    if lines[-1] != "":
+        lines.append("")
+    if outline['steps']:
+        lines.append("**Steps:**")
+        lines.append("")
+        lines.extend(f"{number}. {step}" for number, step in enumerate(outline['steps'], 1))
+        lines.append("")
+    return '\n'.join(lines)
+
+
+def render_offline_overview(files_data: Dict[str, Any],
+                            index: Optional[Dict[str, Dict[str, Any]]] = None,
+                            title: str = "Project Documentation",
+                            graph: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render the title and architecture overview of a sectioned document without an LLM
+
+    The modules and scripts themselves are documented by ``render_offline_section``.
+
+    Args:
+        files_data: Dictionary containing file information
+        index: Result of ``build_index`` (built from ``files_data`` if omitted)
+        title: Document title
+        graph: Result of ``build_graph`` (built from ``index`` if omitted)
+
+    Returns:
+        Markdown overview
+    """
+    if index is None:
+        index = build_index(files_data)
+    if graph is None:
+        graph = build_graph(index)
+    architecture = render_architecture(index, script_outlines(files_data), graph)
+    return f"# {title}\n\n{OFFLINE_NOTE}\n\n{architecture.rstrip()}\n"
+
+
+def render_offline_section(key: str, files_data: Dict[str, Any], graph: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render one documentation section (see ``docgen.incremental``) without an LLM
+
+    Args:
+        key: Section key
+        files_data: Files of the section
+        graph: Result of ``build_graph`` for the whole tree (built from the section if omitted)
+
+    Returns:
+        Markdown starting with ``## 📦 <key>``
+    """
+    index = build_index(files_data)
+    if graph is None:
+        graph = build_graph(index)
+    scripts = script_outlines(files_data)
+    users = _script_users(index)
+
+    parts = [f"## 📦 {key}\n"]
+    parts.extend(render_module(module_dir, module, graph=graph) for module_dir, module in sorted(index.items()))
+    parts.extend(render_script(path, outline, users.get(path)) for path, outline in scripts.items())
+    others = sorted(_posix(file_path) for file_path, file_info in files_data.items()
+                    if file_info['extension'] != '.tf' and file_info['extension'] not in SCRIPT_EXTENSIONS)
+    if others:
+        parts.append("### Other Files\n\n" + ''.join(f"- `{path}`\n" for path in others))
+    return '\n'.join(part.rstrip() + '\n' for part in parts)
@@ -0,0 +1,148 @@
+"""
+Token-aware context packing
+
+Estimates tokens per file, derives the prompt budget from the selected
+model's context window, and fills each request knapsack-style so that the
+highest-priority infrastructure files (Terraform modules, variables and
+outputs, userdata scripts) are packed first and the window is used fully.
+"""
+
+import os
+import re
+from pathlib import PurePosixPath
+from typing import Dict, List, Sequence
+
+from docgen.terraform import INDEX_ENTRY_NAME
+
+# Context window (input + output tokens) of the models used by the scripts
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    'claude-3-sonnet-20240229': 200000,
+    'gemini-1.5-flash': 1000000,
+    'gpt-4': 8192,
+}
+
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens kept free for the prompt instructions around the packed files
+PROMPT_OVERHEAD_TOKENS = 800
+
+# Cap on tokens per request: beyond this, smaller concurrent map-reduce
+# requests finish sooner than one huge request (DOCGEN_MAX_PROMPT_TOKENS)
+DEFAULT_MAX_PROMPT_TOKENS = 12000
+
+# Number of highest-priority candidates considered for each knapsack fill
+KNAPSACK_CANDIDATES = 64
+KNAPSACK_RESOLUTION = 512
+
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the BPE token count of a text
+
+    Counts words and individual symbols (code is punctuation-heavy, which a
+    plain characters/4 ratio underestimates) and adds one token per eight
+    characters of long identifiers.
+    """
+    tokens = 0
+    for match in _TOKEN_RE.finditer(text):
+        tokens += 1 + (match.end() - match.start()) // 8
+    return tokens + 1
+
+
+def prompt_budget(model: str, max_output_tokens: int = 4000) -> int:
+    """
+    Input tokens available for packed files in one request to ``model``
+
+    Args:
+        model: Model identifier
+        max_output_tokens: Tokens reserved for the completion
+
+    Returns:
+        Context window minus output and instruction overhead, capped by
+        ``DOCGEN_MAX_PROMPT_TOKENS`` (default 12000)
+    """
+    window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    cap = int(os.getenv('DOCGEN_MAX_PROMPT_TOKENS', DEFAULT_MAX_PROMPT_TOKENS))
+    return max(min(window - max_output_tokens - PROMPT_OVERHEAD_TOKENS, cap), 1000)
+
+
+def priority_score(file_path: str) -> float:
+    """
+    Priority of a file for infrastructure documentation (higher is packed first)
+
+    Args:
+        file_path: File path relative to the repository root
+
+    Returns:
+        Score between 1 and 10
+    """
+    path = PurePosixPath(file_path.replace('\\', '/'))
+    name = path.name.lower()
+    suffix = path.suffix.lower()
+
+    if name == INDEX_ENTRY_NAME:
+        score = 10.0
+    elif suffix == '.tf':
+        if path.stem in ('variables', 'outputs'):
+            score = 9.0
+        else:
+            score = 10.0
+    elif suffix in ('.ps1', '.sh') and ('userdata' in name or 'startup' in name):
+        score = 8.0
+    elif suffix in ('.ps1', '.sh', '.tfvars', '.hcl'):
+        score = 7.0
+    elif suffix in ('.yaml', '.yml'):
+        score = 6.0
+    elif suffix in ('.py', '.go', '.js', '.ts', '.java'):
+        score = 5.0
+    elif suffix == '.md':
+        score = 4.0
+    elif suffix == '.json':
+        score = 2.0
+    else:
+        score = 3.0
+
+    if 'modules' in path.parts:
+        score += 0.5
+    return min(score, 10.0)
+
+
+def knapsack(weights: Sequence[int], values: Sequence[float], capacity: int) -> List[int]:
+    """
+    0/1 knapsack on weights scaled to ``KNAPSACK_RESOLUTION`` buckets
+
+    Weights are rounded up when scaled, so the selection never exceeds
+    ``capacity``.
+
+    Args:
+        weights: Token cost per item
+        values: Value per item
+        capacity: Token budget
+
+    Returns:
+        Indices of the selected items, in input order
+    """
+    scale = max(1, -(-capacity // KNAPSACK_RESOLUTION))
+    slots = capacity // scale
+    scaled = [-(-weight // scale) for weight in weights]
+
+    best = [0.0] * (slots + 1)
+    keep = [[False] * (slots + 1) for _ in weights]
+    for item, (weight, value) in enumerate(zip(scaled, values)):
+        if weight > slots:
+            continue
+        for slot in range(slots, weight - 1, -1):
+            candidate = best[slot - weight] + value
+            if candidate > best[slot]:
+                best[slot] = candidate
+                keep[item][slot] = True
+
+    selected = []
+    slot = slots
+    for item in range(len(weights) - 1, -1, -1):
+        if keep[item][slot]:
+            selected.append(item)
+            slot -= scaled[item]
+    return sorted(selected)
@@ -0,0 +1,121 @@
+"""
+Multi-page Confluence publishing
+
+Splits a generated document into a parent page (the overview) and one child
+page per module/section, publishes the parent first, then uploads the
+children concurrently through a bounded worker pool. Smaller pages render
+faster in Confluence and are updated independently.
+"""
+
+import logging
+import os
+import re
+from typing import Callable, List, Optional, Tuple
+
+from docgen.async_runner import run_concurrently
+from docgen.incremental import SECTIONS_HEADER, parse_sections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+
+_FENCE_RE = re.compile(r'^\s*(`{3,}|~{3,})')
+_H2_RE = re.compile(r'^##\s+(.+?)\s*#*\s*$')
+
+
+def split_pages(document: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Split a document into an overview and child pages
+
+    Sectioned documents (see ``docgen.incremental``) are split on their
+    section markers; any other document is split on its level-2 headings,
+    ignoring headings inside code blocks.
+
+    Args:
+        document: Markdown documentation
+
+    Returns:
+        (overview markdown, [(child name, child markdown), ...])
+    """
+    if SECTIONS_HEADER in document:
+        overview = document.split(SECTIONS_HEADER, 1)[0].rstrip() + '\n'
+        return overview, [(key if key != '.' else 'Repository root', body)
+                          for key, body in parse_sections(document).items()]
+
+    overview: List[str] = []
+    children: List[Tuple[str, List[str]]] = []
+    fence = None
+    for line in document.splitlines(keepends=True):
+        fence_match = _FENCE_RE.match(line)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+
+        heading = _H2_RE.match(line) if fence is None else None
+        if heading:
+            children.append((heading.group(1), [line]))
+        elif children:
+            children[-1][1].append(line)
+        else:
+            overview.append(line)
+
+    return ''.join(overview), [(name, ''.join(lines)) for name, lines in children]
+
+
+def plan_page_tree(title: str, document: str) -> Tuple[Tuple[str, str], List[Tuple[str, str]]]:
+    """
+    Titles and Markdown of the parent page and its child pages
+
+    Args:
+        title: Parent page title; children are titled ``<title> - <name>``
+        document: Markdown documentation
+
+    Returns:
+        ((parent title, parent markdown), [(child title, child markdown), ...])
+    """
+    overview, children = split_pages(document)
+    child_titles = [f"{title} - {name}" for name, _ in children]
+    if child_titles:
+        overview = overview.rstrip() + "\n\n## 📚 Pages\n\n" + ''.join(f"- {child}\n" for child in child_titles)
+    return (title, overview), [(child_title, body) for child_title, (_, body) in zip(child_titles, children)]
+
+
+def publish_pages(publish: Callable[[str, str, Optional[str]], Optional[str]],
+                  parent: Tuple[str, str],
+                  children: List[Tuple[str, str]],
+                  workers: Optional[int] = None) -> bool:
+    """
+    Publish a parent page, then its children concurrently
+
+    Args:
+        publish: Callback ``(title, body, parent_id) -> page id or None``
+        parent: (title, body) of the parent page
+        children: (title, body) of each child page
+        workers: Concurrent child uploads (default ``DOCGEN_CONFLUENCE_WORKERS`` or 4)
+
+    Returns:
+        True if every page was published (or already up to date)
+    """
+    workers = workers or int(os.getenv('DOCGEN_CONFLUENCE_WORKERS', DEFAULT_WORKERS))
+    title, body = parent
+    parent_id = publish(title, body, None)
+    if parent_id is None:
+        logger.error(f"Could not publish parent page '{title}', skipping {len(children)} child pages")
+        return False
+
+    if children:
+        logger.info(f"Publishing {len(children)} child pages with {workers} workers")
+    results = run_concurrently(
+        [lambda child_title=child_title, body=body: publish(child_title, body, parent_id)
+         for child_title, body in children],
+        workers
+    )
+
+    failed = [child_title for (child_title, _), page_id in zip(children, results) if page_id is None]
+    for child_title in failed:
+        logger.error(f"Failed to publish child page '{child_title}'")
+    return not failed
+
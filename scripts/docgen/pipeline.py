@@ -0,0 +1,910 @@
+"""
+Staged documentation pipeline
+
+The unified entry point (``scripts/docgen_cli.py``) runs the documentation
+as five stages that exchange JSON artifacts through a work directory
+(``.docgen_cache/pipeline``, or ``--work-dir`` / ``DOCGEN_WORK_DIR``):
+
+- ``scan`` lists the files to document with their hash and metadata (``scan.json``)
+- ``pack`` splits each section, and the whole tree for the overview, into
+  token-budgeted prompt contexts (``pack.json``)
+- ``analyze`` writes the overview and every section with the LLM, or from
+  the parsed sources offline (``analyze.json``)
+- ``render`` assembles the Markdown document with the exact diagrams and
+  reference tables, writes the output file and converts the Confluence
+  pages to storage format (``render.json``)
+- ``publish`` sends the rendered pages to Confluence (``publish.json``)
+
+Each artifact records a digest of its inputs: a stage whose inputs did not
+change is skipped, and ``pack``/``analyze`` reuse every section whose files
+are unchanged from their previous artifact. Each stage only reads artifacts
+from disk, so stages can run in separate processes (or CI jobs) and a CI
+cache of the work directory only pays for what changed.
+
+The other modes run the same stages: the topic sections (deployment,
+security, monitoring, troubleshooting) are packed from the semantic index
+and written before the overview; ``since`` seeds the analysis from the
+previous document; ``watch`` reruns the stages on every save; ``stream``
+writes the overview to the output file as it arrives; and
+``document_repositories`` analyzes several repositories through a batch API.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from docgen.metrics import get_report
+
+# The other docgen modules are imported by the stages that use them, so that
+# ``--help`` and the scan stage do not pay for parsers, converters and SDKs
+if TYPE_CHECKING:
+    from docgen.batch import BatchProvider
+    from docgen.providers import LLMRouter
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 3
+
+STAGES = ('scan', 'pack', 'analyze', 'render', 'publish')
+
+# File extensions documented by the pipeline (union of the former scripts)
+EXTENSIONS = {'.py', '.js', '.ts', '.go', '.java', '.tf', '.yaml', '.yml', '.md', '.json', '.ps1', '.sh'}
+
+# Provider -> model, in fallback order
+MODELS = {
+    'anthropic': "claude-3-sonnet-20240229",
+    'gemini': "gemini-1.5-flash",
+    'openai': "gpt-4",
+}
+
+MAX_TOKENS = 4000
+
+# Pack entry holding the whole tree, used for the overview
+OVERVIEW = '*'
+
+# Prefix of the pack entries holding the retrieved excerpts of a topic section
+TOPIC = 'topic:'
+
+PROMPTS = {
+    'en': {
+        'overview': """
+Analyze this Infrastructure as Code (IaC) codebase and write the overview of its documentation. Focus on:
+
+{focus}
+
+Generate the documentation in Markdown format, starting with a `#` title, with clear sections
+and subsections with emojis. Do not document each module in detail: every module and directory
+gets its own section, written separately. No diagrams: exact dependency diagrams are generated
+from the sources and appended separately.{separate}
+
+{source}:
+{context}
+""",
+        'focus': [
+            "**🏗️ Architecture Overview**: Infrastructure architecture, components, and design patterns",
+            "**⚙️ Configuration**: Environment variables, config files, deployment settings, and parameters",
+            "**🔗 Dependencies**: External services, tools, and their purposes",
+            "**🛠️ Development Guide**: How to contribute, test, and maintain the infrastructure",
+            "**📖 Usage Examples**: Common use cases and operational procedures",
+        ],
+        'separate': " No {titles} sections either: they are written separately.",
+        'section': """
+Document the `{key}` component of this Infrastructure as Code (IaC) codebase.
+Start with the heading `## 📦 {key}` and cover its purpose, resources, inputs,
+outputs, dependencies and operational notes. Use Markdown subsections (###).
+
+{source}:
+{context}
+""",
+        'topic': """
+Write the `## {title}` section of the documentation of this Infrastructure as Code (IaC)
+codebase. Start with that heading, use ### subsections, step-by-step instructions and code
+examples where relevant. Only rely on the excerpts below (the most relevant parts of the
+codebase for this topic) and keep exact resource, variable and file names.
+
+Excerpts:
+{context}
+""",
+        'sources': ("Files", "Notes on its files"),
+    },
+    'fr': {
+        'overview': """
+Analyze this codebase and write the overview of its documentation in French. Focus on:
+
+{focus}
+
+Generate the documentation in Markdown format, starting with a `#` title, with clear sections and
+subsections. Do not document each module in detail: every module and directory gets its own
+section, written separately. Do not draw diagrams: exact dependency diagrams are generated from
+the sources and appended automatically.{separate} Use French for all text except code comments and
+technical terms.
+
+{source}:
+{context}
+""",
+        'focus': [
+            "**Vue d'ensemble de l'architecture**: Architecture système de haut niveau et patterns de conception",
+            "**Configuration**: Variables d'environnement, fichiers de config et paramètres de déploiement",
+            "**Dépendances**: Bibliothèques externes et leur utilisation",
+            "**Exemples d'utilisation**: Comment utiliser le système/composants",
+            "**Guide de développement**: Comment contribuer, construire, tester et déployer",
+        ],
+        'separate': " Do not write the {titles} sections either: they are written separately.",
+        'section': """
+Document the `{key}` component of this codebase in French.
+Start with the heading `## 📦 {key}` and cover its purpose, resources, inputs,
+outputs, dependencies and operational notes. Use Markdown subsections (###).
+Use French for all text except code comments and technical terms.
+
+{source}:
+{context}
+""",
+        'topic': """
+Write the `## {title}` section of the documentation of this codebase in French. Start with
+that heading, use ### subsections, step-by-step instructions and code examples where relevant.
+Only rely on the excerpts below (the most relevant parts of the codebase for this topic) and
+keep exact resource, variable and file names. Use French for all text except code comments
+and technical terms.
+
+Excerpts:
+{context}
+""",
+        'sources': ("Fichiers", "Notes sur ses fichiers"),
+    },
+}
+
+SUMMARY_PROMPT = """
+You are reading part {index} of {total} of an Infrastructure as Code codebase.
+Write dense technical notes that will later be merged with the notes for the
+other parts into full documentation.
+
+For every file or component, record: its purpose, resources and modules it defines,
+variables with types and defaults, outputs, dependencies on other files, and anything
+notable for deployment, security, monitoring or troubleshooting. Keep exact names.
+Do not write an introduction or conclusion.
+
+Content:
+{context}
+"""
+
+
+def get_work_dir(base_path: Union[str, Path] = '.') -> Path:
+    """Directory holding the stage artifacts (``DOCGEN_WORK_DIR`` overrides it)"""
+    from docgen.scan_cache import get_cache_dir
+    return Path(os.getenv('DOCGEN_WORK_DIR') or get_cache_dir(base_path) / 'pipeline')
+
+
+def fingerprint(value: Any) -> str:
+    """Stable SHA-256 of a JSON-serialisable value"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Pipeline:
+    """Documentation stages of one repository, exchanging artifacts through ``work_dir``"""
+
+    def __init__(self, base_path: str = '.', work_dir: Optional[Union[str, Path]] = None,
+                 output_file: str = 'generated_docs.md', offline: bool = False, language: str = 'en',
+                 multi_page: bool = False, force: bool = False, use_cache: bool = True,
+                 dot_file: Optional[str] = None, topics: bool = True, since: Optional[str] = None,
+                 until: str = 'HEAD', stream: bool = False, title: Optional[str] = None,
+                 report_files: Sequence[Optional[str]] = ()):
+        """
+        Args:
+            base_path: Root of the repository to document
+            work_dir: Artifact directory (default ``get_work_dir(base_path)``)
+            output_file: Markdown file written by ``render``
+            offline: Render from the parsed sources without any LLM call
+            language: Language of the LLM prose (``en`` or ``fr``)
+            multi_page: Render and publish one Confluence child page per section
+            force: Run the stages even when their inputs are unchanged
+            use_cache: Reuse the scan manifest, dependency graph and LLM responses
+            dot_file: Also write the Terraform dependency graph to this DOT file
+            topics: Write the topic sections from their most relevant excerpts (LLM only)
+            since: Without a previous analysis, keep the sections of the previous
+                document whose files did not change since this git revision
+            until: Target git revision for ``since``
+            stream: Write the overview to the output file as the LLM generates it
+            title: Confluence page title (default ``Documentation - <repository>``)
+            report_files: Run report and metrics files written after the run, never scanned
+        """
+        from docgen.scan_cache import get_cache_dir
+        if language not in PROMPTS:
+            raise ValueError(f"Unsupported language {language!r} (expected one of: {', '.join(PROMPTS)})")
+        self.base_path = base_path
+        self.cache_dir = get_cache_dir(base_path)
+        self.work_dir = Path(work_dir) if work_dir else get_work_dir(base_path)
+        self.output_file = output_file
+        self.offline = offline
+        self.language = language
+        self.multi_page = multi_page
+        self.force = force
+        self.use_cache = use_cache
+        self.dot_file = dot_file
+        self.topics = topics
+        self.since = since
+        self.until = until
+        self.stream = stream
+        self.custom_title = title
+        self.report_files = [path for path in report_files if path]
+        self.models = {}
+        if not offline:
+            from docgen.providers import selected_models
+            self.models = selected_models(MODELS)
+        self.router = None
+        self.llm_cache = None
+        # Kept between the scans of a watch session
+        self.scan_cache = None
+        # While watching, the overview and the topics are only written again by the next full run
+        self.keep_overview = False
+
+    # Artifacts
+
+    def artifact_path(self, stage: str) -> Path:
+        return self.work_dir / f"{stage}.json"
+
+    def load(self, stage: str, required: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Read the artifact of a stage
+
+        Raises:
+            RuntimeError: If ``required`` and the artifact is missing or from another format version
+        """
+        path = self.artifact_path(stage)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                artifact = json.load(f)
+            if artifact.get('version') == ARTIFACT_VERSION:
+                return artifact
+            logger.info(f"{path} was written by another version, ignoring it")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable artifact {path}: {e}")
+        if required:
+            raise RuntimeError(f"{path} is missing, run the {stage} stage first")
+        return None
+
+    def save(self, stage: str, inputs: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the artifact of a stage atomically, with its inputs and its own digest"""
+        artifact = {'version': ARTIFACT_VERSION, 'stage': stage, 'created': time.time(),
+                    'inputs': inputs, 'digest': fingerprint(data), **data}
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        path = self.artifact_path(stage)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logger.info(f"{stage}: wrote {path}")
+        return artifact
+
+    def unchanged(self, stage: str, inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Previous artifact of a stage if it was produced from the same inputs"""
+        previous = self.load(stage, required=False)
+        if previous and previous['inputs'] == inputs and not self.force:
+            logger.info(f"{stage}: inputs unchanged, keeping {self.artifact_path(stage)}")
+            return previous
+        return None
+
+    def files_data(self, scan: Dict[str, Any]) -> Dict[str, Any]:
+        """``files_data`` of a scan artifact (contents are read from the tree on access)"""
+        from docgen.scan_cache import FileEntry
+        return {key: FileEntry(Path(self.base_path) / key, record['metadata'], digest=record['sha256'])
+                for key, record in scan['files'].items()}
+
+    def graph(self, index: Dict[str, Any]) -> Dict[str, Any]:
+        from docgen.graph import load_graph
+        return load_graph(index, self.cache_dir, enabled=self.use_cache)
+
+    def output_paths(self) -> List[Union[str, Path]]:
+        """Files and directories the pipeline writes, never scanned as sources"""
+        paths: List[Union[str, Path]] = [self.output_file, f"{self.output_file}.tmp", self.work_dir]
+        for path in ([self.dot_file] if self.dot_file else []) + self.report_files:
+            paths += [path, f"{path}.tmp"]
+        return paths
+
+    @property
+    def writes_topics(self) -> bool:
+        return self.topics and not self.offline and bool(self.models)
+
+    # Stages
+
+    def scan(self, changed: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        List the files to document; always runs, unchanged files come from the scan manifest
+
+        Args:
+            changed: Keys reported by a watcher: only these files are read again and
+                the others come from the previous scan artifact (full scan if None)
+        """
+        from docgen.scan_cache import ScanCache
+        from docgen.scanner import excluded_keys, scan_files
+        previous = self.load('scan', required=False) if changed is not None else None
+        if self.scan_cache is None:
+            self.scan_cache = ScanCache(self.cache_dir, enabled=self.use_cache)
+        if previous is None:
+            # The rendered document would otherwise change the scan of the next run
+            files_data = scan_files(self.base_path, EXTENSIONS, self.scan_cache, exclude_paths=self.output_paths())
+            self.scan_cache.save()
+            logger.info(f"scan: {len(files_data)} files "
+                        f"({self.scan_cache.hits} unchanged, {self.scan_cache.misses} re-read)")
+        else:
+            files_data = self.files_data(previous)
+            changed = set(changed) - excluded_keys(self.base_path, self.output_paths())
+            for key in sorted(changed):
+                path = Path(self.base_path) / key
+                entry = None
+                try:
+                    if path.is_file():
+                        entry = self.scan_cache.get_entry(path, key)
+                except (OSError, UnicodeDecodeError) as e:
+                    logger.warning(f"Could not read {key}: {e}")
+                if entry is None:
+                    files_data.pop(key, None)
+                    if not path.exists():
+                        self.scan_cache.entries.pop(key, None)
+                else:
+                    files_data[key] = entry
+            logger.info(f"scan: {len(changed)} changed file(s) read again, {len(files_data)} files")
+
+        files = {key: {'sha256': entry.digest, 'metadata': dict(entry)} for key, entry in files_data.items()}
+        inputs = {'files': fingerprint({key: record['sha256'] for key, record in files.items()}),
+                  'extensions': sorted(EXTENSIONS)}
+        return self.unchanged('scan', inputs) or self.save('scan', inputs, {'files': files})
+
+    def pack(self) -> Dict[str, Any]:
+        """Split the overview and every section into prompt contexts, and retrieve the topic excerpts"""
+        from docgen.chunking import chunk_files
+        from docgen.incremental import group_by_section
+        from docgen.packer import prompt_budget
+        from docgen.terraform import build_index, condense_files
+        scan = self.load('scan')
+        budget = min((prompt_budget(model) for model in self.models.values()), default=prompt_budget(None))
+        inputs = {'scan': scan['digest'], 'budget': budget, 'topics': self.writes_topics}
+        previous = self.unchanged('pack', inputs)
+        if previous:
+            return previous
+        previous = self.load('pack', required=False) or {'entries': {}}
+
+        files_data = self.files_data(scan)
+        groups = {OVERVIEW: files_data, **group_by_section(files_data)}
+        entries = {}
+        reused = 0
+        for key, group in groups.items():
+            digest = fingerprint([budget, {path: entry.digest for path, entry in group.items()}])
+            cached = previous['entries'].get(key)
+            if cached and cached['digest'] == digest:
+                entries[key] = cached
+                reused += 1
+                continue
+            # Only the plan (file parts of each chunk) is stored: analyze renders the text
+            entries[key] = {
+                'digest': digest,
+                'files': sorted(group),
+                'plans': chunk_files(condense_files(group, build_index(group)), budget).plans,
+            }
+        if self.writes_topics:
+            for key, entry in self._pack_topics(files_data, budget).items():
+                cached = previous['entries'].get(key)
+                if cached and cached['digest'] == entry['digest']:
+                    reused += 1
+                entries[key] = entry
+        logger.info(f"pack: {len(entries) - reused} of {len(entries)} entries packed, {reused} unchanged")
+        return self.save('pack', inputs, {'budget': budget, 'entries': entries})
+
+    def analyze(self) -> Dict[str, Any]:
+        """Write the topics, then the overview and the sections, reusing those whose files are unchanged"""
+        analysis = self.begin_analysis()
+        if 'artifact' in analysis:
+            return analysis['artifact']
+
+        texts: Dict[str, Optional[str]] = {}
+        if analysis['mode'] == 'llm' and analysis['pending']:
+            from docgen.async_runner import run_concurrently
+            self.get_router()
+            # Topics first: those that could not be written go back into the overview prompt
+            topics = [key for key in analysis['pending'] if key.startswith(TOPIC)]
+            texts.update(zip(topics, run_concurrently([lambda key=key: self._write(analysis, key)
+                                                       for key in topics])))
+            self._settle_overview(analysis, texts)
+            others = [key for key in analysis['pending'] if not key.startswith(TOPIC)]
+            texts.update(zip(others, run_concurrently([lambda key=key: self._write(analysis, key)
+                                                       for key in others])))
+        return self.finish_analysis(analysis, texts)
+
+    def begin_analysis(self) -> Dict[str, Any]:
+        """
+        First half of ``analyze``: reuse the entries whose files are unchanged
+
+        Returns:
+            ``{'artifact': ...}`` when the stage is up to date, otherwise the state that
+            ``finish_analysis`` completes (inputs, reused entries, pending keys)
+        """
+        scan, pack = self.load('scan'), self.load('pack')
+        mode = 'offline' if self.offline or not self.models else 'llm'
+        inputs = {'pack': pack['digest'], 'mode': mode, 'language': self.language,
+                  'models': sorted(self.models.values())}
+        previous = self.unchanged('analyze', inputs)
+        if previous and not previous.get('failed'):
+            return {'artifact': previous}
+        previous = self.load('analyze', required=False)
+        if not previous or previous['inputs']['mode'] != mode or previous['inputs']['language'] != self.language:
+            previous = {'entries': {}}
+        if self.since and not previous['entries']:
+            previous = {'entries': self._seed_from_document(pack)}
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for key, packed in pack['entries'].items():
+            # An entry whose request failed or was cut short is written again
+            cached = None if key in previous.get('failed', ()) else previous['entries'].get(key)
+            kept = self.keep_overview and (key == OVERVIEW or key.startswith(TOPIC))
+            if cached and (cached['digest'] == packed['digest'] or kept) and cached['source'] in (mode, 'document'):
+                entries[key] = cached
+            else:
+                pending.append(key)
+        if OVERVIEW in entries and entries[OVERVIEW]['source'] == 'document':
+            # The previous overview already holds its topic sections
+            pending = [key for key in pending if not key.startswith(TOPIC)]
+        logger.info(f"analyze ({mode}): {len(pending)} of {len(pack['entries'])} entries to write")
+        return {'inputs': inputs, 'mode': mode, 'scan': scan, 'files': self.files_data(scan), 'pack': pack,
+                'entries': entries, 'pending': pending}
+
+    def finish_analysis(self, analysis: Dict[str, Any], texts: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """
+        Second half of ``analyze``: store the written entries and save the artifact
+
+        Args:
+            analysis: State returned by ``begin_analysis``
+            texts: LLM text per pending key; the missing ones are rendered offline,
+                except the topics, and both are written again by the next run
+        """
+        from docgen.offline import render_offline_overview, render_offline_section
+        from docgen.terraform import build_index
+        pack = analysis['pack']
+        entries = analysis['entries']
+        failed = []
+        analysis.setdefault('missing', self._missing_topics(entries, texts))
+        files_data = analysis['files']
+        index = build_index(files_data)
+        graph = self.graph(index)
+        for key in analysis['pending']:
+            packed = pack['entries'][key]
+            text = texts.get(key)
+            if key.startswith(TOPIC):
+                if text or not packed['hits']:
+                    entries[key] = {'digest': packed['digest'], 'source': 'llm', 'text': text or ''}
+                else:
+                    failed.append(key)
+                continue
+            source = analysis['mode'] if text else 'offline'
+            if source != analysis['mode'] or key in analysis.get('interrupted', ()):
+                failed.append(key)
+            if not text:
+                group = files_data if key == OVERVIEW else {path: files_data[path] for path in packed['files']}
+                text = (render_offline_overview(group, index, graph=graph) if key == OVERVIEW
+                        else render_offline_section(key, group, graph))
+            entries[key] = {'digest': packed['digest'], 'source': source, 'text': text}
+            if key == OVERVIEW and source == 'llm':
+                entries[key]['missing'] = analysis['missing']
+        if failed:
+            logger.warning(f"analyze: {', '.join(failed)} will be written again by the next run")
+        return self.save('analyze', analysis['inputs'], {'entries': entries, 'failed': failed})
+
+    def render(self) -> Dict[str, Any]:
+        """Assemble the document, write the output file and convert the Confluence pages"""
+        from docgen.confluence import markdown_to_storage
+        from docgen.graph import render_dot, render_graph_section, render_resource_diagram
+        from docgen.incremental import build_sectioned_document, group_by_section
+        from docgen.page_tree import plan_page_tree
+        from docgen.semantic import SECTION_QUERIES
+        from docgen.terraform import build_index, render_module_reference
+        scan, analysis = self.load('scan'), self.load('analyze')
+        inputs = {'analyze': analysis['digest'], 'scan': scan['digest'], 'title': self.title,
+                  'multi_page': self.multi_page, 'output': str(self.output_file)}
+        files_data = self.files_data(scan)
+        index = build_index(files_data)
+        graph = self.graph(index)
+        if self.dot_file:
+            with open(self.dot_file, 'w', encoding='utf-8') as f:
+                f.write(render_dot(graph))
+            logger.info(f"render: dependency graph saved as {self.dot_file}")
+
+        previous = self.unchanged('render', inputs)
+        if previous and Path(self.output_file).is_file():
+            return previous
+
+        entries = analysis['entries']
+        overview = entries[OVERVIEW]['text']
+        if entries[OVERVIEW]['source'] != 'document':
+            overview = self._append(overview, [entries[f"{TOPIC}{key}"]['text'] for key in SECTION_QUERIES
+                                               if f"{TOPIC}{key}" in entries])
+        if entries[OVERVIEW]['source'] == 'llm':
+            overview = self._append(overview, [render_graph_section(graph)])
+        sections = {}
+        for key, section_files in group_by_section(files_data).items():
+            entry = entries.get(key)
+            if entry is None:
+                continue
+            body = entry['text']
+            if entry['source'] == 'llm':
+                section_index = build_index(section_files)
+                body = self._append(body, [
+                    f"### 🔗 `{module_dir}` dependencies\n\n{diagram}"
+                    for module_dir, diagram in ((module_dir, render_resource_diagram(module_dir, graph))
+                                                for module_dir in sorted(section_index)) if diagram
+                ] + [render_module_reference(module_dir, module) for module_dir, module in sorted(section_index.items())])
+            sections[key] = body
+        document = build_sectioned_document(overview, sections)
+
+        tmp_path = f"{self.output_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(document)
+        os.replace(tmp_path, self.output_file)
+        logger.info(f"render: documentation saved as {self.output_file}")
+
+        if self.multi_page:
+            parent, children = plan_page_tree(self.title, document)
+        else:
+            parent, children = (self.title, document), []
+        with get_report().stage('convert', bytes=len(document.encode('utf-8'))):
+            pages = [{'title': title, 'storage': markdown_to_storage(body)} for title, body in [parent] + children]
+        return self.save('render', inputs, {'markdown': document, 'pages': pages})
+
+    def publish(self) -> Optional[Dict[str, Any]]:
+        """Publish the rendered pages (the first one is the parent of the others)"""
+        from docgen.page_tree import publish_pages
+        from docgen.publisher import ConfluencePublisher
+        rendered = self.load('render')
+        publisher = ConfluencePublisher.from_env(self.cache_dir)
+        if publisher.missing_settings:
+            logger.info(f"publish: Confluence not configured ({', '.join(publisher.missing_settings)} missing), "
+                        f"skipping publication")
+            return None
+
+        inputs = {'render': rendered['digest'], 'base_url': publisher.base_url, 'space': publisher.space}
+        previous = self.unchanged('publish', inputs)
+        if previous:
+            return previous
+
+        pages = [(page['title'], page['storage']) for page in rendered['pages']]
+        with get_report().stage('publish'):
+            if publish_pages(publisher.publish, pages[0], pages[1:]):
+                return self.save('publish', inputs, {'pages': publisher.page_ids})
+        raise RuntimeError(f"Publication to Confluence failed ({len(publisher.page_ids)} of {len(pages)} pages published)")
+
+    def run(self, stages: List[str]) -> None:
+        """Run ``stages`` in pipeline order"""
+        for stage in STAGES:
+            if stage in stages:
+                with get_report().stage(f"stage.{stage}"):
+                    getattr(self, stage)()
+
+    def watch(self) -> None:
+        """
+        Keep the local documentation up to date while files are edited (no publication)
+
+        The stages run once, then again after every save: only the changed files
+        are read again and only their sections analyzed again, the overview and
+        the topic sections being kept until the next full run.
+        """
+        from docgen.watch import create_watcher
+        watcher = create_watcher(self.base_path, EXTENSIONS, exclude_paths=self.output_paths())
+        stages = [stage for stage in STAGES if stage != 'publish']
+        try:
+            self.run(stages)
+            self.keep_overview = True
+            logger.info("watch: waiting for changes, press Ctrl+C to stop")
+            while True:
+                changed = watcher.changes()
+                start = time.monotonic()
+                digest = self.load('scan')['digest']
+                if self.scan(changed)['digest'] == digest:
+                    continue
+                with get_report().stage('watch.update'):
+                    self.run(stages[1:])
+                logger.info(f"watch: {self.output_file} updated in {time.monotonic() - start:.2f}s")
+        except KeyboardInterrupt:
+            logger.info("watch: stopped")
+        finally:
+            watcher.close()
+            if self.scan_cache is not None:
+                self.scan_cache.save()
+
+    # Helpers
+
+    @property
+    def title(self) -> str:
+        if self.custom_title:
+            return self.custom_title
+        repo_name = os.getenv('GITHUB_REPOSITORY', '').split('/')[-1] or Path(self.base_path).resolve().name
+        return f"Documentation - {repo_name}"
+
+    @staticmethod
+    def _append(text: str, references: List[str]) -> str:
+        for reference in references:
+            if reference:
+                text = text.rstrip() + "\n\n" + reference
+        return text
+
+    def chunks(self, files_data: Dict[str, Any], key: str, packed: Dict[str, Any]) -> Sequence[str]:
+        """
+        Prompt contexts of a pack entry, rendered from the sources on access
+
+        Args:
+            files_data: ``files_data`` of the scan the entry was packed from
+            key: Pack entry (``OVERVIEW``, a section key or a topic)
+            packed: The entry, holding its chunk plans or its retrieved excerpts
+        """
+        if key.startswith(TOPIC):
+            from docgen.semantic import render_hits
+            return [render_hits(packed['hits'], files_data)] if packed['hits'] else []
+        from docgen.chunking import LazyChunks
+        from docgen.terraform import build_index, condense_files
+        group = files_data if key == OVERVIEW else {path: files_data[path] for path in packed['files']}
+        return LazyChunks(condense_files(group, build_index(group)), packed['plans'])
+
+    def _pack_topics(self, files_data: Dict[str, Any], budget: int) -> Dict[str, Dict[str, Any]]:
+        """Most relevant excerpts of the infrastructure sources for every topic section"""
+        from docgen.semantic import SECTION_QUERIES, SemanticIndex, topic_sources
+        semantic_index = SemanticIndex(self.cache_dir, enabled=self.use_cache)
+        semantic_index.update(topic_sources(files_data))
+        semantic_index.save()
+        logger.info(f"pack: semantic index, {semantic_index.updated} files re-indexed ({semantic_index.backend})")
+
+        entries = {}
+        for key, section in SECTION_QUERIES.items():
+            hits = semantic_index.search(section['query'], max_tokens=budget)
+            if not hits:
+                logger.info(f"pack: no relevant sources for {section['title']}, the overview covers it")
+            entries[f"{TOPIC}{key}"] = {
+                'digest': fingerprint([budget, section['query'],
+                                       [[hit['path'], files_data[hit['path']].digest, hit['span']] for hit in hits]]),
+                'files': sorted({hit['path'] for hit in hits}),
+                'hits': [{'path': hit['path'], 'span': hit['span'], 'lines': hit['lines']} for hit in hits],
+            }
+        return entries
+
+    def _seed_from_document(self, pack: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Entries of the previous document whose files did not change since ``since``
+
+        The overview and the sections untouched by ``git diff since..until`` are
+        kept as they were rendered (source ``document``); the others are written again.
+        """
+        from docgen.incremental import SECTIONS_HEADER, affected_sections, changed_files, parse_sections
+        document = None
+        if Path(self.output_file).is_file():
+            document = Path(self.output_file).read_text(encoding='utf-8')
+        else:
+            rendered = self.load('render', required=False)
+            document = rendered and rendered['markdown']
+        if not document or SECTIONS_HEADER not in document:
+            logger.info("analyze: no sectioned documentation to update, writing every section")
+            return {}
+        try:
+            changed = changed_files(self.since, self.until, cwd=self.base_path)
+        except RuntimeError as e:
+            logger.warning(f"analyze: incremental mode unavailable ({e}), writing every section")
+            return {}
+        affected = affected_sections(changed, EXTENSIONS)
+        logger.info(f"analyze: {len(changed)} files changed since {self.since}, "
+                    f"{len(affected)} section(s) to write again")
+
+        sections = parse_sections(document)
+        sections[OVERVIEW] = document.split(SECTIONS_HEADER, 1)[0].rstrip()
+        return {key: {'digest': pack['entries'][key]['digest'], 'source': 'document', 'text': body}
+                for key, body in sections.items() if key in pack['entries'] and key not in affected}
+
+    @staticmethod
+    def _missing_topics(entries: Dict[str, Dict[str, Any]], texts: Dict[str, Optional[str]]) -> List[str]:
+        """Topics without a written section, which the overview must cover"""
+        from docgen.semantic import SECTION_QUERIES
+        return [key for key in SECTION_QUERIES
+                if not (texts.get(f"{TOPIC}{key}") or entries.get(f"{TOPIC}{key}", {}).get('text'))]
+
+    def _settle_overview(self, analysis: Dict[str, Any], texts: Dict[str, Optional[str]]) -> None:
+        """Record the topics the overview must cover, and write it again if they changed"""
+        entries = analysis['entries']
+        analysis['missing'] = self._missing_topics(entries, texts)
+        overview = entries.get(OVERVIEW)
+        if (overview and overview['source'] == 'llm' and not self.keep_overview
+                and overview.get('missing') != analysis['missing']):
+            del entries[OVERVIEW]
+            analysis['pending'].append(OVERVIEW)
+
+    def _write(self, analysis: Dict[str, Any], key: str) -> Optional[str]:
+        """
+        LLM text of a pending entry, or None if it has no context or the request failed
+
+        A streamed response cut short is returned as it is, and the entry recorded in
+        ``analysis['interrupted']`` so that the next run writes it again.
+        """
+        from docgen.streaming import StreamInterrupted
+        packed = analysis['pack']['entries'][key]
+        if key.startswith(TOPIC) and not packed['hits']:
+            return None
+        try:
+            return self._write_llm(key, self.chunks(analysis['files'], key, packed), analysis['pack']['budget'],
+                                   analysis.get('missing'))
+        except StreamInterrupted as e:
+            logger.error(f"LLM analysis of {key} was interrupted, keeping its partial text until the next run")
+            analysis.setdefault('interrupted', []).append(key)
+            return e.text
+        except Exception as e:
+            fallback = "the overview covers it" if key.startswith(TOPIC) else "rendering it offline"
+            logger.error(f"LLM analysis of {key} failed, {fallback}: {e}")
+            return None
+
+    def prompt(self, key: str, context: str, from_summaries: bool = False,
+               missing: Optional[List[str]] = None) -> str:
+        """
+        Documentation prompt of a pack entry
+
+        Args:
+            key: Pack entry (``OVERVIEW``, a section key or a topic)
+            context: Packed files, map-stage notes or retrieved excerpts
+            from_summaries: True when ``context`` holds map-stage notes
+            missing: Topics the overview must cover itself (default: all of them)
+        """
+        from docgen.semantic import SECTION_QUERIES
+        prompts = PROMPTS[self.language]
+        if key.startswith(TOPIC):
+            return prompts['topic'].format(title=SECTION_QUERIES[key[len(TOPIC):]]['title'], context=context)
+        source = prompts['sources'][from_summaries]
+        if key != OVERVIEW:
+            return prompts['section'].format(key=key, source=source, context=context)
+
+        missing = list(SECTION_QUERIES) if missing is None else missing
+        focus = prompts['focus'] + [f"**{SECTION_QUERIES[topic]['title']}**: {SECTION_QUERIES[topic]['focus']}"
+                                    for topic in missing]
+        separate = [section['title'] for topic, section in SECTION_QUERIES.items() if topic not in missing]
+        return prompts['overview'].format(
+            focus='\n'.join(f"{number}. {item}" for number, item in enumerate(focus, 1)),
+            separate=prompts['separate'].format(titles=', '.join(separate)) if separate else '',
+            source=source, context=context)
+
+    def _write_llm(self, key: str, chunks: List[str], budget: int, missing: Optional[List[str]] = None) -> Optional[str]:
+        """Text of a pack entry from its chunks, map-reducing when there are several"""
+        # Only the overview is streamed, so a single request writes to the output file at a time
+        stream = key == OVERVIEW
+        if len(chunks) <= 1:
+            return self._complete(self.prompt(key, chunks[0] if chunks else '', False, missing), stream)
+        logger.info(f"{key}: {len(chunks)} chunks, using map-reduce analysis")
+        from docgen.chunking import map_reduce
+        return map_reduce(
+            chunks,
+            lambda index, total, context: self._complete(SUMMARY_PROMPT.format(index=index, total=total,
+                                                                               context=context)),
+            lambda summaries: self._complete(self.prompt(key, summaries, True, missing), stream),
+            budget
+        )
+
+    def get_router(self) -> 'LLMRouter':
+        """Provider router, created (and the provider SDKs imported) on the first LLM request"""
+        from docgen.llm_cache import LLMCache
+        from docgen.providers import LLMRouter, load_providers
+        if self.router is None:
+            self.router = LLMRouter(load_providers(self.models), self.cache_dir if self.use_cache else None)
+        if self.llm_cache is None:
+            self.llm_cache = LLMCache(self.cache_dir / 'llm', enabled=self.use_cache)
+        return self.router
+
+    def _complete(self, prompt: str, stream: bool = False) -> Optional[str]:
+        """Send a prompt to the routed LLM, answering identical prompts from the response cache"""
+        if not self.get_router().providers:
+            return None
+        for model in self.router.models():
+            cached = self.llm_cache.get(model, prompt, MAX_TOKENS)
+            if cached is not None:
+                return cached
+        writer = None
+        if stream and self.stream:
+            from docgen.streaming import StreamWriter
+            writer = StreamWriter(self.output_file)
+        text, provider = self.router.complete(prompt, MAX_TOKENS, writer)
+        if writer and writer.interrupted:
+            # Never cache (nor keep as written) a response that was cut short
+            from docgen.streaming import StreamInterrupted
+            raise StreamInterrupted(text)
+        self.llm_cache.put(provider.model, prompt, MAX_TOKENS, text)
+        return text
+
+
+def analyze_in_batches(pipelines: Sequence[Pipeline], provider: Optional['BatchProvider'],
+                       poll_interval: Optional[float] = None) -> int:
+    """
+    Run the analyze stage of several repositories, one combined batch per round
+
+    Every pending entry of every repository becomes a ``MapReduceJob``; an
+    entry whose job failed is rendered offline (and written again next run).
+
+    Args:
+        pipelines: Pipelines whose ``pack`` stage has run
+        provider: Batch backend (None renders every repository offline)
+        poll_interval: Seconds between batch status checks
+
+    Returns:
+        Number of batch rounds submitted
+    """
+    from docgen.batch import MapReduceJob, run_jobs
+    from docgen.llm_cache import LLMCache
+    from docgen.scan_cache import get_cache_dir
+    analyses = [pipeline.begin_analysis() for pipeline in pipelines]
+    jobs: List[Tuple[int, str, 'MapReduceJob']] = []
+    for number, (pipeline, analysis) in enumerate(zip(pipelines, analyses)):
+        if 'artifact' in analysis or analysis['mode'] != 'llm' or provider is None:
+            continue
+        pipeline._settle_overview(analysis, {})
+        pack = analysis['pack']
+        for index, key in enumerate(analysis['pending']):
+            jobs.append((number, key, MapReduceJob(
+                f"r{number}-{index}", pipeline.chunks(analysis['files'], key, pack['entries'][key]), pack['budget'],
+                lambda chunk, total, context: SUMMARY_PROMPT.format(index=chunk, total=total, context=context),
+                lambda context, from_summaries, pipeline=pipeline, key=key, missing=analysis['missing']:
+                    pipeline.prompt(key, context, from_summaries, missing)
+            )))
+
+    rounds = 0
+    if jobs:
+        # Responses are shared by every repository, so they live in the current directory's cache
+        llm_cache = LLMCache(get_cache_dir() / 'llm', enabled=all(pipeline.use_cache for pipeline in pipelines))
+        rounds = run_jobs(provider, [job for _, _, job in jobs], MAX_TOKENS, poll_interval, llm_cache)
+        logger.info(f"analyze: {len(jobs)} entries of {len(pipelines)} repositories written "
+                    f"in {rounds} batch round(s)")
+    for number, (pipeline, analysis) in enumerate(zip(pipelines, analyses)):
+        if 'artifact' not in analysis:
+            pipeline.finish_analysis(analysis, {key: job.documentation for job_number, key, job in jobs
+                                                if job_number == number and not job.failed})
+    return rounds
+
+
+def document_repositories(pipelines: Sequence[Pipeline], batch_provider: str = 'auto',
+                          poll_interval: Optional[float] = None, publish: bool = True) -> None:
+    """
+    Run the stages of several repositories, analyzing all of them through one batch API
+
+    The topic sections are not written in this mode: the overview covers them.
+
+    Args:
+        pipelines: One pipeline per repository
+        batch_provider: ``anthropic``, ``openai``, ``stub`` or ``auto`` (see ``create_batch_provider``)
+        poll_interval: Seconds between batch status checks (default ``DOCGEN_BATCH_POLL_INTERVAL``)
+        publish: Also publish every repository to Confluence
+
+    Raises:
+        ValueError: If ``batch_provider`` is not configured
+        RuntimeError: If a repository could not be published
+    """
+    from docgen.batch import create_batch_provider
+    from docgen.providers import LLMRouter, load_providers
+    from docgen.scan_cache import get_cache_dir
+    provider = None
+    if not all(pipeline.offline for pipeline in pipelines):
+        router = None
+        if batch_provider != 'stub':
+            router = LLMRouter(load_providers(MODELS), get_cache_dir() if pipelines[0].use_cache else None)
+        if batch_provider == 'stub' or router.providers:
+            provider = create_batch_provider(batch_provider, router)
+        else:
+            logger.warning("No LLM API key configured, rendering the repositories offline")
+
+    for pipeline in pipelines:
+        pipeline.topics = False
+        pipeline.models = {provider.name: provider.model} if provider else {}
+        pipeline.run(['scan', 'pack'])
+    with get_report().stage('stage.analyze'):
+        analyze_in_batches(pipelines, provider, poll_interval)
+
+    failed = []
+    for pipeline in pipelines:
+        try:
+            pipeline.run(['render', 'publish'] if publish else ['render'])
+        except RuntimeError as e:
+            logger.error(f"{pipeline.base_path}: {e}")
+            failed.append(str(pipeline.base_path))
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(pipelines)} repositories failed: {', '.join(failed)}")
@@ -0,0 +1,416 @@
+"""
+LLM providers and latency-aware routing
+
+Each provider wraps one SDK client (Anthropic, Gemini, OpenAI) behind the
+same ``complete``/``stream`` calls. ``LLMRouter`` keeps per-provider latency
+and error statistics (saved in the cache directory, so CI runs learn from
+the previous ones), sends each request to the fastest healthy provider and
+falls back to the next one when a call fails. With hedging enabled
+(``DOCGEN_HEDGE=1``), a request still running after the provider's p95
+latency is duplicated to the next provider and the first answer wins.
+``load_providers`` only imports the SDKs of the providers that have an API
+key (and are listed in ``DOCGEN_PROVIDERS`` when it is set): each SDK takes
+up to a second to import, which offline and scan-only runs never pay.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from docgen.async_runner import get_rate_limiter
+from docgen.metrics import get_report
+from docgen.packer import estimate_tokens
+from docgen.streaming import StreamWriter, stream_anthropic, stream_gemini, stream_openai
+
+logger = logging.getLogger(__name__)
+
+STATS_NAME = 'provider_stats.json'
+
+# Outcomes and latencies remembered per provider
+STATS_WINDOW = 50
+
+# A provider is unhealthy when more than this share of its recent calls failed...
+MAX_ERROR_RATE = 0.5
+# ...or after this many consecutive failures, until the cooldown has elapsed
+MAX_CONSECUTIVE_ERRORS = 3
+ERROR_COOLDOWN = 300.0
+
+# Latency samples needed before the p95 is trusted as a hedging deadline
+MIN_HEDGE_SAMPLES = 5
+
+
+class Provider:
+    """One LLM backend: a rate-limiter name, a model and blocking/streaming calls"""
+
+    name = 'provider'
+    # Environment variable holding the API key
+    api_key_env = None
+
+    def __init__(self, client: Any, model: str):
+        self.client = client
+        self.model = model
+
+    @property
+    def stage(self) -> str:
+        """Run report stage of this provider's calls"""
+        return f"llm.{self.name}"
+
+    def record_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        """Add the token usage reported by the API to the run report"""
+        get_report().add(self.stage, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    @staticmethod
+    def create_client(api_key: str, model: str) -> Any:
+        """Import the SDK and return an authenticated client"""
+        raise NotImplementedError
+
+    def complete(self, prompt: str, max_tokens: int) -> str:
+        """Return the full response text"""
+        raise NotImplementedError
+
+    def stream(self, prompt: str, max_tokens: int) -> Iterator[str]:
+        """Yield the response text as it arrives"""
+        raise NotImplementedError
+
+
+class AnthropicProvider(Provider):
+    name = 'anthropic'
+    api_key_env = 'ANTHROPIC_API_KEY'
+
+    @staticmethod
+    def create_client(api_key: str, model: str) -> Any:
+        import anthropic
+        return anthropic.Anthropic(api_key=api_key)
+
+    def complete(self, prompt: str, max_tokens: int) -> str:
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        self.record_usage(response.usage.input_tokens, response.usage.output_tokens)
+        return response.content[0].text
+
+    def stream(self, prompt: str, max_tokens: int) -> Iterator[str]:
+        return stream_anthropic(self.client, self.model, prompt, max_tokens)
+
+
+class GeminiProvider(Provider):
+    name = 'gemini'
+    api_key_env = 'GEMINI_API_KEY'
+
+    @staticmethod
+    def create_client(api_key: str, model: str) -> Any:
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(model)
+
+    def complete(self, prompt: str, max_tokens: int) -> str:
+        response = self.client.generate_content(prompt)
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            self.record_usage(usage.prompt_token_count, usage.candidates_token_count)
+        return response.text
+
+    def stream(self, prompt: str, max_tokens: int) -> Iterator[str]:
+        return stream_gemini(self.client, prompt)
+
+
+class OpenAIProvider(Provider):
+    name = 'openai'
+    api_key_env = 'OPENAI_API_KEY'
+
+    @staticmethod
+    def create_client(api_key: str, model: str) -> Any:
+        import openai
+        return openai.OpenAI(api_key=api_key)
+
+    def complete(self, prompt: str, max_tokens: int) -> str:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens
+        )
+        if response.usage is not None:
+            self.record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    def stream(self, prompt: str, max_tokens: int) -> Iterator[str]:
+        return stream_openai(self.client, self.model, prompt, max_tokens)
+
+
+PROVIDERS = {provider.name: provider for provider in (AnthropicProvider, GeminiProvider, OpenAIProvider)}
+
+
+def selected_models(models: Dict[str, str]) -> Dict[str, str]:
+    """
+    Models of the providers that have an API key, without importing any SDK
+
+    ``DOCGEN_PROVIDERS`` (comma-separated names, e.g. ``anthropic``) restricts
+    the providers to use.
+
+    Args:
+        models: Provider name -> model, in fallback order
+
+    Returns:
+        Provider name -> model of the usable providers
+    """
+    selected = os.getenv('DOCGEN_PROVIDERS')
+    names = [name.strip() for name in selected.split(',') if name.strip()] if selected else list(models)
+    usable = {}
+    for name in names:
+        if name not in models:
+            logger.warning(f"Ignoring unsupported LLM provider {name!r} (expected one of: {', '.join(models)})")
+        elif os.getenv(PROVIDERS[name].api_key_env):
+            usable[name] = models[name]
+    return usable
+
+
+def load_providers(models: Dict[str, str]) -> List[Provider]:
+    """
+    Create the providers whose API key is set, importing only their SDKs
+
+    Args:
+        models: Provider name -> model, in fallback order (see ``selected_models``)
+
+    Returns:
+        Configured providers (empty when no API key is set)
+    """
+    providers = []
+    for name, model in selected_models(models).items():
+        provider_class = PROVIDERS[name]
+        try:
+            providers.append(provider_class(provider_class.create_client(os.getenv(provider_class.api_key_env), model),
+                                            model))
+        except Exception as e:
+            logger.warning(f"Failed to initialize the {name} client: {e}")
+    return providers
+
+
+class ProviderStats:
+    """Recent latencies and outcomes of one provider"""
+
+    def __init__(self, latencies: Optional[List[float]] = None, outcomes: Optional[List[bool]] = None,
+                 last_error: float = 0.0):
+        self.latencies = deque(latencies or [], maxlen=STATS_WINDOW)
+        self.outcomes = deque(outcomes or [], maxlen=STATS_WINDOW)
+        self.last_error = last_error
+
+    def record(self, latency: Optional[float], ok: bool) -> None:
+        if ok:
+            self.latencies.append(latency)
+        else:
+            self.last_error = time.time()
+        self.outcomes.append(ok)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile in seconds, or None without samples"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def healthy(self) -> bool:
+        """False while the provider keeps failing, until ``ERROR_COOLDOWN`` has passed since its last error"""
+        if time.time() - self.last_error > ERROR_COOLDOWN:
+            return True
+        recent = list(self.outcomes)[-MAX_CONSECUTIVE_ERRORS:]
+        failing = len(recent) == MAX_CONSECUTIVE_ERRORS and not any(recent)
+        return not failing and self.error_rate <= MAX_ERROR_RATE
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'latencies': list(self.latencies), 'outcomes': list(self.outcomes), 'last_error': self.last_error}
+
+
+class LLMRouter:
+    """Route prompts to the fastest healthy provider, with fallback and optional hedging"""
+
+    def __init__(self, providers: List[Provider], cache_dir: Optional[Union[str, Path]] = None,
+                 hedge: Optional[bool] = None):
+        """
+        Initialize the router and load the saved provider statistics
+
+        Args:
+            providers: Configured providers, in order of preference when no latency is known yet
+            cache_dir: Directory holding ``provider_stats.json`` (statistics are not saved if None)
+            hedge: Duplicate slow requests to a second provider (default ``DOCGEN_HEDGE=1``)
+        """
+        self.providers = providers
+        self.hedge = hedge if hedge is not None else os.getenv('DOCGEN_HEDGE') == '1'
+        self.stats_path = Path(cache_dir) / STATS_NAME if cache_dir is not None else None
+        self.stats: Dict[str, ProviderStats] = {provider.name: ProviderStats() for provider in providers}
+        self.hedged = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        """Load the statistics saved by previous runs"""
+        if self.stats_path is None:
+            return
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable provider statistics {self.stats_path}: {e}")
+            return
+        for name, values in saved.items():
+            if name in self.stats and isinstance(values, dict):
+                self.stats[name] = ProviderStats(values.get('latencies'), values.get('outcomes'),
+                                                 values.get('last_error', 0.0))
+
+    def save(self) -> None:
+        """Write the statistics atomically"""
+        if self.stats_path is None:
+            return
+        with self._lock:
+            saved = {name: stats.to_dict() for name, stats in self.stats.items()}
+        try:
+            self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.stats_path.with_name(f"{self.stats_path.name}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, self.stats_path)
+        except OSError as e:
+            logger.warning(f"Could not save provider statistics: {e}")
+
+    def ranked(self) -> List[Provider]:
+        """
+        Providers in routing order
+
+        Healthy providers come first. Providers without latency samples are
+        tried first, in their configured order, so that every provider gets
+        measured; the others follow, fastest median latency first.
+        """
+        def key(item: Tuple[int, Provider]):
+            position, provider = item
+            stats = self.stats[provider.name]
+            median = stats.percentile(0.5)
+            return (not stats.healthy, median is not None, median or 0.0, position)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=key)]
+
+    def models(self) -> List[str]:
+        """Models of every configured provider, in routing order"""
+        return [provider.model for provider in self.ranked()]
+
+    def _call(self, provider: Provider, prompt: str, max_tokens: int,
+              writer: Optional[StreamWriter] = None) -> str:
+        """Call one provider under its rate limiter and record the outcome"""
+        try:
+            with get_rate_limiter(provider.name).request(estimate_tokens(prompt)):
+                # Time spent waiting for rate-limit budget is not provider latency
+                start = time.monotonic()
+                with get_report().stage(provider.stage) as counters:
+                    if writer:
+                        text = writer.consume(provider.stream(prompt, max_tokens))
+                        # Streams do not report usage: count estimated tokens instead
+                        counters.update(prompt_tokens=estimate_tokens(prompt),
+                                        completion_tokens=estimate_tokens(text))
+                    else:
+                        text = provider.complete(prompt, max_tokens)
+        except Exception:
+            with self._lock:
+                self.stats[provider.name].record(None, False)
+            self.save()
+            raise
+        with self._lock:
+            # A stream cut short counts as a failure even though its partial text is kept
+            self.stats[provider.name].record(time.monotonic() - start, not (writer and writer.interrupted))
+        self.save()
+        return text
+
+    def complete(self, prompt: str, max_tokens: int = 4000,
+                 writer: Optional[StreamWriter] = None) -> Tuple[str, Provider]:
+        """
+        Send a prompt to the best provider, falling back to the others on failure
+
+        Args:
+            prompt: Prompt text
+            max_tokens: Completion token limit
+            writer: Stream the response into this writer (streamed requests are never hedged)
+
+        Returns:
+            (response text, provider that answered)
+
+        Raises:
+            RuntimeError: If no provider is configured
+            Exception: The last provider error, if every provider failed
+        """
+        providers = self.ranked()
+        if not providers:
+            raise RuntimeError("No LLM provider configured")
+
+        tried = 0
+        last_error: Optional[Exception] = None
+        deadline = self._hedge_deadline(providers[0])
+        if writer is None and deadline is not None and len(providers) > 1:
+            tried = 2
+            try:
+                return self._hedged(prompt, max_tokens, providers[0], providers[1], deadline)
+            except Exception as e:
+                last_error = e
+
+        for provider in providers[tried:]:
+            if last_error is not None:
+                # Re-sent after the previous provider failed
+                get_report().add(provider.stage, retries=1)
+            try:
+                return self._call(provider, prompt, max_tokens, writer), provider
+            except Exception as e:
+                logger.warning(f"{provider.name} request failed: {e}")
+                last_error = e
+                if writer and writer.parts:
+                    # Part of the stream was already written: do not start another one
+                    break
+        raise last_error
+
+    def _hedge_deadline(self, provider: Provider) -> Optional[float]:
+        """p95 latency of ``provider`` if hedging is enabled and enough samples exist"""
+        if not self.hedge:
+            return None
+        stats = self.stats[provider.name]
+        if len(stats.latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        return stats.percentile(0.95)
+
+    def _hedged(self, prompt: str, max_tokens: int, primary: Provider, backup: Provider,
+                deadline: float) -> Tuple[str, Provider]:
+        """Run ``primary``, adding ``backup`` if it is still running after ``deadline`` seconds"""
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = {executor.submit(self._call, primary, prompt, max_tokens): primary}
+            done, _ = wait(futures, timeout=deadline)
+            if not done or next(iter(done)).exception() is not None:
+                if not done:
+                    logger.info(f"{primary.name} slower than its p95 ({deadline:.1f}s), hedging with {backup.name}")
+                    with self._lock:
+                        self.hedged += 1
+                futures[executor.submit(self._call, backup, prompt, max_tokens)] = backup
+
+            last_error: Optional[BaseException] = None
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result(), futures[future]
+                    logger.warning(f"{futures[future].name} request failed: {future.exception()}")
+                    last_error = future.exception()
+            raise last_error
+        finally:
+            # The slower request keeps running in the background; its latency is still recorded
+            executor.shutdown(wait=False)
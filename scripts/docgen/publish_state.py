@@ -0,0 +1,103 @@
+"""
+Record of what was last published to Confluence
+
+Confluence normalises the storage format it is given, so comparing the
+rendered body with ``body.storage`` is not always reliable. The publisher
+therefore also remembers the hash of the content it last sent for each page
+together with the resulting page version and parent: if the page is still
+at that version, under the same parent, and the new content hashes the
+same, the PUT is skipped.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = 'confluence_published.json'
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 of rendered storage-format content"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class PublishState:
+    """Per-page hash and version of the last successful publication"""
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        """
+        Args:
+            cache_dir: Directory holding the state file
+        """
+        self.path = Path(cache_dir) / STATE_NAME
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.pages = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable publish state {self.path}: {e}")
+
+    def is_unchanged(self, page: Dict[str, Any], content: str, parent_id: Optional[str] = None) -> bool:
+        """
+        Tell whether an existing page already holds ``content`` under ``parent_id``
+
+        Args:
+            page: Confluence page as returned with ``expand=version,body.storage,ancestors``
+            content: Storage-format content about to be published
+            parent_id: Id of the parent page the page should be under, if any
+
+        Returns:
+            True if the PUT can be skipped
+        """
+        parent = str(parent_id) if parent_id else None
+        ancestors = page.get('ancestors')
+        if parent and ancestors is not None and (not ancestors or str(ancestors[-1]['id']) != parent):
+            return False
+
+        current_body = page.get('body', {}).get('storage', {}).get('value')
+        if current_body is not None and current_body == content:
+            return True
+
+        recorded = self.pages.get(str(page['id']))
+        return bool(recorded and
+                    recorded['hash'] == content_hash(content) and
+                    recorded['version'] == page['version']['number'] and
+                    recorded.get('parent') == parent)
+
+    def record(self, page_id: str, version: int, content: str, parent_id: Optional[str] = None) -> None:
+        """
+        Remember what was published and save the state file
+
+        Safe to call from concurrent uploads sharing this instance.
+
+        Args:
+            page_id: Confluence page id
+            version: Page version after publication
+            content: Storage-format content that was published
+            parent_id: Id of the parent page it was published under, if any
+        """
+        with self._lock:
+            self.pages[str(page_id)] = {'hash': content_hash(content), 'version': version,
+                                        'parent': str(parent_id) if parent_id else None}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.pages, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save publish state: {e}")
+
+
+def published_version(response_json: Dict[str, Any], fallback: Optional[int]) -> Optional[int]:
+    """Version number reported by a create/update response, or ``fallback``"""
+    return response_json.get('version', {}).get('number', fallback)
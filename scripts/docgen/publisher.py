@@ -0,0 +1,221 @@
+"""
+Confluence page publication
+
+``ConfluencePublisher`` creates or updates one page (optionally under a
+parent page) from storage-format content, over a keep-alive
+``RetrySession``. Connectivity and the target space are checked once per
+run, pages whose content did not change are not updated (see
+``docgen.publish_state``) and the id of every published page is kept in
+``page_ids`` so child pages can be attached to their parent. ``requests``
+is only imported by the first publication.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from docgen.publish_state import PublishState, published_version
+
+logger = logging.getLogger(__name__)
+
+SETTINGS = ('CONFLUENCE_BASE_URL', 'CONFLUENCE_USERNAME', 'CONFLUENCE_API_TOKEN', 'CONFLUENCE_SPACE_KEY')
+
+# Update failures after which the page may or may not have been changed (a 409
+# means another version was saved first: ours was not applied)
+AMBIGUOUS_STATUSES = {500, 502, 504}
+
+
+class ConfluencePublisher:
+    """Publish storage-format pages to one Confluence space"""
+
+    def __init__(self, base_url: Optional[str], username: Optional[str], token: Optional[str],
+                 space: Optional[str], cache_dir: Union[str, Path]):
+        """
+        Args:
+            base_url: Confluence URL (``https://yourcompany.atlassian.net/wiki``)
+            username: Account used for basic authentication
+            token: API token of that account
+            space: Key of the target space
+            cache_dir: Directory holding the publish state
+        """
+        self.base_url = base_url.rstrip('/') if base_url else base_url
+        self.username = username
+        self.token = token
+        self.space = space
+        self.cache_dir = cache_dir
+        self.page_ids: Dict[str, str] = {}
+        self.session = None
+        self.state = None
+        self.checked = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, cache_dir: Union[str, Path]) -> 'ConfluencePublisher':
+        """Publisher configured by the ``CONFLUENCE_*`` environment variables"""
+        return cls(*(os.getenv(name) for name in SETTINGS), cache_dir=cache_dir)
+
+    @property
+    def missing_settings(self) -> List[str]:
+        """Environment variables still needed to publish"""
+        values = (self.base_url, self.username, self.token, self.space)
+        return [name for name, value in zip(SETTINGS, values) if not value]
+
+    def get_session(self) -> Any:
+        """Return the shared keep-alive session used for every Confluence request"""
+        if self.session is None:
+            from docgen.http_session import RetrySession
+            self.session = RetrySession(stage='confluence')
+            self.session.auth = (self.username, self.token)
+            self.state = PublishState(self.cache_dir)
+        return self.session
+
+    def check(self) -> bool:
+        """Check once per run that the API answers and the space exists"""
+        import requests
+
+        with self._lock:
+            if self.checked:
+                return True
+            session = self.get_session()
+            try:
+                response = session.get(f"{self.base_url}/rest/api/space")
+                if response.status_code != 200:
+                    logger.error(f"Cannot connect to the Confluence API at {self.base_url} "
+                                 f"({response.status_code}): {response.text[:500]}")
+                    return False
+                response = session.get(f"{self.base_url}/rest/api/space/{self.space}")
+                if response.status_code == 404:
+                    logger.error(f"Space '{self.space}' does not exist or is not accessible, check the space key")
+                    return False
+                if response.status_code != 200:
+                    logger.warning(f"Space check returned {response.status_code}")
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Network error connecting to Confluence: {e}")
+                return False
+            self.checked = True
+            return True
+
+    def _update(self, session: Any, page_url: str, page: Dict[str, Any]) -> Any:
+        """
+        PUT a new page version, retrying once after an ambiguous failure
+
+        A 5xx or a dropped connection does not tell whether the update was
+        applied. The page is read back first: if it reached the version being
+        written with our content the update went through, otherwise it is sent
+        again on top of the current version. The content is compared because a
+        concurrent edit by someone else reaches the same version number.
+
+        Args:
+            session: Confluence session
+            page_url: REST URL of the page
+            page: Update payload, including the target version
+
+        Returns:
+            Response of the update, or of the read-back when it was already applied
+        """
+        import requests
+
+        title = page['title']
+        try:
+            response = session.put(page_url, json=page)
+            if response.status_code not in AMBIGUOUS_STATUSES:
+                return response
+            logger.warning(f"Update of '{title}' returned {response.status_code}, checking the page before retrying")
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            logger.warning(f"Update of '{title}' failed ({e}), checking the page before retrying")
+            response = None
+
+        current = session.get(page_url, params={'expand': 'body.storage,version'})
+        if current.status_code != 200:
+            return response if response is not None else current
+        version = current.json()['version']['number']
+        stored = current.json().get('body', {}).get('storage', {}).get('value')
+        if version == page['version']['number'] and stored == page['body']['storage']['value']:
+            logger.info(f"Update of '{title}' was applied (version {version})")
+            return current
+        return session.put(page_url, json=dict(page, version={'number': version + 1}))
+
+    def publish(self, title: str, content: str, parent_id: Optional[str] = None) -> Optional[str]:
+        """
+        Create or update a page
+
+        Safe to call from concurrent uploads sharing this publisher.
+
+        Args:
+            title: Page title
+            content: Page body in Confluence storage format
+            parent_id: Optional id of the parent page
+
+        Returns:
+            Id of the published (or already up to date) page, or None on failure
+        """
+        import requests
+
+        missing = self.missing_settings
+        if missing:
+            logger.warning(f"Confluence configuration missing: {', '.join(missing)}")
+            return None
+        if not self.check():
+            return None
+
+        session = self.get_session()
+        content_url = f"{self.base_url}/rest/api/content"
+        try:
+            search_response = session.get(content_url, params={
+                'title': title,
+                'spaceKey': self.space,
+                'expand': 'version,body.storage,ancestors'
+            })
+            if search_response.status_code != 200:
+                logger.error(f"Failed to search Confluence: {search_response.status_code} - {search_response.text}")
+                if search_response.status_code == 404:
+                    logger.error("A 404 usually means the base URL is wrong; it should look like "
+                                 "https://yourcompany.atlassian.net/wiki or https://confluence.yourcompany.com")
+                elif search_response.status_code == 401:
+                    logger.error("Authentication failed, check the username and API token")
+                elif search_response.status_code == 403:
+                    logger.error("Permission denied, check the access to the space")
+                return None
+            results = search_response.json().get('results', [])
+
+            page = {
+                'type': 'page',
+                'title': title,
+                'space': {'key': self.space},
+                'body': {'storage': {'value': content, 'representation': 'storage'}}
+            }
+            if parent_id:
+                page['ancestors'] = [{'id': parent_id}]
+
+            if results:
+                # Update existing page
+                page_id = results[0]['id']
+                current_version = results[0]['version']['number']
+                if self.state.is_unchanged(results[0], content, parent_id):
+                    logger.info(f"Confluence page '{title}' is unchanged (version {current_version}), skipping update")
+                    self.page_ids[title] = page_id
+                    return page_id
+                page.update(id=page_id, version={'number': current_version + 1})
+                response = self._update(session, f"{content_url}/{page_id}", page)
+            else:
+                # Create new page
+                current_version = 0
+                response = session.post(content_url, json=page)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error publishing '{title}' to Confluence: {e}")
+            return None
+
+        if response.status_code not in (200, 201):
+            logger.error(f"Failed to publish '{title}' to Confluence: {response.status_code} - {response.text}")
+            return None
+        try:
+            published = response.json()
+        except ValueError:
+            published = {}
+        page_id = published.get('id', results[0]['id'] if results else None)
+        self.page_ids[title] = page_id
+        self.state.record(page_id, published_version(published, current_version + 1), content, parent_id)
+        logger.info(f"Successfully published '{title}' to Confluence")
+        return page_id
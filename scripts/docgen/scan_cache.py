@@ -0,0 +1,247 @@
+"""
+Incremental scan cache
+
+Keeps an on-disk manifest of every scanned file (stat signature, content
+hash and extracted metadata) so that ``scan_codebase`` only re-reads files
+whose modification time or size changed since the previous run. Files
+rejected by ``docgen.ignore.sniff_file`` (binary, generated, minified or
+oversized) are recorded with the reason so they are not sniffed again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from docgen.ignore import SNIFF_BYTES, get_max_file_bytes, sniff_file
+from docgen.packer import estimate_tokens
+from docgen.script_parser import SCRIPT_EXTENSIONS, parse_script
+from docgen.terraform import parse_terraform
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = '.docgen_cache'
+MANIFEST_NAME = 'scan_manifest.json'
+MANIFEST_VERSION = 6
+
+
+def get_cache_dir(base_path: Union[str, Path] = '.') -> Path:
+    """
+    Resolve the cache directory for a scan root
+
+    Args:
+        base_path: Root path being scanned
+
+    Returns:
+        ``DOCGEN_CACHE_DIR`` if set, otherwise ``<base_path>/.docgen_cache``
+    """
+    return Path(os.getenv('DOCGEN_CACHE_DIR') or Path(base_path) / DEFAULT_CACHE_DIR)
+
+
+def extract_metadata(file_path: Path, content: str) -> Dict[str, Any]:
+    """
+    Extract the per-file metadata stored in the manifest
+
+    Args:
+        file_path: Path of the scanned file
+        content: Decoded file content
+
+    Returns:
+        Metadata dictionary (everything ``files_data`` holds except the content)
+    """
+    metadata = {
+        'extension': file_path.suffix,
+        'size': len(content),
+        'lines': len(content.splitlines()),
+        'tokens': estimate_tokens(content)
+    }
+    if file_path.suffix == '.tf':
+        metadata['terraform'] = parse_terraform(content)
+    elif file_path.suffix in SCRIPT_EXTENSIONS:
+        metadata['script'] = parse_script(str(file_path), content)
+    return metadata
+
+
+class FileEntry(dict):
+    """
+    ``files_data`` entry whose ``content`` is read from disk on access
+
+    Entries only carry metadata; indexing ``entry['content']`` reads the body
+    without keeping it, so files that never end up in a prompt are never read
+    and the scan result stays small however large the repository is.
+    ``digest`` is the SHA-256 of the body recorded in the manifest.
+    """
+
+    def __init__(self, path: Path, *args, digest: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self.digest = digest
+
+    def __missing__(self, key: str) -> Any:
+        if key != 'content':
+            raise KeyError(key)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+class ScanCache:
+    """Persistent manifest mapping scanned paths to their cached metadata"""
+
+    def __init__(self, cache_dir: Union[str, Path], enabled: bool = True):
+        """
+        Initialize the cache and load the previous manifest if any
+
+        Args:
+            cache_dir: Directory holding the manifest
+            enabled: When False, every file is re-read and nothing is saved
+        """
+        self.cache_dir = Path(cache_dir)
+        self.manifest_path = self.cache_dir / MANIFEST_NAME
+        self.enabled = enabled
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        self.skipped: Dict[str, int] = {}
+        self.max_file_bytes = get_max_file_bytes()
+        self._seen = set()
+        self._lock = threading.Lock()
+
+        if enabled:
+            self.load()
+
+    def load(self) -> None:
+        """Load the manifest from disk, ignoring missing or stale files"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable scan manifest {self.manifest_path}: {e}")
+            return
+
+        if manifest.get('version') != MANIFEST_VERSION:
+            logger.info("Scan manifest format changed, rebuilding cache")
+            return
+
+        self.entries = manifest.get('files', {})
+
+    def lookup(self, key: str, stat_result: os.stat_result) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached record for a file if its stat signature is unchanged
+
+        Args:
+            key: Manifest key (path relative to the scan root)
+            stat_result: Current ``os.stat`` result for the file
+
+        Returns:
+            Cached record, or None if the file must be re-read
+        """
+        cached = self.entries.get(key)
+        if (cached and
+                cached['mtime_ns'] == stat_result.st_mtime_ns and
+                cached['file_size'] == stat_result.st_size):
+            return cached
+        return None
+
+    def get_entry(self, file_path: Path, key: str,
+                  stat_result: Optional[os.stat_result] = None) -> Optional[FileEntry]:
+        """
+        Build the ``files_data`` entry for a file, reusing the manifest when possible
+
+        Files whose mtime and size match the manifest are not opened at all.
+        Other files are sniffed from their first ``SNIFF_BYTES`` bytes (oversized
+        ones are not opened) and skipped files are never fully read or decoded.
+        The rest are read and hashed; if the hash still matches (e.g. a fresh
+        checkout that only reset mtimes) the cached metadata is kept.
+        Safe to call from several threads at once.
+
+        Args:
+            file_path: Path to the file on disk
+            key: Manifest key (path relative to the scan root)
+            stat_result: ``os.stat`` result if the caller already has it
+
+        Returns:
+            FileEntry with metadata only (the content is read again on access),
+            or None if the file is skipped
+
+        Raises:
+            OSError, UnicodeDecodeError: If the file cannot be read as UTF-8
+        """
+        if stat_result is None:
+            stat_result = file_path.stat()
+        with self._lock:
+            self._seen.add(key)
+            cached = self.lookup(key, stat_result) if self.enabled else None
+            if cached:
+                reason = cached['metadata'].get('skipped')
+                if reason:
+                    self.skipped[reason] = self.skipped.get(reason, 0) + 1
+                    return None
+                self.hits += 1
+                return FileEntry(file_path, cached['metadata'], digest=cached['sha256'])
+
+        if stat_result.st_size > self.max_file_bytes:
+            return self._skip(key, stat_result, 'oversized')
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+            reason = sniff_file(head, file_path.name, stat_result.st_size, self.max_file_bytes)
+            if reason:
+                return self._skip(key, stat_result, reason, len(head))
+            raw = head + f.read()
+        content = raw.decode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+
+        previous = self.entries.get(key)
+        reused = bool(previous and previous['sha256'] == digest)
+        metadata = previous['metadata'] if reused else extract_metadata(file_path, content)
+
+        with self._lock:
+            self.bytes_read += len(raw)
+            if reused:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.entries[key] = {
+                'mtime_ns': stat_result.st_mtime_ns,
+                'file_size': stat_result.st_size,
+                'sha256': digest,
+                'metadata': metadata
+            }
+
+        return FileEntry(file_path, metadata, digest=digest)
+
+    def _skip(self, key: str, stat_result: os.stat_result, reason: str, read: int = 0) -> None:
+        """Record a skipped file so an unchanged one is not sniffed again"""
+        logger.debug(f"Skipping {key}: {reason}")
+        with self._lock:
+            self.bytes_read += read
+            self.skipped[reason] = self.skipped.get(reason, 0) + 1
+            self.entries[key] = {
+                'mtime_ns': stat_result.st_mtime_ns,
+                'file_size': stat_result.st_size,
+                'sha256': None,
+                'metadata': {'skipped': reason}
+            }
+        return None
+
+    def save(self) -> None:
+        """Write the manifest atomically, dropping files that were not seen this scan"""
+        if not self.enabled:
+            return
+
+        files = {key: record for key, record in self.entries.items() if key in self._seen}
+        manifest = {'version': MANIFEST_VERSION, 'files': files}
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"Could not save scan manifest: {e}")
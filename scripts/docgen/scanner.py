@@ -0,0 +1,225 @@
+"""
+Repository walker
+
+Walks the tree with ``os.scandir``, pruning excluded directories and paths
+matched by the ``.gitignore`` files met on the way before descending into
+them, and reads, decodes and hashes the matching files on a
+bounded thread pool (through ``ScanCache.get_entry``) so that a cold scan on
+a slow disk keeps several reads in flight instead of waiting on each one.
+Records are produced lazily and only carry metadata: file bodies are read
+again when a prompt actually needs them.
+"""
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from docgen.ignore import GitIgnore
+from docgen.metrics import get_report
+from docgen.scan_cache import DEFAULT_CACHE_DIR, ScanCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXCLUDE_DIRS = {
+    '.git', 'node_modules', '__pycache__', '.pytest_cache', 'venv', '.venv', 'env', '.env',
+    'dist', 'build', '.terraform', DEFAULT_CACHE_DIR
+}
+
+DEFAULT_SCAN_WORKERS = 8
+
+
+def get_scan_workers() -> int:
+    """Number of threads reading files (``DOCGEN_SCAN_WORKERS``, default 8)"""
+    return max(1, int(os.getenv('DOCGEN_SCAN_WORKERS', DEFAULT_SCAN_WORKERS)))
+
+
+def excluded_keys(base_path: Union[str, Path], paths: Optional[Iterable[Union[str, Path]]]) -> Set[str]:
+    """
+    Turn paths (absolute or relative to the current directory) into scan keys
+
+    Used to keep the generator's own outputs (documentation file, work
+    directory) out of the scan, so a run never documents its previous run.
+
+    Args:
+        base_path: Root of the scan
+        paths: Files or directories to leave out
+
+    Returns:
+        Keys relative to ``base_path`` (paths outside it are dropped)
+    """
+    root = os.path.abspath(base_path)
+    keys = set()
+    for path in paths or ():
+        if not path:
+            continue
+        key = os.path.relpath(os.path.abspath(path), root)
+        if key not in (os.curdir, os.pardir) and not key.startswith(os.pardir + os.sep):
+            keys.add(key)
+    return keys
+
+
+def walk_tree(base_path: Union[str, Path],
+              exclude_dirs: Optional[Set[str]] = None,
+              gitignore: Optional[GitIgnore] = None,
+              exclude_keys: Optional[Set[str]] = None) -> Iterator[Tuple[str, str, List[os.DirEntry]]]:
+    """
+    Yield every directory the scan enters, in a stable (sorted, depth-first) order
+
+    Excluded and git-ignored directories are never entered and symbolic
+    links to directories are not followed. The ``.gitignore`` files met on
+    the way are added to ``gitignore``, so the caller can match files with it.
+
+    Args:
+        base_path: Root of the walk
+        exclude_dirs: Directory names to prune (default ``DEFAULT_EXCLUDE_DIRS``)
+        gitignore: Rules collected during the walk (``.gitignore`` files are ignored if None)
+        exclude_keys: Directories to prune, as keys relative to ``base_path`` (see ``excluded_keys``)
+
+    Yields:
+        (directory on disk, key relative to ``base_path``, sorted directory entries)
+    """
+    exclude_dirs = DEFAULT_EXCLUDE_DIRS if exclude_dirs is None else exclude_dirs
+    exclude_keys = exclude_keys or set()
+    stack = [(str(base_path), '')]
+    while stack:
+        directory, relative = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning(f"Cannot list {directory}: {e}")
+            continue
+
+        if gitignore is not None and any(entry.name == '.gitignore' for entry in entries):
+            gitignore.add_file(os.path.join(directory, '.gitignore'), relative.replace(os.sep, '/'))
+        yield directory, relative, entries
+
+        subdirectories = []
+        for entry in entries:
+            key = os.path.join(relative, entry.name) if relative else entry.name
+            try:
+                if (entry.is_dir(follow_symlinks=False) and entry.name not in exclude_dirs
+                        and key not in exclude_keys
+                        and not (gitignore and gitignore.is_ignored(key.replace(os.sep, '/'), True))):
+                    subdirectories.append((entry.path, key))
+            except OSError as e:
+                logger.warning(f"Cannot stat {entry.path}: {e}")
+        stack.extend(reversed(subdirectories))
+
+
+def walk_files(base_path: Union[str, Path],
+               extensions: Iterable[str],
+               exclude_dirs: Optional[Set[str]] = None,
+               respect_gitignore: bool = True,
+               exclude_paths: Optional[Iterable[Union[str, Path]]] = None) -> Iterator[Tuple[Path, str, os.stat_result]]:
+    """
+    Yield the files to scan, in a stable (sorted, depth-first) order
+
+    Args:
+        base_path: Root of the scan
+        extensions: File suffixes to keep (e.g. ``{'.tf', '.yml'}``)
+        exclude_dirs: Directory names to prune (default ``DEFAULT_EXCLUDE_DIRS``)
+        respect_gitignore: Skip the paths matched by ``.gitignore`` files
+        exclude_paths: Files or directories never scanned (e.g. the documentation output)
+
+    Yields:
+        (path on disk, key relative to ``base_path``, stat result)
+    """
+    extensions = set(extensions)
+    gitignore = GitIgnore() if respect_gitignore else None
+    excluded = excluded_keys(base_path, exclude_paths)
+    for _, relative, entries in walk_tree(base_path, exclude_dirs, gitignore, excluded):
+        for entry in entries:
+            key = os.path.join(relative, entry.name) if relative else entry.name
+            try:
+                if (os.path.splitext(entry.name)[1] in extensions and key not in excluded and entry.is_file() and not (
+                        gitignore and gitignore.is_ignored(key.replace(os.sep, '/'), False))):
+                    yield Path(entry.path), key, entry.stat()
+            except OSError as e:
+                logger.warning(f"Cannot stat {entry.path}: {e}")
+
+
+def iter_scan(base_path: Union[str, Path],
+              extensions: Iterable[str],
+              scan_cache: ScanCache,
+              exclude_dirs: Optional[Set[str]] = None,
+              workers: Optional[int] = None,
+              respect_gitignore: bool = True,
+              exclude_paths: Optional[Iterable[Union[str, Path]]] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield ``(key, FileEntry)`` records as files are read, in walk order
+
+    The walk is consumed lazily and at most a few reads per worker are in
+    flight, so neither the file list nor any file body is held for the
+    whole tree. Files rejected by the sniffer (see ``ScanCache.get_entry``)
+    are dropped, and files that cannot be read as UTF-8 are logged and skipped.
+
+    Args:
+        base_path: Root of the scan
+        extensions: File suffixes to keep
+        scan_cache: Manifest used to skip unchanged files
+        exclude_dirs: Directory names to prune (default ``DEFAULT_EXCLUDE_DIRS``)
+        workers: Reader threads (default ``DOCGEN_SCAN_WORKERS`` or 8)
+        respect_gitignore: Skip the paths matched by ``.gitignore`` files
+        exclude_paths: Files or directories never scanned (e.g. the documentation output)
+
+    Yields:
+        (path relative to ``base_path``, metadata-only ``FileEntry``)
+    """
+    workers = workers or get_scan_workers()
+
+    def read(file_path: Path, key: str, stat_result: os.stat_result):
+        try:
+            return scan_cache.get_entry(file_path, key, stat_result)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Error reading {file_path}: {e}")
+            return None
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for file_path, key, stat_result in walk_files(base_path, extensions, exclude_dirs, respect_gitignore,
+                                                          exclude_paths):
+            pending.append((key, executor.submit(read, file_path, key, stat_result)))
+            if len(pending) >= workers * 4:
+                key, future = pending.popleft()
+                entry = future.result()
+                if entry is not None:
+                    yield key, entry
+        while pending:
+            key, future = pending.popleft()
+            entry = future.result()
+            if entry is not None:
+                yield key, entry
+
+
+def scan_files(base_path: Union[str, Path],
+               extensions: Iterable[str],
+               scan_cache: ScanCache,
+               exclude_dirs: Optional[Set[str]] = None,
+               workers: Optional[int] = None,
+               respect_gitignore: bool = True,
+               exclude_paths: Optional[Iterable[Union[str, Path]]] = None) -> Dict[str, Any]:
+    """
+    Build ``files_data`` (metadata only) for every matching file
+
+    Args:
+        base_path: Root of the scan
+        extensions: File suffixes to keep
+        scan_cache: Manifest used to skip unchanged files
+        exclude_dirs: Directory names to prune (default ``DEFAULT_EXCLUDE_DIRS``)
+        workers: Reader threads (default ``DOCGEN_SCAN_WORKERS`` or 8)
+        respect_gitignore: Skip the paths matched by ``.gitignore`` files
+        exclude_paths: Files or directories never scanned (e.g. the documentation output)
+
+    Returns:
+        Relative path -> ``FileEntry``, in walk order
+    """
+    bytes_read, hits = scan_cache.bytes_read, scan_cache.hits
+    with get_report().stage('scan') as counters:
+        files_data = dict(iter_scan(base_path, extensions, scan_cache, exclude_dirs, workers,
+                                        respect_gitignore, exclude_paths))
+        counters.update(bytes=scan_cache.bytes_read - bytes_read, cache_hits=scan_cache.hits - hits)
+    return files_data
@@ -0,0 +1,118 @@
+"""
+PowerShell and shell script outlines
+
+Extracts what the userdata/startup scripts do without executing them: the
+header comment, the progress messages they log, defined functions,
+installed Windows features and packages, managed services, opened firewall
+ports, downloads and ``${...}`` template placeholders filled in by
+Terraform ``templatefile``. Results are stored in the scan manifest (see
+``docgen.scan_cache``) like the Terraform index.
+"""
+
+import re
+from pathlib import PurePosixPath
+from typing import Any, Dict, List
+
+SCRIPT_EXTENSIONS = {'.ps1': 'powershell', '.sh': 'shell'}
+
+# Progress messages kept per script
+MAX_STEPS = 30
+
+_PS_FUNCTION_RE = re.compile(r'^\s*function\s+([A-Za-z][\w-]*)', re.IGNORECASE | re.MULTILINE)
+_SH_FUNCTION_RE = re.compile(r'^\s*(?:function\s+)?([A-Za-z_][\w-]*)\s*\(\)\s*\{', re.MULTILINE)
+_PS_PARAM_RE = re.compile(r'^\s*\[(?:[\w.]+)(?:\[\])?\]\s*\$(\w+)', re.MULTILINE)
+_FEATURE_RE = re.compile(r'(?:Install|Add)-WindowsFeature\s+(?:-Name\s+)?([\w,\s-]+?)(?:\s+-|\s*$)',
+                         re.IGNORECASE | re.MULTILINE)
+_OPTIONAL_FEATURE_RE = re.compile(r'Enable-WindowsOptionalFeature\b[^\n]*?-FeatureName\s+"?([\w-]+)', re.IGNORECASE)
+_PACKAGE_RE = re.compile(r'\b(?:apt-get|apt|yum|dnf|choco)\s+install\s+([^\n;&|]+)', re.IGNORECASE)
+_SYSTEMCTL_RE = re.compile(r'\bsystemctl\s+(?:enable|start|restart)\s+(?:--now\s+)?([^\n;&|]+)')
+_PS_SERVICE_RE = re.compile(r'\b(?:Start|Set|Restart)-Service\s+(?:-Name\s+)?"?([^"$\n-][^"\n]*?)"?(?:\s+-|\s*$)',
+                            re.IGNORECASE | re.MULTILINE)
+_UFW_RE = re.compile(r'\bufw\s+allow\s+(\S+)')
+_PS_PORT_RE = re.compile(r'New-NetFirewallRule\b[^\n]*?-LocalPort\s+"?(\d+(?:\s*[,-]\s*\d+)*)', re.IGNORECASE)
+_URL_RE = re.compile(r'https?://[^\s"\'`()$]+(?![\w$(])')
+_PLACEHOLDER_RE = re.compile(r'(?<!\$)\$\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+
+def _unique(values: List[str]) -> List[str]:
+    """Drop duplicates, keeping the first occurrence"""
+    return list(dict.fromkeys(value for value in values if value))
+
+
+def _header(lines: List[str]) -> List[str]:
+    """Leading comment block, without the shebang"""
+    header = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('#!'):
+            continue
+        if not stripped.startswith('#'):
+            if header or stripped:
+                break
+            continue
+        text = stripped.lstrip('#').strip()
+        if text:
+            header.append(text)
+    return header
+
+
+def _log_messages(content: str, language: str, functions: List[str]) -> List[str]:
+    """String arguments of the script's own logging calls (or Write-Host/echo)"""
+    loggers = [name for name in functions if 'log' in name.lower()]
+    if not loggers:
+        loggers = ['Write-Host', 'Write-Output'] if language == 'powershell' else ['echo']
+    pattern = re.compile(
+        r'^\s*(?:' + '|'.join(re.escape(name) for name in loggers) + r')\s+(["\'])(.+?)\1',
+        re.IGNORECASE | re.MULTILINE
+    )
+    return [match.group(2).strip() for match in pattern.finditer(content)]
+
+
+def parse_script(file_path: str, content: str) -> Dict[str, Any]:
+    """
+    Outline a PowerShell or shell script
+
+    Args:
+        file_path: Script path (the extension selects the language)
+        content: Script content
+
+    Returns:
+        {'language', 'summary', 'steps', 'functions', 'parameters', 'features',
+        'packages', 'services', 'ports', 'downloads', 'placeholders'}
+    """
+    language = SCRIPT_EXTENSIONS.get(PurePosixPath(file_path).suffix.lower(), 'shell')
+    powershell = language == 'powershell'
+
+    functions = _unique((_PS_FUNCTION_RE if powershell else _SH_FUNCTION_RE).findall(content))
+    messages = _log_messages(content, language, functions)
+    # Messages ending with "..." announce a step; fall back to every message
+    steps = [message for message in messages if message.endswith('...')] or messages
+
+    packages: List[str] = []
+    for match in _PACKAGE_RE.finditer(content):
+        packages.extend(word for word in match.group(1).split() if not word.startswith('-'))
+    services: List[str] = []
+    for match in _SYSTEMCTL_RE.finditer(content):
+        services.extend(match.group(1).split())
+    if powershell:
+        services.extend(name.strip() for name in _PS_SERVICE_RE.findall(content))
+    features: List[str] = []
+    for match in _FEATURE_RE.finditer(content):
+        features.extend(name.strip() for name in match.group(1).split(','))
+    features.extend(_OPTIONAL_FEATURE_RE.findall(content))
+    ports = [port.strip() for match in _PS_PORT_RE.findall(content) for port in match.split(',')]
+    ports.extend(_UFW_RE.findall(content))
+
+    return {
+        'language': language,
+        'summary': _header(content.splitlines()),
+        'steps': _unique(steps)[:MAX_STEPS],
+        'functions': functions,
+        'parameters': _unique(_PS_PARAM_RE.findall(content)) if powershell else [],
+        'features': _unique(features),
+        'packages': _unique(packages),
+        'services': _unique(services),
+        'ports': _unique(ports),
+        'downloads': _unique(_URL_RE.findall(content)),
+        'placeholders': _unique(_PLACEHOLDER_RE.findall(content))
+    }
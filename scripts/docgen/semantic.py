@@ -0,0 +1,335 @@
+"""
+Semantic retrieval index
+
+Splits the infrastructure sources (Terraform, scripts, YAML) into small
+line-aligned chunks and indexes them so that each topical documentation
+section (deployment, security, monitoring, troubleshooting) is written from
+the few chunks that matter to it instead of the whole codebase. Chunks are embedded with a local
+sentence-transformers model when ``DOCGEN_EMBEDDING_MODEL`` names one, and
+otherwise weighted with TF-IDF. The index is saved in the cache directory
+and updated incrementally: only files whose content hash changed are
+re-chunked.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from docgen.chunking import format_file, split_content
+from docgen.packer import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_INDEX_NAME = 'semantic_index.json'
+SEMANTIC_INDEX_VERSION = 1
+
+# Characters per indexed chunk (a few dozen lines of HCL or PowerShell)
+SEARCH_CHUNK_CHARS = 1500
+
+DEFAULT_TOP_K = 8
+
+# Only the infrastructure sources are indexed: the generator's own modules
+# (which contain the queries below) and its previous output would otherwise
+# be the best match for every topic
+TOPIC_EXTENSIONS = {'.tf', '.ps1', '.sh', '.yml', '.yaml'}
+EXCLUDED_PREFIXES = ('scripts/docgen/',)
+
+# Topical sections written from retrieved chunks: key -> heading, what the
+# section covers (used when it has to be written by the main prompt) and query
+SECTION_QUERIES: Dict[str, Dict[str, str]] = {
+    'deployment': {
+        'title': '🚀 Deployment Guide',
+        'focus': 'How to deploy, configure, and manage the infrastructure',
+        'query': 'deploy deployment terraform init plan apply backend provider region ami instance '
+                 'launch userdata install bootstrap configure domain controller promote environment workflow',
+    },
+    'security': {
+        'title': '🔒 Security',
+        'focus': 'Security configurations, best practices, and compliance',
+        'query': 'security group ingress egress cidr port firewall iam role policy permission kms encrypt '
+                 'password secret credential certificate tls key pair admin access',
+    },
+    'monitoring': {
+        'title': '📊 Monitoring & Logging',
+        'focus': 'Observability setup and best practices',
+        'query': 'monitoring cloudwatch log logging metric alarm event transcript diagnostics health '
+                 'status audit agent output',
+    },
+    'troubleshooting': {
+        'title': '🔧 Troubleshooting',
+        'focus': 'Common issues and their solutions',
+        'query': 'error fail failure retry timeout wait exception catch throw troubleshoot check '
+                 'verify status restart reboot debug warning',
+    },
+}
+
+_WORD_RE = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+')
+
+_STOPWORDS = {
+    'the', 'and', 'for', 'with', 'this', 'that', 'from', 'are', 'not', 'you', 'your', 'all',
+    'into', 'will', 'its', 'has', 'have', 'was', 'can', 'use', 'used', 'any', 'one',
+}
+
+
+def get_top_k() -> int:
+    """Chunks retrieved per section (``DOCGEN_SECTION_TOP_K``, default 8)"""
+    return max(1, int(os.getenv('DOCGEN_SECTION_TOP_K', DEFAULT_TOP_K)))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms
+
+    Identifiers are split on case and underscores (``aws_security_group``
+    and ``SecurityGroup`` both give ``security``, ``group``) and a plural
+    ``s`` is dropped.
+    """
+    terms = []
+    for word in _WORD_RE.findall(text):
+        word = word.lower()
+        if len(word) < 3 or word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def topic_sources(files_data: Dict[str, Any], exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Select the files the topic index is built from
+
+    Args:
+        files_data: Dictionary containing file information
+        exclude: Further paths to leave out (e.g. the documentation output file)
+
+    Returns:
+        Subset of ``files_data`` with the infrastructure sources only
+    """
+    excluded = {str(PurePosixPath(path)) for path in exclude if path}
+    return {file_path: file_info for file_path, file_info in files_data.items()
+            if PurePosixPath(file_path).suffix in TOPIC_EXTENSIONS
+            and not file_path.startswith(EXCLUDED_PREFIXES)
+            and file_path not in excluded}
+
+
+def load_embedder() -> Optional[Any]:
+    """
+    Load the local embedding model named by ``DOCGEN_EMBEDDING_MODEL``
+
+    Returns:
+        A sentence-transformers model, or None to use TF-IDF
+    """
+    model_name = os.getenv('DOCGEN_EMBEDDING_MODEL')
+    if not model_name:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("DOCGEN_EMBEDDING_MODEL is set but sentence-transformers is not installed, using TF-IDF")
+        return None
+    try:
+        return SentenceTransformer(model_name)
+    except Exception as e:
+        logger.warning(f"Could not load embedding model {model_name}, using TF-IDF: {e}")
+        return None
+
+
+class SemanticIndex:
+    """Persistent chunk index answering top-k queries over the scanned files"""
+
+    def __init__(self, cache_dir: Union[str, Path], enabled: bool = True, embedder: Optional[Any] = None):
+        """
+        Initialize the index and load the previous one if it used the same backend
+
+        Args:
+            cache_dir: Directory holding ``semantic_index.json``
+            enabled: When False, the index is rebuilt in memory and never saved
+            embedder: Embedding model (default ``load_embedder()``)
+        """
+        self.path = Path(cache_dir) / SEMANTIC_INDEX_NAME
+        self.enabled = enabled
+        self.embedder = embedder if embedder is not None else load_embedder()
+        self.backend = f"embedding:{os.getenv('DOCGEN_EMBEDDING_MODEL')}" if self.embedder else 'tfidf'
+        # path -> {'digest': str, 'chunks': [{'span', 'lines', 'tokens', 'terms' | 'vector'}]}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.updated = 0
+        self._weights: Optional[Dict[str, Any]] = None
+
+        if enabled:
+            self.load()
+
+    def load(self) -> None:
+        """Load the saved index, ignoring missing, stale or foreign-backend files"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable semantic index {self.path}: {e}")
+            return
+
+        if saved.get('version') == SEMANTIC_INDEX_VERSION and saved.get('backend') == self.backend:
+            self.files = saved.get('files', {})
+
+    def save(self) -> None:
+        """Write the index atomically"""
+        if not self.enabled:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': SEMANTIC_INDEX_VERSION, 'backend': self.backend, 'files': self.files}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save semantic index: {e}")
+
+    def update(self, files_data: Dict[str, Any]) -> None:
+        """
+        Bring the index in line with ``files_data``
+
+        Files whose digest (``FileEntry.digest``, or a hash of the content)
+        is unchanged keep their chunks without being read; removed files are
+        dropped.
+
+        Args:
+            files_data: Dictionary containing file information
+        """
+        files = {}
+        pending = []
+        for file_path, file_info in files_data.items():
+            digest = getattr(file_info, 'digest', None)
+            content = None
+            if digest is None:
+                content = file_info['content']
+                digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            previous = self.files.get(file_path)
+            if previous and previous['digest'] == digest:
+                files[file_path] = previous
+                continue
+
+            if content is None:
+                content = file_info['content']
+            chunks = []
+            offset = 0
+            line = 1
+            for piece in split_content(content, SEARCH_CHUNK_CHARS):
+                end_line = line + max(piece.count('\n') - (1 if piece.endswith('\n') else 0), 0)
+                chunks.append({'span': [offset, offset + len(piece)], 'lines': [line, end_line],
+                               'tokens': estimate_tokens(piece)})
+                # The path is part of the indexed text: file names are strong topic hints
+                pending.append((chunks[-1], f"{file_path}\n{piece}"))
+                offset += len(piece)
+                line += piece.count('\n')
+            files[file_path] = {'digest': digest, 'chunks': chunks}
+            self.updated += 1
+
+        if self.embedder is not None and pending:
+            vectors = self.embedder.encode([text for _, text in pending], normalize_embeddings=True)
+            for (chunk, _), vector in zip(pending, vectors):
+                chunk['vector'] = [round(float(value), 5) for value in vector]
+        else:
+            for chunk, text in pending:
+                chunk['terms'] = dict(Counter(tokenize(text)))
+
+        self.files = files
+        self._weights = None
+
+    def _tfidf(self) -> Dict[str, Any]:
+        """Document frequencies and chunk norms, computed once per update"""
+        if self._weights is None:
+            document_frequency: Counter = Counter()
+            total = 0
+            for record in self.files.values():
+                for chunk in record['chunks']:
+                    document_frequency.update(chunk['terms'].keys())
+                    total += 1
+            idf = {term: math.log((total + 1) / (count + 1)) + 1 for term, count in document_frequency.items()}
+            norms = {}
+            for file_path, record in self.files.items():
+                for number, chunk in enumerate(record['chunks']):
+                    norms[file_path, number] = math.sqrt(sum(
+                        ((1 + math.log(count)) * idf[term]) ** 2 for term, count in chunk['terms'].items()
+                    )) or 1.0
+            self._weights = {'idf': idf, 'norms': norms}
+        return self._weights
+
+    def search(self, query: str, top_k: Optional[int] = None,
+               max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the chunks most relevant to ``query``
+
+        Args:
+            query: Free-text query
+            top_k: Maximum number of chunks (default ``DOCGEN_SECTION_TOP_K`` or 8)
+            max_tokens: Stop before the selected chunks exceed this many tokens
+
+        Returns:
+            Hits ``{'path', 'span', 'lines', 'tokens', 'score'}``, best first
+        """
+        top_k = top_k or get_top_k()
+        scored = []
+        if self.embedder is not None:
+            query_vector = self.embedder.encode([query], normalize_embeddings=True)[0]
+            for file_path, record in self.files.items():
+                for chunk in record['chunks']:
+                    score = sum(a * b for a, b in zip(query_vector, chunk['vector']))
+                    scored.append((float(score), file_path, chunk))
+        else:
+            weights = self._tfidf()
+            idf = weights['idf']
+            query_terms = {term: idf[term] for term in set(tokenize(query)) if term in idf}
+            query_norm = math.sqrt(sum(weight ** 2 for weight in query_terms.values())) or 1.0
+            for file_path, record in self.files.items():
+                for number, chunk in enumerate(record['chunks']):
+                    terms = chunk['terms']
+                    score = sum((1 + math.log(terms[term])) * weight * weight
+                                for term, weight in query_terms.items() if term in terms)
+                    if score > 0:
+                        scored.append((score / (query_norm * weights['norms'][file_path, number]), file_path, chunk))
+
+        scored.sort(key=lambda hit: (-hit[0], hit[1], hit[2]['span'][0]))
+        hits = []
+        used = 0
+        for score, file_path, chunk in scored:
+            if len(hits) >= top_k:
+                break
+            if max_tokens is not None and used + chunk['tokens'] > max_tokens:
+                continue
+            used += chunk['tokens']
+            hits.append({'path': file_path, 'span': chunk['span'], 'lines': chunk['lines'],
+                         'tokens': chunk['tokens'], 'score': score})
+        return hits
+
+
+def render_hits(hits: List[Dict[str, Any]], files_data: Dict[str, Any]) -> str:
+    """
+    Render retrieved chunks as fenced Markdown blocks, in file order
+
+    Args:
+        hits: Result of ``SemanticIndex.search``
+        files_data: Dictionary containing file information
+
+    Returns:
+        Markdown context
+    """
+    parts = []
+    by_path: Dict[str, List[Dict[str, Any]]] = {}
+    for hit in hits:
+        by_path.setdefault(hit['path'], []).append(hit)
+    for file_path in sorted(by_path):
+        file_info = files_data[file_path]
+        content = file_info['content']
+        for hit in sorted(by_path[file_path], key=lambda hit: hit['span'][0]):
+            start, end = hit['span']
+            parts.append(format_file(file_path, file_info['extension'], content[start:end],
+                                     f"(lines {hit['lines'][0]}-{hit['lines'][1]})"))
+    return ''.join(parts)
@@ -0,0 +1,117 @@
+"""
+Streaming LLM output
+
+Consumes the provider streaming APIs and writes the text to the output file
+(and the console) as it arrives, so the first lines appear within about a
+second and an interrupted generation still leaves a partial document.
+"""
+
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Union
+
+logger = logging.getLogger(__name__)
+
+INTERRUPTED_NOTE = "\n\n> ⚠️ Generation interrupted before completion: {error}\n"
+
+
+def stream_anthropic(client: Any, model: str, prompt: str, max_tokens: int) -> Iterator[str]:
+    """Yield text deltas from an Anthropic ``messages.stream`` call"""
+    with client.messages.stream(
+        model=model,
+        max_tokens=max_tokens,
+        messages=[{"role": "user", "content": prompt}]
+    ) as stream:
+        for text in stream.text_stream:
+            yield text
+
+
+def stream_gemini(client: Any, prompt: str) -> Iterator[str]:
+    """Yield text deltas from a Gemini ``generate_content(stream=True)`` call"""
+    for chunk in client.generate_content(prompt, stream=True):
+        if chunk.text:
+            yield chunk.text
+
+
+def stream_openai(client: Any, model: str, prompt: str, max_tokens: int) -> Iterator[str]:
+    """Yield text deltas from an OpenAI streamed chat completion"""
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        stream=True
+    )
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+class StreamInterrupted(Exception):
+    """A stream cut short after some text was received"""
+
+    def __init__(self, text: str):
+        super().__init__("the streamed response was interrupted")
+        self.text = text
+
+
+class StreamWriter:
+    """Append streamed text to a file, flushing at every line break"""
+
+    def __init__(self, path: Union[str, Path], echo: bool = True):
+        """
+        Args:
+            path: Output file, truncated when the stream starts
+            echo: Also copy the text to stdout
+        """
+        self.path = Path(path)
+        self.echo = echo
+        self.parts = []
+        self.interrupted = False
+
+    def consume(self, deltas: Iterable[str]) -> str:
+        """
+        Write every delta as it arrives
+
+        If the stream fails after some text was received, a note is appended
+        and the partial text is returned instead of raising.
+
+        Args:
+            deltas: Text fragments from a provider stream
+
+        Returns:
+            The complete (or partial) text
+
+        Raises:
+            Exception: Whatever the provider raised, if nothing was received
+        """
+        with open(self.path, 'w', encoding='utf-8') as f:
+            try:
+                for delta in deltas:
+                    self.parts.append(delta)
+                    f.write(delta)
+                    if self.echo:
+                        sys.stdout.write(delta)
+                    if '\n' in delta:
+                        f.flush()
+                        if self.echo:
+                            sys.stdout.flush()
+            except Exception as e:
+                if not self.parts:
+                    raise
+                self.interrupted = True
+                logger.warning(f"Stream interrupted after {len(self.text)} characters: {e}")
+                note = INTERRUPTED_NOTE.format(error=e)
+                self.parts.append(note)
+                f.write(note)
+
+        if self.echo:
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+        return self.text
+
+    @property
+    def text(self) -> str:
+        """Text received so far"""
+        return ''.join(self.parts)
+
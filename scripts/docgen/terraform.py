@@ -0,0 +1,536 @@
+"""
+Terraform HCL parsing and resource index
+
+A small native HCL reader that extracts the top-level blocks of ``.tf``
+files (resources, data sources, modules, variables, outputs, providers,
+locals) with their attributes and cross-references. Per-file results are
+stored in the scan manifest (see ``docgen.scan_cache``), so unchanged files
+are never re-parsed, and assembled into a per-module index that is rendered
+as a dense prompt summary and as exact variable/output tables.
+"""
+
+import re
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Optional, Tuple
+
+# Longest attribute expression kept in the index
+MAX_EXPRESSION_CHARS = 160
+
+# File name of the per-module summary entries produced by condense_files
+INDEX_ENTRY_NAME = 'terraform.index'
+
+_IDENT_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+_HEREDOC_RE = re.compile(r'<<-?([A-Za-z_][A-Za-z0-9_]*)[ \t]*\n')
+_REFERENCE_RE = re.compile(
+    r'\b(?:(var|local|module)\.([A-Za-z_][A-Za-z0-9_-]*)'
+    r'|(data)\.([a-z][a-z0-9_]*)\.([A-Za-z_][A-Za-z0-9_-]*)'
+    r'|([a-z][a-z0-9]*_[a-z0-9_]+)\.([A-Za-z_][A-Za-z0-9_-]*))'
+)
+_TEMPLATE_FILE_RE = re.compile(r'\b(?:templatefile|file)\(\s*"\$\{path\.module\}/([^"$]+)"')
+
+
+class HCLParseError(ValueError):
+    """Raised when a Terraform file cannot be parsed"""
+
+
+class _Reader:
+    """Cursor over HCL source that knows how to skip strings, heredocs and comments"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+        self.errors: List[str] = []
+
+    def line_of(self, index: int) -> int:
+        return self.text.count('\n', 0, index) + 1
+
+    def skip_comment(self, i: int) -> int:
+        """Skip a comment starting at ``i``, returning the index after it (or ``i``)"""
+        text = self.text
+        if text.startswith('#', i) or text.startswith('//', i):
+            end = text.find('\n', i)
+            return self.length if end == -1 else end
+        if text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            if end == -1:
+                raise HCLParseError(f"Unterminated comment at line {self.line_of(i)}")
+            return end + 2
+        return i
+
+    def skip_blank(self, i: int, newlines: bool = True) -> int:
+        """Skip whitespace (optionally not newlines) and comments"""
+        text = self.text
+        while i < self.length:
+            char = text[i]
+            if char in ' \t\r' or (newlines and char == '\n'):
+                i += 1
+                continue
+            after = self.skip_comment(i)
+            if after == i:
+                break
+            i = after
+        return i
+
+    def skip_string(self, i: int) -> int:
+        """Skip a quoted string (with ``${...}`` templates) starting at ``i``"""
+        text = self.text
+        i += 1
+        while i < self.length:
+            char = text[i]
+            if char == '\\':
+                i += 2
+            elif char == '"':
+                return i + 1
+            elif char in '$%' and text.startswith('{', i + 1):
+                i = self.skip_nested(i + 1, '{', '}')
+            else:
+                i += 1
+        raise HCLParseError("Unterminated string")
+
+    def skip_heredoc(self, i: int) -> int:
+        """Skip a ``<<EOF`` / ``<<-EOF`` heredoc starting at ``i``"""
+        match = _HEREDOC_RE.match(self.text, i)
+        marker = re.compile(r'^[ \t]*' + re.escape(match.group(1)) + r'[ \t]*$', re.MULTILINE)
+        end = marker.search(self.text, match.end())
+        if not end:
+            raise HCLParseError(f"Unterminated heredoc at line {self.line_of(i)}")
+        return end.end()
+
+    def skip_nested(self, i: int, opening: str, closing: str) -> int:
+        """Skip a bracketed expression starting at ``i`` (which holds ``opening``)"""
+        depth = 0
+        text = self.text
+        while i < self.length:
+            char = text[i]
+            if char == '"':
+                i = self.skip_string(i)
+                continue
+            if char == '<' and _HEREDOC_RE.match(text, i):
+                i = self.skip_heredoc(i)
+                continue
+            after = self.skip_comment(i)
+            if after != i:
+                i = after
+                continue
+            if char == opening:
+                depth += 1
+            elif char == closing:
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        raise HCLParseError(f"Unbalanced '{opening}'")
+
+    def read_expression(self, i: int) -> Tuple[str, int]:
+        """Read an attribute value up to the end of line (or closing brace) at depth 0, without comments"""
+        start = i
+        text = self.text
+        pieces = []
+        while i < self.length:
+            char = text[i]
+            if char == '\n' or char == '}':
+                break
+            if char == '"':
+                i = self.skip_string(i)
+            elif char == '<' and _HEREDOC_RE.match(text, i):
+                i = self.skip_heredoc(i)
+            elif char in '([{':
+                i = self.skip_nested(i, char, {'(': ')', '[': ']', '{': '}'}[char])
+            elif text.startswith('#', i) or text.startswith('//', i) or text.startswith('/*', i):
+                pieces.append(text[start:i])
+                end = self.skip_comment(i)
+                if not text.startswith('/*', i):
+                    return ' '.join(pieces).strip(), end
+                i = start = end
+            else:
+                i += 1
+        pieces.append(text[start:i])
+        return ' '.join(pieces).strip(), i
+
+    def read_label(self, i: int) -> Tuple[Optional[str], int]:
+        """Read a block label (quoted string or identifier)"""
+        if i < self.length and self.text[i] == '"':
+            end = self.skip_string(i)
+            return self.text[i + 1:end - 1], end
+        match = _IDENT_RE.match(self.text, i)
+        if match:
+            return match.group(0), match.end()
+        return None, i
+
+    def parse_body(self, i: int, top_level: bool = False) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Parse attributes and blocks until the closing brace (or end of file)
+
+        Returns:
+            (items, index after the body) where items are
+            ``{'attribute': name, 'value': expr, 'line': n}`` or
+            ``{'block': type, 'labels': [...], 'body': [...], 'line': n}``
+        """
+        items: List[Dict[str, Any]] = []
+        while True:
+            i = self.skip_blank(i)
+            if i >= self.length:
+                if top_level:
+                    return items, i
+                raise HCLParseError("Unexpected end of file, missing '}'")
+            if self.text[i] == '}':
+                if top_level:
+                    # Stray brace (terraform would reject the file): note it and keep going
+                    self.errors.append(f"Unexpected '}}' at line {self.line_of(i)}")
+                    i += 1
+                    continue
+                return items, i + 1
+
+            match = _IDENT_RE.match(self.text, i)
+            if not match:
+                raise HCLParseError(f"Unexpected {self.text[i]!r} at line {self.line_of(i)}")
+            name, line = match.group(0), self.line_of(i)
+            i = self.skip_blank(match.end(), newlines=False)
+
+            if self.text.startswith('=', i) and not self.text.startswith('==', i):
+                value, i = self.read_expression(i + 1)
+                items.append({'attribute': name, 'value': value, 'line': line})
+                continue
+
+            labels = []
+            while i < self.length and self.text[i] != '{':
+                label, after = self.read_label(i)
+                if label is None:
+                    raise HCLParseError(f"Expected '{{' after {name} at line {line}")
+                labels.append(label)
+                i = self.skip_blank(after, newlines=False)
+            body, i = self.parse_body(i + 1)
+            items.append({'block': name, 'labels': labels, 'body': body, 'line': line})
+
+
+def find_references(expression: str) -> List[str]:
+    """
+    Extract references such as ``var.x``, ``module.m``, ``data.t.n`` or ``aws_vpc.main``
+
+    Args:
+        expression: Raw HCL expression
+
+    Returns:
+        Sorted unique reference strings
+    """
+    references = set()
+    for match in _REFERENCE_RE.finditer(expression):
+        if match.group(1):
+            references.add(f"{match.group(1)}.{match.group(2)}")
+        elif match.group(3):
+            references.add(f"data.{match.group(4)}.{match.group(5)}")
+        else:
+            references.add(f"{match.group(6)}.{match.group(7)}")
+    return sorted(references)
+
+
+def _shorten(expression: str) -> str:
+    expression = ' '.join(expression.split())
+    if len(expression) > MAX_EXPRESSION_CHARS:
+        return expression[:MAX_EXPRESSION_CHARS - 3] + '...'
+    return expression
+
+
+def _unquote(expression: Optional[str]) -> Optional[str]:
+    if expression and len(expression) >= 2 and expression[0] == expression[-1] == '"':
+        return expression[1:-1]
+    return expression
+
+
+def _template_files(body: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """(top-level attribute, path) of every ``file``/``templatefile`` call under ``${path.module}``"""
+    files = []
+    for item in body:
+        if 'attribute' in item:
+            files.extend((item['attribute'], path) for path in _TEMPLATE_FILE_RE.findall(item['value']))
+        else:
+            files.extend((item['block'], path) for _, path in _template_files(item['body']))
+    return files
+
+
+def _summarise_body(body: List[Dict[str, Any]]) -> Tuple[Dict[str, str], List[Dict[str, Any]], List[str]]:
+    """Flatten a block body into attributes, nested block summaries and references"""
+    attributes: Dict[str, str] = {}
+    nested: List[Dict[str, Any]] = []
+    references = set()
+    for item in body:
+        if 'attribute' in item:
+            attributes[item['attribute']] = _shorten(item['value'])
+            references.update(find_references(item['value']))
+        else:
+            child_attributes, child_nested, child_refs = _summarise_body(item['body'])
+            nested.append({'type': item['block'], 'labels': item['labels'], 'attributes': child_attributes})
+            nested.extend(child_nested)
+            references.update(child_refs)
+    return attributes, nested, sorted(references)
+
+
+def parse_terraform(content: str) -> Dict[str, Any]:
+    """
+    Parse a ``.tf`` file into a JSON-serialisable summary of its top-level blocks
+
+    Args:
+        content: File content
+
+    Returns:
+        ``{'blocks': [...]}``, plus an ``error`` message if the file is not
+        valid HCL (stray closing braces are reported but do not stop parsing)
+    """
+    reader = _Reader(content)
+    try:
+        items, _ = reader.parse_body(0, top_level=True)
+    except HCLParseError as e:
+        return {'blocks': [], 'error': str(e)}
+
+    blocks = []
+    for item in items:
+        if 'block' not in item:
+            continue
+        attributes, nested, references = _summarise_body(item['body'])
+        depends_on = find_references(attributes.get('depends_on', ''))
+        blocks.append({
+            'kind': item['block'],
+            'labels': item['labels'],
+            'line': item['line'],
+            'attributes': attributes,
+            'nested': nested,
+            'references': references,
+            'depends_on': depends_on,
+            'files': _template_files(item['body'])
+        })
+
+    result: Dict[str, Any] = {'blocks': blocks}
+    if reader.errors:
+        result['error'] = '; '.join(reader.errors)
+    return result
+
+
+def _resolve_source(module_dir: str, source: Optional[str]) -> Optional[str]:
+    """Resolve a local module ``source`` to a directory relative to the repository root"""
+    source = _unquote(source)
+    if not source or not source.startswith(('./', '../')):
+        return None
+    parts: List[str] = [] if module_dir == '.' else module_dir.split('/')
+    for part in source.split('/'):
+        if part in ('', '.'):
+            continue
+        if part == '..':
+            if parts:
+                parts.pop()
+        else:
+            parts.append(part)
+    return '/'.join(parts) or '.'
+
+
+def block_address(kind: str, labels: List[str]) -> str:
+    """Terraform address of a top-level block, e.g. ``aws_vpc.main`` or ``module.network``"""
+    if kind == 'resource':
+        return '.'.join(labels)
+    return '.'.join([{'variable': 'var'}.get(kind, kind)] + labels)
+
+
+def build_index(files_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Assemble the per-module Terraform index from scanned ``.tf`` files
+
+    Args:
+        files_data: Dictionary containing file information; ``.tf`` entries
+            carry their parse result under ``terraform`` (computed on demand
+            when missing)
+
+    Returns:
+        Module directory -> {'files', 'resources', 'data', 'modules', 'variables',
+        'outputs', 'providers', 'locals', 'templates', 'errors'}; ``templates``
+        lists the files loaded with ``file``/``templatefile`` and what uses them
+    """
+    index: Dict[str, Dict[str, Any]] = {}
+    for file_path, file_info in sorted(files_data.items()):
+        if file_info['extension'] != '.tf':
+            continue
+        parsed = file_info.get('terraform') or parse_terraform(file_info['content'])
+        module_dir = str(PurePosixPath(file_path.replace('\\', '/')).parent)
+        module = index.setdefault(module_dir, {
+            'files': [], 'resources': [], 'data': [], 'modules': [], 'variables': [],
+            'outputs': [], 'providers': [], 'locals': [], 'templates': [], 'errors': []
+        })
+        module['files'].append(file_path)
+        if parsed.get('error'):
+            module['errors'].append(f"{file_path}: {parsed['error']}")
+
+        for block in parsed['blocks']:
+            kind, labels, attributes = block['kind'], block['labels'], block['attributes']
+            for attribute, template in block.get('files', []):
+                module['templates'].append({
+                    'path': _resolve_source(module_dir, f"./{template}"),
+                    'used_by': f"local.{attribute}" if kind == 'locals' else block_address(kind, labels),
+                    'attribute': attribute,
+                    'file': file_path
+                })
+            entry = {'file': file_path, 'line': block['line']}
+            if kind == 'resource' and len(labels) == 2:
+                entry.update(type=labels[0], name=labels[1], attributes=attributes,
+                             nested=[nested['type'] for nested in block['nested']],
+                             references=block['references'], depends_on=block['depends_on'])
+                module['resources'].append(entry)
+            elif kind == 'data' and len(labels) == 2:
+                entry.update(type=labels[0], name=labels[1], attributes=attributes,
+                             references=block['references'])
+                module['data'].append(entry)
+            elif kind == 'module' and labels:
+                entry.update(name=labels[0], source=_unquote(attributes.get('source')),
+                             path=_resolve_source(module_dir, attributes.get('source')),
+                             inputs={key: value for key, value in attributes.items()
+                                     if key not in ('source', 'version', 'depends_on', 'providers', 'count', 'for_each')},
+                             references=block['references'], depends_on=block['depends_on'])
+                module['modules'].append(entry)
+            elif kind == 'variable' and labels:
+                entry.update(name=labels[0], type=attributes.get('type'), default=attributes.get('default'),
+                             description=_unquote(attributes.get('description')),
+                             sensitive=attributes.get('sensitive') == 'true',
+                             required='default' not in attributes)
+                module['variables'].append(entry)
+            elif kind == 'output' and labels:
+                entry.update(name=labels[0], value=attributes.get('value'),
+                             description=_unquote(attributes.get('description')),
+                             sensitive=attributes.get('sensitive') == 'true')
+                module['outputs'].append(entry)
+            elif kind == 'provider' and labels:
+                entry.update(name=labels[0], attributes=attributes)
+                module['providers'].append(entry)
+            elif kind == 'locals':
+                module['locals'].extend(sorted(attributes))
+    return index
+
+
+def _cell(value: Any) -> str:
+    """Format a value for a Markdown table cell"""
+    if value is None or value == '':
+        return '-'
+    return str(value).replace('|', '\\|').replace('\n', ' ')
+
+
+def render_variable_table(module: Dict[str, Any]) -> str:
+    """Render a module's variables as a Markdown table"""
+    if not module['variables']:
+        return ''
+    lines = ["| Name | Type | Default | Required | Description |",
+             "|------|------|---------|----------|-------------|"]
+    for variable in sorted(module['variables'], key=lambda v: v['name']):
+        default = variable['default']
+        if default and variable['sensitive']:
+            default = '(sensitive)'
+        elif default:
+            default = f"`{default}`"
+        required = 'yes' if variable['required'] else 'no'
+        lines.append(f"| `{variable['name']}` | {_cell(variable['type'])} | {_cell(default)} | "
+                     f"{required} | {_cell(variable['description'])} |")
+    return '\n'.join(lines) + '\n'
+
+
+def render_output_table(module: Dict[str, Any]) -> str:
+    """Render a module's outputs as a Markdown table"""
+    if not module['outputs']:
+        return ''
+    lines = ["| Name | Value | Sensitive | Description |",
+             "|------|-------|-----------|-------------|"]
+    for output in sorted(module['outputs'], key=lambda o: o['name']):
+        value = f"`{output['value']}`" if output['value'] else None
+        sensitive = 'yes' if output['sensitive'] else 'no'
+        lines.append(f"| `{output['name']}` | {_cell(value)} | {sensitive} | {_cell(output['description'])} |")
+    return '\n'.join(lines) + '\n'
+
+
+def render_module_reference(module_dir: str, module: Dict[str, Any]) -> str:
+    """
+    Render the exact inputs/outputs reference of one Terraform module
+
+    Args:
+        module_dir: Module directory
+        module: Index entry from ``build_index``
+
+    Returns:
+        Markdown (empty if the module declares no variables or outputs)
+    """
+    parts = []
+    variables = render_variable_table(module)
+    outputs = render_output_table(module)
+    if variables:
+        parts.append(f"#### Variables\n\n{variables}")
+    if outputs:
+        parts.append(f"#### Outputs\n\n{outputs}")
+    if not parts:
+        return ''
+    return f"### `{module_dir}`\n\n" + '\n'.join(parts)
+
+
+def render_index_summary(index: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Render the index as a dense text summary for LLM prompts
+
+    Args:
+        index: Result of ``build_index``
+
+    Returns:
+        One compact block per module listing providers, module calls,
+        resources (with attributes), data sources, variables, outputs and locals
+    """
+    lines = []
+    for module_dir, module in sorted(index.items()):
+        lines.append(f"### Terraform module `{module_dir}` ({', '.join(module['files'])})")
+        for provider in module['providers']:
+            lines.append(f"- provider {provider['name']}: "
+                         + ', '.join(f"{key}={value}" for key, value in provider['attributes'].items()))
+        for call in module['modules']:
+            inputs = ', '.join(f"{key}={value}" for key, value in call['inputs'].items())
+            lines.append(f"- module.{call['name']} (source {call['source']}): {inputs}")
+        for resource in module['resources']:
+            attributes = ', '.join(f"{key}={value}" for key, value in resource['attributes'].items()
+                                   if key != 'depends_on')
+            nested = f" blocks[{', '.join(resource['nested'])}]" if resource['nested'] else ''
+            depends = f" depends_on[{', '.join(resource['depends_on'])}]" if resource['depends_on'] else ''
+            lines.append(f"- resource {resource['type']}.{resource['name']}: {attributes}{nested}{depends}")
+        for data in module['data']:
+            attributes = ', '.join(f"{key}={value}" for key, value in data['attributes'].items())
+            lines.append(f"- data.{data['type']}.{data['name']}: {attributes}")
+        for variable in module['variables']:
+            default = f" = {variable['default']}" if variable['default'] is not None else ' (required)'
+            description = f" — {variable['description']}" if variable['description'] else ''
+            lines.append(f"- var.{variable['name']}: {variable['type'] or 'any'}{default}{description}")
+        for output in module['outputs']:
+            description = f" — {output['description']}" if output['description'] else ''
+            lines.append(f"- output {output['name']} = {output['value']}{description}")
+        if module['locals']:
+            lines.append(f"- locals: {', '.join(module['locals'])}")
+        for error in module['errors']:
+            lines.append(f"- parse error: {error}")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def condense_files(files_data: Dict[str, Any], index: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Replace raw ``.tf`` bodies with one dense index entry per module
+
+    The entries are keyed ``<module dir>/terraform.index`` so they stay in
+    the same documentation section as the files they summarise.
+
+    Args:
+        files_data: Dictionary containing file information
+        index: Result of ``build_index`` (built from ``files_data`` if omitted)
+
+    Returns:
+        New ``files_data`` dictionary suitable for ``chunk_files``
+    """
+    if index is None:
+        index = build_index(files_data)
+    condensed = {file_path: file_info for file_path, file_info in files_data.items()
+                 if file_info['extension'] != '.tf'}
+    for module_dir, module in index.items():
+        summary = render_index_summary({module_dir: module})
+        condensed[f"{module_dir}/{INDEX_ENTRY_NAME}"] = {
+            'extension': '',
+            'content': summary,
+            'size': len(summary),
+            'lines': len(summary.splitlines())
+        }
+    return condensed
@@ -0,0 +1,233 @@
+"""
+Filesystem watching for the live documentation mode
+
+``InotifyWatcher`` watches every directory the scan enters through the
+Linux inotify API (called with ``ctypes``, no extra dependency) and reports
+the files written, moved or deleted. Elsewhere, or when inotify is not
+available (``DOCGEN_WATCH_POLLING=1`` forces it), ``PollingWatcher``
+compares file modification times at a fixed interval. Both group the
+events of one save (editors often write, rename and chmod in a burst) and
+return the changed file keys relative to the watched root, or None when the
+whole tree has to be scanned again (directory created or removed,
+``.gitignore`` edited, event queue overflow).
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
+
+from docgen.ignore import GitIgnore
+from docgen.scanner import excluded_keys, walk_files, walk_tree
+
+logger = logging.getLogger(__name__)
+
+# Seconds without new events before a burst of events is reported
+DEFAULT_DEBOUNCE = 0.05
+
+# Seconds between two polls of the fallback watcher
+DEFAULT_POLL_INTERVAL = 0.5
+
+# inotify flags (<sys/inotify.h>)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ATTRIB | IN_ONLYDIR)
+
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+_EVENT = struct.Struct('iIII')
+
+
+def get_debounce() -> float:
+    """Quiet period grouping the events of one save (``DOCGEN_WATCH_DEBOUNCE``, seconds)"""
+    return float(os.getenv('DOCGEN_WATCH_DEBOUNCE', DEFAULT_DEBOUNCE))
+
+
+class Watcher(ABC):
+    """Report the files changed under ``base_path`` since the previous call"""
+
+    def __init__(self, base_path: Union[str, Path], extensions: Iterable[str],
+                 exclude_dirs: Optional[Set[str]] = None, debounce: Optional[float] = None,
+                 exclude_paths: Optional[Iterable[Union[str, Path]]] = None):
+        self.base_path = str(base_path)
+        self.extensions = set(extensions)
+        self.exclude_dirs = exclude_dirs
+        # The generator's own outputs: rewriting them must not trigger another update
+        self.exclude_paths = list(exclude_paths or ())
+        self.excluded = excluded_keys(base_path, self.exclude_paths)
+        self.debounce = get_debounce() if debounce is None else debounce
+
+    @abstractmethod
+    def changes(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """
+        Wait for changes
+
+        Args:
+            timeout: Seconds to wait for a first event (forever if None)
+
+        Returns:
+            Changed file keys (empty on timeout), or None when everything must be rescanned
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher(Watcher):
+    """Watcher based on Linux inotify, one watch per scanned directory"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, f"inotify_init1: {os.strerror(code)}")
+        self.directories: Dict[int, str] = {}
+        self.gitignore = GitIgnore()
+        self.rewatch()
+
+    def rewatch(self) -> None:
+        """Watch every directory the scan enters (after a structural change)"""
+        self.gitignore = GitIgnore()
+        watched = set(self.directories.values())
+        for directory, relative, _ in walk_tree(self.base_path, self.exclude_dirs, self.gitignore, self.excluded):
+            if relative in watched:
+                continue
+            wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                if code == errno.ENOSPC:
+                    raise OSError(code, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                logger.warning(f"Cannot watch {directory}: {os.strerror(code)}")
+                continue
+            self.directories[wd] = relative
+
+    def _read(self) -> Tuple[Set[str], bool]:
+        """Drain pending events: (changed file keys, rescan needed)"""
+        changed: Set[str] = set()
+        rescan = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return changed, rescan
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                if mask & IN_IGNORED:
+                    # The directory was removed (or moved away)
+                    self.directories.pop(wd, None)
+                    continue
+                relative = self.directories.get(wd)
+                if relative is None or not name:
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        rescan = True
+                    continue
+                key = os.path.join(relative, os.fsdecode(name)) if relative else os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                        rescan = True
+                elif key in self.excluded:
+                    continue
+                elif os.path.basename(key) == '.gitignore':
+                    rescan = True
+                elif os.path.splitext(key)[1] in self.extensions:
+                    changed.add(key)
+
+    def changes(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[str] = set()
+        rescan = False
+        while ready:
+            batch, needs_rescan = self._read()
+            changed |= batch
+            rescan = rescan or needs_rescan
+            ready, _, _ = select.select([self.fd], [], [], self.debounce)
+
+        if rescan:
+            self.rewatch()
+            return None
+        return {key for key in changed if not self.gitignore.is_ignored(key.replace(os.sep, '/'), False)}
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher(Watcher):
+    """Portable watcher comparing the modification time and size of every scanned file"""
+
+    def __init__(self, *args, interval: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.interval = interval if interval is not None else float(
+            os.getenv('DOCGEN_WATCH_POLL_INTERVAL', DEFAULT_POLL_INTERVAL))
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        return {key: (stat_result.st_mtime_ns, stat_result.st_size)
+                for _, key, stat_result in walk_files(self.base_path, self.extensions, self.exclude_dirs,
+                                                      exclude_paths=self.exclude_paths)}
+
+    def changes(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            current = self._snapshot()
+            changed = {key for key in current.keys() | self.snapshot.keys()
+                       if current.get(key) != self.snapshot.get(key)}
+            self.snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+
+def create_watcher(base_path: Union[str, Path], extensions: Iterable[str],
+                   exclude_dirs: Optional[Set[str]] = None,
+                   exclude_paths: Optional[Iterable[Union[str, Path]]] = None) -> Watcher:
+    """
+    Return an inotify watcher on Linux, the polling watcher elsewhere
+
+    Args:
+        base_path: Root of the watched tree
+        extensions: File suffixes to report
+        exclude_dirs: Directory names to ignore (default ``DEFAULT_EXCLUDE_DIRS``)
+        exclude_paths: Files or directories whose changes are never reported
+    """
+    if sys.platform.startswith('linux') and os.getenv('DOCGEN_WATCH_POLLING') != '1':
+        try:
+            return InotifyWatcher(base_path, extensions, exclude_dirs, exclude_paths=exclude_paths)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}), polling for changes instead")
+    return PollingWatcher(base_path, extensions, exclude_dirs, exclude_paths=exclude_paths)
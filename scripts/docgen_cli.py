@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unified documentation pipeline
+
+Runs the documentation stages (scan, pack, analyze, render, publish) of
+``docgen.pipeline``, all of them by default or only those named on the
+command line. Stages exchange JSON artifacts through the work directory,
+so each one can run on its own (in another process or CI job) and skips
+itself when its inputs did not change:
+
+    python scripts/docgen_cli.py                      # every stage
+    python scripts/docgen_cli.py scan pack analyze    # stop before rendering
+    python scripts/docgen_cli.py render --offline     # rerun one stage
+    python scripts/docgen_cli.py --watch --offline    # update the local file on every save
+    python scripts/docgen_cli.py --repos ../a ../b    # several repositories through a batch API
+
+``generate_docs.py`` and ``generate_documentation.py`` are kept as aliases
+of this script.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from docgen.metrics import get_report, get_time_budget
+from docgen.pipeline import STAGES, Pipeline, document_repositories
+
+logger = logging.getLogger(__name__)
+
+
+def main(defaults: Optional[Dict[str, Any]] = None):
+    """
+    Parse the command line and run the pipeline
+
+    Args:
+        defaults: Option defaults of the alias scripts (e.g. ``{'language': 'fr'}``)
+    """
+    parser = argparse.ArgumentParser(description='Generate IaC documentation in explicit, cacheable stages')
+    parser.add_argument('stages', nargs='*', choices=STAGES + ('all',), default='all', metavar='STAGE',
+                        help=f"Stages to run, in pipeline order: {', '.join(STAGES)} (default: all)")
+    parser.add_argument('--path', default='.', help='Repository to document (default: current directory)')
+    parser.add_argument('--work-dir', help='Artifact directory (default: DOCGEN_WORK_DIR or .docgen_cache/pipeline)')
+    parser.add_argument('--output', default='generated_docs.md', help='Markdown file written by the render stage')
+    parser.add_argument('--offline', action='store_true',
+                        help='Render the documentation from the parsed sources without calling an LLM')
+    parser.add_argument('--language', choices=('en', 'fr'), default='en', help='Language of the LLM prose')
+    parser.add_argument('--multi-page', action='store_true',
+                        help='Render and publish a parent Confluence page with one child page per section')
+    parser.add_argument('--force', action='store_true', help='Run the stages even when their inputs are unchanged')
+    parser.add_argument('--no-cache', action='store_true', default=os.getenv('DOCGEN_NO_CACHE') == '1',
+                        help='Ignore the scan manifest, dependency graph and LLM response caches '
+                             '(default: DOCGEN_NO_CACHE=1)')
+    parser.add_argument('--no-topics', action='store_true',
+                        help='Let the overview cover deployment, security, monitoring and troubleshooting '
+                             'instead of writing their sections from the semantic index')
+    parser.add_argument('--since', help='Without a previous analysis, keep the sections of the previous '
+                                        'document whose files did not change since this git revision')
+    parser.add_argument('--until', default='HEAD', help='Target git revision for --since (default: HEAD)')
+    parser.add_argument('--stream', action='store_true', help='Write the overview to the output file as it is generated')
+    parser.add_argument('--dot', help='Also write the Terraform dependency graph to this Graphviz DOT file')
+    parser.add_argument('--watch', action='store_true',
+                        help='Stay resident and update the local documentation whenever a file is saved')
+    parser.add_argument('--repos', nargs='+', metavar='PATH',
+                        help='Document several repositories through the batch API (output written in each one)')
+    parser.add_argument('--batch-provider', default='auto', choices=['auto', 'anthropic', 'openai', 'stub'],
+                        help='Batch backend for --repos (stub answers locally, for tests)')
+    parser.add_argument('--poll-interval', type=float,
+                        help='Seconds between batch status checks (default: DOCGEN_BATCH_POLL_INTERVAL or 30)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--report', help='Write per-stage timings, bytes, tokens and cache hits to this JSON file')
+    parser.add_argument('--metrics', help='Also write the run report in OpenMetrics text format to this file')
+    parser.add_argument('--time-budget', type=float, default=get_time_budget(),
+                        help='Fail when the run takes longer than this many seconds (default: DOCGEN_TIME_BUDGET)')
+    parser.set_defaults(**(defaults or {}))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    stages = list(STAGES) if 'all' in args.stages or not args.stages else args.stages
+    options = dict(offline=args.offline, language=args.language, multi_page=args.multi_page, force=args.force,
+                   use_cache=not args.no_cache, topics=not args.no_topics, since=args.since, until=args.until,
+                   stream=args.stream, report_files=(args.report, args.metrics))
+
+    status = 0
+    try:
+        if args.repos:
+            # Each repository keeps its own artifacts, output file and Confluence page
+            pipelines = [Pipeline(base_path=path, output_file=os.path.join(path, args.output),
+                                  title=f"Documentation - {Path(path).resolve().name}", **options)
+                         for path in args.repos]
+            document_repositories(pipelines, args.batch_provider, args.poll_interval, publish='publish' in stages)
+        else:
+            pipeline = Pipeline(base_path=args.path, work_dir=args.work_dir, output_file=args.output,
+                                dot_file=args.dot, **options)
+            if args.watch:
+                pipeline.watch()
+            else:
+                pipeline.run(stages)
+    except (RuntimeError, ValueError) as e:
+        logger.error(str(e))
+        status = 1
+
+    report = get_report()
+    logger.info(f"Run completed in {report.elapsed:.1f}s")
+    for name, stats in report.to_dict()['stages'].items():
+        logger.debug(f"{name}: {stats['calls']} call(s), {stats['seconds']:.2f}s, {stats['bytes']} bytes, "
+                     f"{stats['prompt_tokens']}+{stats['completion_tokens']} tokens")
+    report.write(args.report, args.metrics)
+    if report.over_budget(args.time_budget):
+        status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Shared pytest setup
+
+The ``docgen`` package lives in ``scripts/`` and is imported by the scripts
+that run from there, so the tests put that directory on ``sys.path``.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
@@ -0,0 +1,81 @@
+"""Tests for the batch rounds of docgen.batch, run against StubBatchProvider"""
+
+from docgen.batch import MapReduceJob, StubBatchProvider, run_jobs, stub_response
+from docgen.llm_cache import LLMCache
+
+
+def summary_prompt(index, total, context):
+    return f"Summarise part {index} of {total}\n{context}"
+
+
+def final_prompt(context, from_summaries):
+    return f"Document {'summaries' if from_summaries else 'files'}\n{context}"
+
+
+def make_job(key, chunks, max_tokens=100):
+    return MapReduceJob(key, chunks, max_tokens, summary_prompt, final_prompt)
+
+
+class FailingStub(StubBatchProvider):
+    """Stub whose requests fail when their id starts with ``failing_prefix``"""
+
+    def __init__(self, failing_prefix):
+        super().__init__(polls=0)
+        self.failing_prefix = failing_prefix
+
+    def results(self, batch_id):
+        return {request_id: None if request_id.startswith(self.failing_prefix) else text
+                for request_id, text in super().results(batch_id).items()}
+
+
+def test_single_chunk_goes_straight_to_the_final_request():
+    provider = StubBatchProvider(polls=2)
+    job = make_job('repo', ['resource "aws_vpc" "main" {}'])
+
+    rounds = run_jobs(provider, [job], poll_interval=0)
+
+    assert rounds == 1
+    assert provider.submitted == 1
+    assert job.done and not job.failed
+    assert job.documentation == stub_response(final_prompt('resource "aws_vpc" "main" {}', False))
+
+
+def test_map_reduce_merges_summaries_over_several_rounds():
+    provider = StubBatchProvider(polls=1)
+    big = make_job('big', [f'chunk {number}' for number in range(6)])
+    small = make_job('small', ['only chunk'])
+
+    rounds = run_jobs(provider, [big, small], poll_interval=0)
+
+    # Summaries, at least one merge round, then the final request; all jobs share each round's batch
+    assert big.round >= 2
+    assert rounds == big.round + 1
+    assert provider.submitted == rounds
+    assert big.documentation.startswith('## Stub response')
+    assert 'Document summaries' in big.documentation
+    assert small.documentation == stub_response(final_prompt('only chunk', False))
+
+
+def test_failed_request_marks_only_its_job_failed():
+    provider = FailingStub('broken-')
+    broken = make_job('broken', ['a', 'b'])
+    healthy = make_job('healthy', ['a', 'b'])
+
+    run_jobs(provider, [broken, healthy], poll_interval=0)
+
+    assert broken.done and broken.failed and broken.documentation is None
+    assert healthy.done and not healthy.failed and healthy.documentation
+
+
+def test_cached_responses_skip_submission(tmp_path):
+    cache = LLMCache(tmp_path)
+    first = make_job('repo', ['x', 'y', 'z'])
+    run_jobs(StubBatchProvider(), [first], poll_interval=0, llm_cache=cache)
+
+    provider = StubBatchProvider()
+    second = make_job('repo', ['x', 'y', 'z'])
+    rounds = run_jobs(provider, [second], poll_interval=0, llm_cache=cache)
+
+    assert rounds >= 2
+    assert provider.submitted == 0
+    assert second.documentation == first.documentation
@@ -0,0 +1,91 @@
+"""Tests for the Markdown to storage format converter of docgen.confluence"""
+
+import re
+from xml.dom import minidom
+
+from docgen.confluence import markdown_to_storage
+
+
+def storage(markdown):
+    """Convert and check that the result is well-formed XML"""
+    result = markdown_to_storage(markdown)
+    minidom.parseString('<root xmlns:ac="urn:ac" xmlns:ri="urn:ri">' + result + '</root>')
+    return result
+
+
+def cdata_text(result):
+    return ''.join(re.findall(r'<!\[CDATA\[(.*?)\]\]>', result, re.DOTALL))
+
+
+def test_nested_emphasis():
+    assert storage('***both*** and **bold _it_ more**') == (
+        '<p><strong><em>both</em></strong> and <strong>bold <em>it</em> more</strong></p>')
+    assert storage('_a **b** c_') == '<p><em>a <strong>b</strong> c</em></p>'
+    assert storage('~~gone **strong**~~') == (
+        '<p><span style="text-decoration: line-through;">gone <strong>strong</strong></span></p>')
+
+
+def test_unbalanced_emphasis_stays_text():
+    assert storage('**unclosed bold and snake_case_name') == '<p>**unclosed bold and snake_case_name</p>'
+
+
+def test_fence_containing_cdata_terminator():
+    result = storage('```hcl\nlocals { marker = "]]>" }\n```')
+
+    assert '<ac:parameter ac:name="language">hcl</ac:parameter>' in result
+    assert cdata_text(result) == 'locals { marker = "]]>" }'
+
+
+def test_fence_inside_list_and_nested_fence():
+    result = storage('- step **one**\n  ```sh\n  echo "]]>"\n  ```\n- two')
+    assert result.startswith('<ul><li>step <strong>one</strong><ac:structured-macro ac:name="code">')
+    assert cdata_text(result) == 'echo "]]>"'
+
+    result = storage('~~~md\n```hcl\nx = 1\n```\n~~~')
+    assert cdata_text(result) == '```hcl\nx = 1\n```'
+
+
+def test_unterminated_fence_runs_to_the_end():
+    result = storage('```\n<not a tag>\n')
+
+    assert cdata_text(result) == '<not a tag>'
+
+
+def test_inline_code_is_escaped():
+    assert storage('use `]]>` or `<tag>` & more') == (
+        '<p>use <code>]]&gt;</code> or <code>&lt;tag&gt;</code> &amp; more</p>')
+
+
+def test_escaped_backtick_before_a_run():
+    assert storage('a \\`` b') == '<p>a `` b</p>'
+    assert storage('path C:\\``dir') == '<p>path C:``dir</p>'
+    assert storage('\\``code` after') == '<p>`<code>code</code> after</p>'
+
+
+def test_tables():
+    result = storage('| Name | Value |\n|------|:-----:|\n| `a|b` | **x** |\n| c \\| d | <e> |\n| short |')
+
+    assert result == ('<table><tbody><tr><th>Name</th><th>Value</th></tr>'
+                      '<tr><td><code>a|b</code></td><td><strong>x</strong></td></tr>'
+                      '<tr><td>c | d</td><td>&lt;e&gt;</td></tr>'
+                      '<tr><td>short</td><td></td></tr></tbody></table>')
+
+
+def test_alert_panels():
+    assert storage('> [!NOTE]\n> Be *careful*\n> here') == (
+        '<ac:structured-macro ac:name="info"><ac:rich-text-body>'
+        '<p>Be <em>careful</em> here</p></ac:rich-text-body></ac:structured-macro>')
+    assert 'ac:name="note"' in storage('> [!warning]\n> text')
+    assert 'ac:name="warning"' in storage('> [!CAUTION]\n> text')
+    assert 'ac:name="note"' in storage('> ⚠️ emoji led quote')
+    assert storage('> plain quote') == '<blockquote><p>plain quote</p></blockquote>'
+
+
+def test_links_and_images_are_escaped():
+    assert storage('[link](https://x.test/?a=1&b=2) ![alt](a.png)') == (
+        '<p><a href="https://x.test/?a=1&amp;b=2">link</a> '
+        '<ac:image ac:alt="alt"><ri:url ri:value="a.png"/></ac:image></p>')
+
+
+def test_deep_quotes_stay_well_formed():
+    storage('> ' * 50 + 'deep')
@@ -0,0 +1,36 @@
+"""Tests for the sectioned document layout of docgen.incremental"""
+
+from docgen.incremental import (SECTIONS_HEADER, affected_sections, build_sectioned_document,
+                                parse_sections, render_section)
+
+EXTENSIONS = {'.tf', '.ps1'}
+
+
+def document(**sections):
+    return build_sectioned_document('# Overview\n', sections)
+
+
+def test_sections_are_parsed_in_document_order():
+    built = document(**{'m': 'body m', 'a': 'body a'})
+
+    assert built.startswith(f'# Overview\n\n{SECTIONS_HEADER}\n')
+    assert list(parse_sections(built).items()) == [('m', 'body m'), ('a', 'body a')]
+
+
+def test_section_without_end_marker_is_not_parsed():
+    previous = document(**{'a': 'body a', 'b': 'body b'})
+    truncated = previous.replace('<!-- docgen:end b -->\n', '')
+
+    assert parse_sections(truncated) == {'a': 'body a'}
+
+
+def test_mismatched_end_marker_is_not_parsed():
+    broken = render_section('a', 'body a').replace('docgen:end a', 'docgen:end b')
+
+    assert parse_sections(broken) == {}
+
+
+def test_affected_sections_skip_undocumented_files():
+    changed = ['modules/vpc/main.tf', 'modules/old/main.tf', 'main.tf', 'README.txt']
+
+    assert affected_sections(changed, EXTENSIONS) == {'modules/vpc', 'modules/old', '.'}
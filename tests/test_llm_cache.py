@@ -0,0 +1,67 @@
+"""Tests for docgen.llm_cache"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from docgen.llm_cache import LLMCache
+
+
+def test_put_then_get(tmp_path):
+    cache = LLMCache(tmp_path)
+    cache.put('model', 'prompt', 100, 'response')
+
+    assert cache.get('model', 'prompt', 100) == 'response'
+    assert cache.get('model', 'prompt', 200) is None
+
+
+def test_concurrent_puts_of_one_key(tmp_path):
+    cache = LLMCache(tmp_path)
+    responses = [f'response {n}' * 1000 for n in range(16)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda response: cache.put('model', 'prompt', 100, response), responses * 4))
+
+    # One complete response wins and no temporary file is left behind
+    assert cache.get('model', 'prompt', 100) in responses
+    assert [path.suffix for path in tmp_path.rglob('*') if path.is_file()] == ['.json']
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = LLMCache(tmp_path, enabled=False)
+    cache.put('model', 'prompt', 100, 'response')
+
+    assert cache.get('model', 'prompt', 100) is None
+    assert not any(tmp_path.iterdir())
+
+
+def cache_size(tmp_path):
+    return sum(path.stat().st_size for path in tmp_path.rglob('*.json'))
+
+
+def test_overwrite_does_not_grow_the_size(tmp_path):
+    cache = LLMCache(tmp_path)
+    cache.put('model', 'prompt', 100, 'response')
+    cache.evict()
+
+    for n in range(5):
+        cache.put('model', 'prompt', 100, f'response {n}')
+    cache.put('model', 'other', 100, 'response')
+
+    assert cache.total_bytes == cache_size(tmp_path)
+
+
+def test_get_and_evict_expire_the_same_entries(tmp_path):
+    cache = LLMCache(tmp_path, ttl=60)
+    cache.put('model', 'used', 100, 'response')
+    cache.put('model', 'unused', 100, 'response')
+    last_use = time.time() - 120
+    for path in tmp_path.rglob('*.json'):
+        os.utime(path, (last_use, last_use))
+    # Only the time of last use counts, in get as in evict
+    os.utime(cache._path(cache.make_key('model', 'used', 100)))
+
+    assert cache.get('model', 'used', 100) == 'response'
+    assert cache.get('model', 'unused', 100) is None
+    cache.evict()
+    assert sorted(tmp_path.rglob('*.json')) == [cache._path(cache.make_key('model', 'used', 100))]
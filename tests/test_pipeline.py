@@ -0,0 +1,307 @@
+"""Tests for docgen.pipeline, run offline on a small repository"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from docgen.incremental import SECTIONS_HEADER, build_sectioned_document, parse_sections
+from docgen.metrics import get_report
+from docgen.pipeline import OVERVIEW, STAGES, Pipeline, document_repositories
+from docgen.providers import LLMRouter, Provider
+
+STAGES_BEFORE_PUBLISH = [stage for stage in STAGES if stage != 'publish']
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Repository with two modules and a root configuration, documented from its root"""
+    for name in ('network', 'compute'):
+        module = tmp_path / 'modules' / name
+        module.mkdir(parents=True)
+        (module / 'variables.tf').write_text(f'variable "{name}_size" {{\n  default = 1\n}}\n')
+        (module / 'main.tf').write_text(f'resource "null_resource" "{name}" {{}}\n')
+    (tmp_path / 'main.tf').write_text('module "network" {\n  source = "./modules/network"\n}\n')
+    (tmp_path / 'README.md').write_text('# Infrastructure\n')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('DOCGEN_CACHE_DIR', raising=False)
+    monkeypatch.delenv('DOCGEN_WORK_DIR', raising=False)
+    monkeypatch.setenv('DOCGEN_ECHO_RPM', '100000')
+    return tmp_path
+
+
+def run(repo, **kwargs):
+    pipeline = Pipeline(base_path='.', work_dir=repo / 'work', offline=True, dot_file='graph.md', **kwargs)
+    pipeline.run(STAGES_BEFORE_PUBLISH)
+    return pipeline, {stage: pipeline.load(stage) for stage in STAGES_BEFORE_PUBLISH}
+
+
+def test_outputs_are_not_scanned(repo):
+    _, artifacts = run(repo)
+
+    assert (repo / 'generated_docs.md').is_file()
+    assert (repo / 'graph.md').is_file()
+    assert sorted(artifacts['scan']['files']) == [
+        'README.md', 'main.tf',
+        'modules/compute/main.tf', 'modules/compute/variables.tf',
+        'modules/network/main.tf', 'modules/network/variables.tf',
+    ]
+
+
+def test_second_run_keeps_every_entry(repo):
+    _, first = run(repo)
+    _, second = run(repo)
+
+    assert set(first['pack']['entries']) == {OVERVIEW, '.', 'modules/compute', 'modules/network'}
+    for stage in STAGES_BEFORE_PUBLISH:
+        assert second[stage]['created'] == first[stage]['created'], stage
+    assert second['pack']['entries'] == first['pack']['entries']
+    assert second['analyze']['entries'] == first['analyze']['entries']
+
+
+def test_run_report_is_not_scanned(repo):
+    report_files = ('docgen_report.json', 'docgen_metrics.txt')
+    pipeline, first = run(repo, report_files=report_files)
+    get_report().write(*report_files)
+    _, second = run(repo, report_files=report_files)
+
+    assert (repo / 'docgen_report.json').is_file()
+    for stage in STAGES_BEFORE_PUBLISH:
+        assert second[stage]['created'] == first[stage]['created'], stage
+    assert 'docgen_report.json' not in second['scan']['files']
+
+
+def test_change_repacks_only_its_section(repo, caplog):
+    _, first = run(repo)
+    (repo / 'modules' / 'compute' / 'main.tf').write_text('resource "null_resource" "other" {}\n')
+
+    caplog.set_level('INFO', logger='docgen.pipeline')
+    _, second = run(repo)
+
+    assert 'pack: 2 of 4 entries packed, 2 unchanged' in caplog.text
+    assert 'analyze (offline): 2 of 4 entries to write' in caplog.text
+    for key in ('.', 'modules/network'):
+        assert second['analyze']['entries'][key] == first['analyze']['entries'][key]
+    assert 'other' in second['analyze']['entries']['modules/compute']['text']
+
+
+class EchoProvider(Provider):
+    """LLM provider answering every prompt locally, failing those that contain ``fail``"""
+
+    name = 'echo'
+
+    def __init__(self, fail=None):
+        super().__init__(None, 'echo-model')
+        self.fail = fail
+        self.prompts = []
+
+    def complete(self, prompt, max_tokens):
+        self.prompts.append(prompt)
+        if self.fail and self.fail in prompt:
+            raise RuntimeError('provider error')
+        first_line = next(line.strip() for line in prompt.splitlines() if line.strip())
+        return f"## Answer {len(self.prompts)}\n\n{first_line}\n"
+
+    def stream(self, prompt, max_tokens):
+        yield self.complete(prompt, max_tokens)
+
+
+class CutProvider(EchoProvider):
+    """LLM provider whose streams break after their first line"""
+
+    def stream(self, prompt, max_tokens):
+        self.prompts.append(prompt)
+        yield "## Partial\n"
+        raise ConnectionError('connection reset')
+
+
+def llm_pipeline(repo, provider, **kwargs):
+    pipeline = Pipeline(base_path='.', work_dir=repo / 'work', use_cache=False, **kwargs)
+    pipeline.models = {provider.name: provider.model}
+    pipeline.router = LLMRouter([provider])
+    return pipeline
+
+
+@pytest.fixture
+def topics_repo(repo):
+    """Repository whose sources are relevant to the deployment and security topics only"""
+    (repo / 'main.tf').write_text('provider "aws" {\n  region = "eu-west-3"\n}\n')
+    (repo / 'modules' / 'network' / 'main.tf').write_text(
+        'resource "aws_security_group" "rdp" {\n  description = "security group ingress port 3389"\n}\n')
+    return repo
+
+
+def test_topics_are_written_before_the_overview(topics_repo):
+    provider = EchoProvider(fail='## 🔒 Security')
+    pipeline = llm_pipeline(topics_repo, provider)
+    pipeline.run(STAGES_BEFORE_PUBLISH)
+
+    # The sections are written concurrently with the rest, the overview once the topics are done
+    prompts = provider.prompts
+    overview = next(prompt for prompt in prompts if 'write the overview' in prompt)
+    topics = [index for index, prompt in enumerate(prompts)
+              if '## 🚀 Deployment Guide' in prompt or '## 🔒 Security' in prompt]
+    assert len(topics) == 2 and max(topics) < prompts.index(overview)
+    # The failed topic and those without relevant sources are covered by the overview
+    assert '**🔒 Security**: Security configurations' in overview
+    assert '**🔧 Troubleshooting**' in overview
+    assert '**🚀 Deployment Guide**' not in overview
+    assert 'No 🚀 Deployment Guide sections either' in overview
+
+    analysis = pipeline.load('analyze')
+    assert 'topic:security' not in analysis['entries']
+    assert analysis['entries'][OVERVIEW]['missing'] == ['security', 'monitoring', 'troubleshooting']
+    document = (topics_repo / 'generated_docs.md').read_text()
+    assert document.index(analysis['entries'][OVERVIEW]['text'].strip()) < document.index(
+        analysis['entries']['topic:deployment']['text'].strip())
+
+
+def test_failed_topic_is_written_again_with_the_overview(topics_repo):
+    llm_pipeline(topics_repo, EchoProvider(fail='## 🔒 Security')).run(STAGES_BEFORE_PUBLISH)
+
+    provider = EchoProvider()
+    llm_pipeline(topics_repo, provider).run(STAGES_BEFORE_PUBLISH)
+
+    # Only the topic and the overview, which no longer covers it, are requested again
+    assert len(provider.prompts) == 2
+    assert '## 🔒 Security' in provider.prompts[0]
+    assert 'write the overview' in provider.prompts[1]
+    assert '**🔒 Security**' not in provider.prompts[1]
+
+
+def test_pack_stores_chunk_plans_and_analyze_renders_them(topics_repo):
+    provider = EchoProvider()
+    llm_pipeline(topics_repo, provider).run(['scan', 'pack'])
+
+    pack = (topics_repo / 'work' / 'pack.json').read_text()
+    assert 'aws_security_group' not in pack and '3389' not in pack
+
+    llm_pipeline(topics_repo, provider).run(['analyze'])
+    section = next(prompt for prompt in provider.prompts if 'Document the `modules/network`' in prompt)
+    security = next(prompt for prompt in provider.prompts if '## 🔒 Security' in prompt)
+    assert 'aws_security_group' in section
+    assert 'security group ingress port 3389' in security
+
+
+def test_interrupted_overview_is_written_again(repo):
+    pipeline = llm_pipeline(repo, CutProvider(), stream=True, topics=False)
+    pipeline.run(STAGES_BEFORE_PUBLISH)
+
+    analysis = pipeline.load('analyze')
+    assert analysis['failed'] == [OVERVIEW]
+    assert analysis['entries'][OVERVIEW]['text'].startswith('## Partial')
+    assert 'Generation interrupted' in (repo / 'generated_docs.md').read_text()
+
+    provider = EchoProvider()
+    pipeline = llm_pipeline(repo, provider, stream=True, topics=False)
+    pipeline.run(STAGES_BEFORE_PUBLISH)
+
+    assert len(provider.prompts) == 1 and 'write the overview' in provider.prompts[0]
+    analysis = pipeline.load('analyze')
+    assert analysis['failed'] == []
+    assert analysis['entries'][OVERVIEW]['text'].startswith('## Answer 1')
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-c', 'user.name=docgen', '-c', 'user.email=docgen@example.com', *args],
+                   cwd=repo, check=True, capture_output=True)
+
+
+def committed_run(repo):
+    """Document a freshly committed repository, then mark every section as hand-edited"""
+    git(repo, 'init', '-q')
+    git(repo, 'add', '.')
+    git(repo, 'commit', '-q', '-m', 'initial')
+    run(repo)
+    # Hand edits show which sections come from the previous document
+    document = (repo / 'generated_docs.md').read_text()
+    overview = document.split(SECTIONS_HEADER, 1)[0]
+    edited = {key: f'{key} kept' for key in parse_sections(document)}
+    (repo / 'generated_docs.md').write_text(build_sectioned_document(overview, edited))
+    shutil.rmtree(repo / 'work')
+    return edited
+
+
+def sources(pipeline):
+    return {key: entry['source'] for key, entry in pipeline.load('analyze')['entries'].items()}
+
+
+def test_since_keeps_the_untouched_sections_of_the_previous_document(repo):
+    committed_run(repo)
+    (repo / 'modules' / 'compute' / 'main.tf').write_text('resource "null_resource" "other" {}\n')
+    git(repo, 'commit', '-q', '-am', 'change compute')
+
+    pipeline, _ = run(repo, since='HEAD~1')
+
+    sections = parse_sections((repo / 'generated_docs.md').read_text())
+    assert sections['modules/network'] == 'modules/network kept'
+    assert sections['.'] == '. kept'
+    assert 'other' in sections['modules/compute']
+    assert sources(pipeline) == {OVERVIEW: 'document', '.': 'document',
+                                 'modules/network': 'document', 'modules/compute': 'offline'}
+
+
+def test_since_writes_added_sections_and_drops_removed_ones(repo):
+    committed_run(repo)
+    shutil.rmtree(repo / 'modules' / 'network')
+    (repo / 'modules' / 'storage').mkdir()
+    (repo / 'modules' / 'storage' / 'main.tf').write_text('resource "null_resource" "storage" {}\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', 'replace network with storage')
+
+    pipeline, _ = run(repo, since='HEAD~1')
+
+    sections = parse_sections((repo / 'generated_docs.md').read_text())
+    assert list(sections) == ['.', 'modules/compute', 'modules/storage']
+    assert sections['modules/compute'] == 'modules/compute kept'
+    assert 'storage' in sections['modules/storage']
+    assert sources(pipeline)['modules/storage'] == 'offline'
+
+
+def test_since_without_sectioned_document_writes_every_section(repo):
+    committed_run(repo)
+    (repo / 'generated_docs.md').write_text('# Hand-written documentation\n')
+
+    pipeline, _ = run(repo, since='HEAD')
+
+    assert 'document' not in sources(pipeline).values()
+    assert 'kept' not in (repo / 'generated_docs.md').read_text()
+
+
+def test_since_with_an_unknown_revision_writes_every_section(repo):
+    committed_run(repo)
+
+    pipeline, _ = run(repo, since='no-such-revision')
+
+    assert 'document' not in sources(pipeline).values()
+    assert 'kept' not in (repo / 'generated_docs.md').read_text()
+
+
+def test_scan_of_changed_files_only_reads_them(repo):
+    pipeline = Pipeline(base_path='.', work_dir=repo / 'work', offline=True)
+    first = pipeline.scan()
+    (repo / 'modules' / 'compute' / 'main.tf').write_text('resource "null_resource" "other" {}\n')
+    (repo / 'README.md').unlink()
+    misses = pipeline.scan_cache.misses
+
+    scan = pipeline.scan({'modules/compute/main.tf', 'README.md', 'generated_docs.md'})
+
+    assert pipeline.scan_cache.misses == misses + 1
+    assert 'README.md' not in scan['files']
+    assert scan['files']['modules/compute/main.tf']['sha256'] != first['files']['modules/compute/main.tf']['sha256']
+    assert scan['files']['modules/network/main.tf'] == first['files']['modules/network/main.tf']
+
+
+def test_repositories_are_analyzed_through_one_batch(repo, tmp_path_factory):
+    other = tmp_path_factory.mktemp('other')
+    (other / 'main.tf').write_text('variable "region" {\n  default = "eu-west-3"\n}\n')
+    pipelines = [Pipeline(base_path=str(path), output_file=str(path / 'docs.md'), use_cache=False)
+                 for path in (repo, other)]
+
+    document_repositories(pipelines, 'stub', poll_interval=0, publish=False)
+
+    for path, pipeline in zip((repo, other), pipelines):
+        assert pipeline.models == {'stub': 'stub'}
+        assert not any(key.startswith('topic:') for key in pipeline.load('pack')['entries'])
+        assert '## Stub response' in (path / 'docs.md').read_text()
+        assert {entry['source'] for entry in pipeline.load('analyze')['entries'].values()} == {'llm'}
@@ -0,0 +1,172 @@
+"""Tests for docgen.publisher against an in-memory Confluence session"""
+
+from typing import Any, Dict, List
+
+from docgen.publish_state import PublishState
+from docgen.publisher import ConfluencePublisher
+
+BASE_URL = 'https://confluence.test/wiki'
+CONTENT_URL = f'{BASE_URL}/rest/api/content'
+
+
+class Response:
+    def __init__(self, status_code: int, data: Any = None):
+        self.status_code = status_code
+        self.data = data if data is not None else {}
+        self.text = str(self.data)
+
+    def json(self) -> Any:
+        return self.data
+
+
+class FakeSession:
+    """Minimal Confluence REST API; ``put_failures`` lists statuses returned by the next PUTs"""
+
+    def __init__(self):
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.requests: List[str] = []
+        self.put_failures: List[int] = []
+        self.apply_failed_puts = False
+        # Saved by someone else instead of the failed PUTs
+        self.concurrent_edit = None
+
+    def get(self, url: str, params: Dict[str, str] = None) -> Response:
+        self.requests.append(f'GET {url}')
+        if url == CONTENT_URL:
+            return Response(200, {'results': [page for page in self.pages.values()
+                                              if page['title'] == params['title']]})
+        if url.startswith(f'{CONTENT_URL}/'):
+            page = self.pages.get(url.rsplit('/', 1)[-1])
+            return Response(200 if page else 404, page)
+        return Response(200)
+
+    def post(self, url: str, json: Dict[str, Any]) -> Response:
+        self.requests.append(f'POST {url}')
+        page_id = str(len(self.pages) + 1)
+        self.pages[page_id] = dict(json, id=page_id, version={'number': 1})
+        return Response(200, self.pages[page_id])
+
+    def put(self, url: str, json: Dict[str, Any]) -> Response:
+        self.requests.append(f'PUT {url}')
+        page = self.pages[url.rsplit('/', 1)[-1]]
+        if self.put_failures:
+            if self.apply_failed_puts:
+                page.update(json)
+            elif self.concurrent_edit:
+                page.update(self.concurrent_edit)
+            return Response(self.put_failures.pop(0))
+        if json['version']['number'] != page['version']['number'] + 1:
+            return Response(409, {'message': 'version conflict'})
+        page.update(json)
+        return Response(200, page)
+
+
+def make_publisher(tmp_path) -> ConfluencePublisher:
+    publisher = ConfluencePublisher(BASE_URL, 'user', 'token', 'DOC', tmp_path)
+    publisher.session = FakeSession()
+    publisher.state = PublishState(tmp_path)
+    return publisher
+
+
+def body(page: Dict[str, Any]) -> str:
+    return page['body']['storage']['value']
+
+
+def test_create_then_skip_unchanged(tmp_path):
+    publisher = make_publisher(tmp_path)
+
+    page_id = publisher.publish('Docs', '<p>v1</p>')
+    assert publisher.publish('Docs', '<p>v1</p>') == page_id
+
+    assert [request.split()[0] for request in publisher.session.requests].count('PUT') == 0
+    assert publisher.session.pages[page_id]['version'] == {'number': 1}
+
+
+def test_update_applied_before_a_gateway_error_is_not_replayed(tmp_path):
+    publisher = make_publisher(tmp_path)
+    page_id = publisher.publish('Docs', '<p>v1</p>')
+    session = publisher.session
+    session.put_failures = [502]
+    session.apply_failed_puts = True
+
+    assert publisher.publish('Docs', '<p>v2</p>') == page_id
+
+    assert session.requests.count(f'PUT {CONTENT_URL}/{page_id}') == 1
+    assert session.pages[page_id]['version'] == {'number': 2}
+    assert body(session.pages[page_id]) == '<p>v2</p>'
+
+
+def test_update_lost_on_a_gateway_error_is_sent_again(tmp_path):
+    publisher = make_publisher(tmp_path)
+    page_id = publisher.publish('Docs', '<p>v1</p>')
+    session = publisher.session
+    session.put_failures = [504]
+
+    assert publisher.publish('Docs', '<p>v2</p>') == page_id
+
+    assert session.requests.count(f'PUT {CONTENT_URL}/{page_id}') == 2
+    assert session.pages[page_id]['version'] == {'number': 2}
+    assert body(session.pages[page_id]) == '<p>v2</p>'
+
+
+def test_concurrent_edit_at_the_target_version_is_not_taken_for_ours(tmp_path):
+    publisher = make_publisher(tmp_path)
+    page_id = publisher.publish('Docs', '<p>v1</p>')
+    session = publisher.session
+    session.put_failures = [502]
+    session.concurrent_edit = {'version': {'number': 2}, 'body': {'storage': {'value': '<p>theirs</p>'}}}
+
+    assert publisher.publish('Docs', '<p>v2</p>') == page_id
+
+    assert session.requests.count(f'PUT {CONTENT_URL}/{page_id}') == 2
+    assert session.pages[page_id]['version'] == {'number': 3}
+    assert body(session.pages[page_id]) == '<p>v2</p>'
+    assert publisher.state.pages[page_id]['version'] == 3
+
+
+def test_version_conflict_is_a_failure(tmp_path):
+    publisher = make_publisher(tmp_path)
+    page_id = publisher.publish('Docs', '<p>v1</p>')
+    session = publisher.session
+    session.put_failures = [409]
+    session.concurrent_edit = {'version': {'number': 2}, 'body': {'storage': {'value': '<p>theirs</p>'}}}
+
+    assert publisher.publish('Docs', '<p>v2</p>') is None
+
+    assert session.requests.count(f'PUT {CONTENT_URL}/{page_id}') == 1
+    assert publisher.state.pages[page_id]['version'] == 1
+    # The next run updates the page on top of the other edit
+    assert publisher.publish('Docs', '<p>v2</p>') == page_id
+    assert body(session.pages[page_id]) == '<p>v2</p>'
+
+
+def test_update_failing_twice_reports_failure(tmp_path):
+    publisher = make_publisher(tmp_path)
+    publisher.publish('Docs', '<p>v1</p>')
+    publisher.session.put_failures = [500, 500]
+
+    assert publisher.publish('Docs', '<p>v2</p>') is None
+
+
+def test_page_moved_to_another_parent_is_updated(tmp_path):
+    publisher = make_publisher(tmp_path)
+    old_parent = publisher.publish('Old parent', '<p>old</p>')
+    new_parent = publisher.publish('New parent', '<p>new</p>')
+    page_id = publisher.publish('Child', '<p>child</p>', old_parent)
+
+    assert publisher.publish('Child', '<p>child</p>', old_parent) == page_id
+    assert publisher.session.pages[page_id]['version'] == {'number': 1}
+
+    assert publisher.publish('Child', '<p>child</p>', new_parent) == page_id
+    assert publisher.session.pages[page_id]['ancestors'] == [{'id': new_parent}]
+    assert publisher.session.pages[page_id]['version'] == {'number': 2}
+
+
+def test_recorded_parent_is_compared_when_ancestors_are_not_returned(tmp_path):
+    state = PublishState(tmp_path)
+    page = {'id': '7', 'version': {'number': 3}, 'body': {'storage': {'value': '<p>normalised</p>'}}}
+    state.record('7', 3, '<p>child</p>', parent_id='1')
+
+    assert state.is_unchanged(page, '<p>child</p>', '1')
+    assert not state.is_unchanged(page, '<p>child</p>', '2')
+    assert not state.is_unchanged(page, '<p>child</p>')
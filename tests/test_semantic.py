@@ -0,0 +1,34 @@
+"""Tests for the topic index of docgen.semantic"""
+
+from docgen.semantic import SECTION_QUERIES, SemanticIndex, topic_sources
+
+
+def entry(content, extension):
+    return {'content': content, 'extension': extension}
+
+
+FILES = {
+    'main.tf': entry('resource "aws_security_group" "dc" {\n  ingress { from_port = 389 }\n}\n', '.tf'),
+    'userdata.ps1': entry('Write-EventLog -LogName Application\nStart-Transcript C:\\logs\\bootstrap.log\n', '.ps1'),
+    'generated_docs.md': entry('## 🔒 Security\nsecurity group ingress firewall password\n', '.md'),
+    'scripts/docgen/semantic.py': entry("'query': 'security group ingress egress cidr port firewall'\n", '.py'),
+    'scripts/docgen/fixture.yml': entry('security: group\n', '.yml'),
+    'docs/output.yml': entry('security group ingress firewall\n', '.yml'),
+}
+
+
+def test_topic_sources_keep_infrastructure_files_only():
+    sources = topic_sources(FILES, exclude=['docs/output.yml'])
+
+    assert sorted(sources) == ['main.tf', 'userdata.ps1']
+
+
+def test_generator_files_never_outrank_the_sources(tmp_path):
+    index = SemanticIndex(tmp_path, enabled=False, embedder=None)
+    index.update(topic_sources(FILES, exclude=['docs/output.yml']))
+
+    security = index.search(SECTION_QUERIES['security']['query'])
+    monitoring = index.search(SECTION_QUERIES['monitoring']['query'])
+
+    assert [hit['path'] for hit in security] == ['main.tf']
+    assert monitoring[0]['path'] == 'userdata.ps1'
@@ -0,0 +1,126 @@
+"""Tests for the HCL reader and module index of docgen.terraform"""
+
+from pathlib import Path
+
+from docgen.terraform import build_index, parse_terraform, render_variable_table
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def tf_files(**files):
+    return {path: {'extension': '.tf', 'content': content} for path, content in files.items()}
+
+
+def test_heredoc_with_braces_and_markers():
+    parsed = parse_terraform('''
+resource "aws_instance" "dc" {
+  user_data = <<-EOF
+    <powershell>
+    if ($x) { Write-Host "}" }
+    }
+    EOF
+  ami = var.ami_id
+}
+
+output "after" {
+  value = aws_instance.dc.id
+}
+''')
+
+    assert 'error' not in parsed
+    instance, output = parsed['blocks']
+    assert instance['attributes']['ami'] == 'var.ami_id'
+    assert instance['attributes']['user_data'].startswith('<<-EOF')
+    assert instance['references'] == ['var.ami_id']
+    assert output['labels'] == ['after'] and output['line'] == 11
+
+
+def test_nested_blocks_are_summarised():
+    parsed = parse_terraform('''
+resource "aws_security_group" "dc" {
+  name = "dc"
+  ingress {
+    from_port   = 389
+    cidr_blocks = [var.vpc_cidr]
+    dynamic "rule" {
+      content { value = local.value }
+    }
+  }
+  depends_on = [aws_vpc.main]
+}
+''')
+
+    block, = parsed['blocks']
+    assert block['attributes'] == {'name': '"dc"', 'depends_on': '[aws_vpc.main]'}
+    assert [nested['type'] for nested in block['nested']] == ['ingress', 'dynamic', 'content']
+    assert block['nested'][0]['attributes']['from_port'] == '389'
+    assert block['references'] == ['aws_vpc.main', 'local.value', 'var.vpc_cidr']
+    assert block['depends_on'] == ['aws_vpc.main']
+
+
+def test_comments_are_skipped():
+    parsed = parse_terraform('''
+# variable "hash" { }
+// variable "slashes" { }
+/* variable "block" {
+} */
+variable "real" { # trailing { comment
+  default = "a" // not part of the value
+  type    = string /* inline */
+}
+''')
+
+    block, = parsed['blocks']
+    assert block['labels'] == ['real']
+    assert block['attributes'] == {'default': '"a"', 'type': 'string'}
+
+
+def test_sensitive_default_is_masked():
+    index = build_index(tf_files(**{'variables.tf': '''
+variable "admin_password" {
+  type      = string
+  default   = "P@ssw0rd"
+  sensitive = true
+}
+
+variable "region" {
+  default = "eu-west-3"
+}
+'''}))
+
+    table = render_variable_table(index['.'])
+    assert 'P@ssw0rd' not in table
+    assert '| `admin_password` | string | (sensitive) | no |' in table
+    assert '`"eu-west-3"`' in table
+
+
+def test_stray_closing_brace_is_reported_and_parsing_continues():
+    parsed = parse_terraform('variable "a" {\n  default = 1\n}\n}\nvariable "b" {}\n')
+
+    assert parsed['error'] == "Unexpected '}' at line 4"
+    assert [block['labels'] for block in parsed['blocks']] == [['a'], ['b']]
+
+
+def test_invalid_file_reports_error_without_blocks():
+    parsed = parse_terraform('variable "a" {\n  default = "unterminated\n')
+
+    assert parsed['blocks'] == []
+    assert parsed['error']
+
+    index = build_index(tf_files(**{'modules/x/main.tf': 'variable "a" {\n'}))
+    assert index['modules/x']['errors'] == ["modules/x/main.tf: Unexpected end of file, missing '}'"]
+
+
+def test_windows_module_variables_keep_the_stray_brace_error():
+    # The module's variables.tf ends with an extra '}' (terraform rejects it):
+    # the error is surfaced in the index and every variable is still documented
+    path = '.infra/modules/aws-ec2-windows/variables.tf'
+    content = (REPO / path).read_text(encoding='utf-8')
+
+    index = build_index(tf_files(**{path: content}))
+    module = index['.infra/modules/aws-ec2-windows']
+
+    assert module['errors'] == [f"{path}: Unexpected '}}' at line 193"]
+    names = {variable['name'] for variable in module['variables']}
+    assert len(names) == content.count('\nvariable "') + content.startswith('variable "')
+    assert 'common_tags' in names
@@ -0,0 +1,63 @@
+"""Tests for docgen.watch and the output exclusion of docgen.scanner"""
+
+import os
+import sys
+
+import pytest
+
+from docgen.scan_cache import ScanCache
+from docgen.scanner import scan_files
+from docgen.watch import InotifyWatcher, PollingWatcher, Watcher
+
+EXTENSIONS = {'.tf', '.md'}
+
+
+def write_output(path, content):
+    """Write the way the generator does: temporary file renamed over the output"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / 'main.tf').write_text('variable "a" {}\n')
+    (tmp_path / 'README.md').write_text('# Readme\n')
+    (tmp_path / 'generated_docs.md').write_text('# Docs\n')
+    return tmp_path
+
+
+def test_scan_skips_excluded_files_and_directories(tree):
+    (tree / 'work').mkdir()
+    (tree / 'work' / 'scan.md').write_text('artifact\n')
+
+    files_data = scan_files(tree, EXTENSIONS, ScanCache(tree / 'cache', enabled=False),
+                            exclude_paths=[tree / 'generated_docs.md', tree / 'work'])
+
+    assert sorted(files_data) == ['README.md', 'main.tf']
+
+
+@pytest.mark.parametrize('watcher_class', [
+    pytest.param(InotifyWatcher, marks=pytest.mark.skipif(not sys.platform.startswith('linux'),
+                                                           reason='inotify is Linux only')),
+    PollingWatcher,
+])
+def test_output_rewrites_are_not_reported(tree, watcher_class):
+    kwargs = {'interval': 0.05} if watcher_class is PollingWatcher else {}
+    output = tree / 'generated_docs.md'
+    watcher = watcher_class(tree, EXTENSIONS, debounce=0.05, exclude_paths=[output, f"{output}.tmp"], **kwargs)
+    try:
+        write_output(output, '# Docs v2\n')
+        assert watcher.changes(timeout=0.3) == set()
+
+        (tree / 'main.tf').write_text('variable "b" {}\n')
+        write_output(output, '# Docs v3\n')
+        assert watcher.changes(timeout=1) == {'main.tf'}
+    finally:
+        watcher.close()
+
+
+def test_watcher_without_changes_cannot_be_created(tree):
+    with pytest.raises(TypeError):
+        Watcher(tree, EXTENSIONS)